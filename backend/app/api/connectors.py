@@ -2,9 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 import uuid
 
-from app.core.supabase import get_supabase_client
+from app.core.supabase import get_supabase_client, run_query
 from app.schemas import Connector, ConnectorCreate
 from app.connectors.autocad import get_autocad_connector
+from app.connectors.base import connector_metrics
 from app.connectors.qgis import get_qgis_connector
 
 router = APIRouter(prefix="/connectors", tags=["connectors"])
@@ -21,7 +22,7 @@ CONNECTOR_TYPES = {
     "qgis": {
         "name": "QGIS",
         "description": "GIS data - GeoJSON, Shapefiles, KML, GeoPackage, QGIS projects",
-        "supported_files": ["qgs", "qgz", "geojson", "shp", "gpkg", "kml", "kmz"],
+        "supported_files": ["qgs", "qgz", "geojson", "shp", "zip", "gpkg", "kml", "kmz"],
         "available": True,
     },
     "solidworks": {
@@ -51,6 +52,12 @@ async def get_connector_types():
     return {"connector_types": CONNECTOR_TYPES}
 
 
+@router.get("/metrics")
+async def get_connector_metrics():
+    """Get file processing metrics per connector type (since the worker started)."""
+    return {"metrics": connector_metrics()}
+
+
 @router.post("/", response_model=dict)
 async def create_connector(connector: ConnectorCreate):
     """Create a new connector."""
@@ -94,7 +101,7 @@ async def create_connector(connector: ConnectorCreate):
             "config": connector.config,
             "status": "active",
         }
-        response = supabase.table("connectors").insert(data).execute()
+        response = await run_query(supabase.table("connectors").insert(data))
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -110,7 +117,7 @@ async def list_connectors(organization_id: Optional[str] = None):
         if organization_id:
             query = query.eq("organization_id", organization_id)
 
-        response = query.order("created_at", desc=True).execute()
+        response = await run_query(query.order("created_at", desc=True))
         return {"connectors": response.data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -121,7 +128,7 @@ async def get_connector(connector_id: str):
     """Get a specific connector by ID."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("connectors").select("*").eq("id", connector_id).single().execute()
+        response = await run_query(supabase.table("connectors").select("*").eq("id", connector_id).single())
         return response.data
     except Exception as e:
         raise HTTPException(status_code=404, detail="Connector not found")
@@ -132,7 +139,7 @@ async def test_connector(connector_id: str):
     """Test a connector's connection."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("connectors").select("*").eq("id", connector_id).single().execute()
+        response = await run_query(supabase.table("connectors").select("*").eq("id", connector_id).single())
         connector_data = response.data
     except Exception:
         raise HTTPException(status_code=404, detail="Connector not found")
@@ -148,7 +155,7 @@ async def test_connector(connector_id: str):
 
         # Update status
         new_status = "active" if result.success else "error"
-        supabase.table("connectors").update({"status": new_status}).eq("id", connector_id).execute()
+        await run_query(supabase.table("connectors").update({"status": new_status}).eq("id", connector_id))
 
         return {
             "success": result.success,
@@ -163,7 +170,7 @@ async def delete_connector(connector_id: str):
     """Delete a connector."""
     try:
         supabase = get_supabase_client()
-        supabase.table("connectors").delete().eq("id", connector_id).execute()
+        await run_query(supabase.table("connectors").delete().eq("id", connector_id))
         return {"success": True, "message": "Connector deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -180,7 +187,7 @@ async def update_connector(connector_id: str, updates: dict):
 
     try:
         supabase = get_supabase_client()
-        response = supabase.table("connectors").update(filtered_updates).eq("id", connector_id).execute()
+        response = await run_query(supabase.table("connectors").update(filtered_updates).eq("id", connector_id))
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,141 +1,606 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, Awaitable, Callable, Optional
+import asyncio
 import uuid
+import zipfile
+
+import orjson
 
 from app.core.config import get_settings, Settings
-from app.core.supabase import get_supabase_client
+from app.core.supabase import get_supabase_client, run_query
 from app.connectors.autocad import get_autocad_connector
+from app.connectors.base import ConnectorResult
 from app.connectors.qgis import get_qgis_connector
 from app.schemas import FileUploadResponse, CadFileCreate
+from app.services.layer_store import (
+    LayerStoreError, LayerStoreUnavailable, get_layer_store, layer_store_available,
+)
+from app.services.parse_pool import ParsePoolBusy
+from app.services.storage_upload import get_storage_uploader
+from app.services.upload_cache import get_upload_cache
+from app.services.upload_jobs import UploadJob, UploadJobError, UploadJobQueueFull, get_upload_job_queue
+from app.services.upload_spool import SpooledUpload, UploadTooLarge, spool_upload, unpack_archive
 
 router = APIRouter(prefix="/files", tags=["files"])
 
 # Supported file types by connector
 AUTOCAD_TYPES = ["dxf", "dwg"]
-QGIS_TYPES = ["qgs", "qgz", "geojson", "json", "shp", "gpkg", "kml", "kmz"]
+QGIS_TYPES = ["qgs", "qgz", "geojson", "json", "shp", "zip", "gpkg", "kml", "kmz"]
 ALL_SUPPORTED_TYPES = AUTOCAD_TYPES + QGIS_TYPES
 
 
-def get_connector_for_file(ext: str):
+def get_connector_for_file(ext: str, config: Optional[dict] = None):
     """Get the appropriate connector based on file extension."""
     if ext in AUTOCAD_TYPES:
-        return get_autocad_connector(), "autocad"
+        return get_autocad_connector(config), "autocad"
     elif ext in QGIS_TYPES:
-        return get_qgis_connector(), "qgis"
+        return get_qgis_connector(config), "qgis"
     return None, None
 
 
-@router.post("/upload", response_model=FileUploadResponse)
-async def upload_file(
-    file: UploadFile = File(...),
-    organization_id: Optional[str] = None,
-    connector_id: Optional[str] = None,
-    settings: Settings = Depends(get_settings),
-):
+async def receive_upload(file: UploadFile, settings: Settings) -> SpooledUpload:
     """
-    Upload and process a CAD/GIS file.
-
-    Supports:
-    - AutoCAD: DXF, DWG
-    - QGIS/GIS: GeoJSON, Shapefiles, KML, GeoPackage, QGIS projects
-
-    The file will be:
-    1. Validated
-    2. Parsed for metadata extraction
-    3. Stored in Supabase Storage
-    4. Metadata saved to database
+    Copy an upload to a spooled temp file, rejecting it if it is over
+    max_file_size_mb. Oversized requests are normally already refused by
+    UploadSizeLimitMiddleware before their body is read.
     """
-    # Validate file type
-    filename = file.filename or "unknown"
-    ext = filename.lower().split(".")[-1] if "." in filename else ""
-
-    if ext not in ALL_SUPPORTED_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type: {ext}. Supported types: {', '.join(ALL_SUPPORTED_TYPES)}"
+    try:
+        return await spool_upload(
+            file,
+            settings.max_file_size_mb * 1024 * 1024,
+            tmp_dir=settings.upload_tmp_dir or None,
         )
-
-    # Read file content
-    content = await file.read()
-
-    # Check file size
-    max_size = settings.max_file_size_mb * 1024 * 1024
-    if len(content) > max_size:
+    except UploadTooLarge:
         raise HTTPException(
             status_code=400,
             detail=f"File too large. Maximum size: {settings.max_file_size_mb}MB"
         )
 
-    # Get appropriate connector
-    connector, connector_type = get_connector_for_file(ext)
-    if not connector:
-        raise HTTPException(status_code=400, detail=f"No connector available for: {ext}")
 
-    result = await connector.process_file(content, filename)
+async def run_connector(connector, upload: SpooledUpload) -> ConnectorResult:
+    """
+    Run a connector on an upload, reusing the cached result when the same
+    content was already processed.
 
-    if not result.success:
-        return FileUploadResponse(
-            success=False,
-            message=result.error or "Failed to process file"
-        )
+    Raises:
+        ParsePoolBusy: Too many files are already being parsed
+    """
+    return await connector.process(upload.path, upload.filename, upload.sha256)
 
-    # Generate file ID and storage path
-    file_id = str(uuid.uuid4())
-    storage_path = f"{organization_id or 'default'}/{file_id}/{filename}"
 
-    # Store file in Supabase Storage
+async def process_with_connector(connector, upload: SpooledUpload) -> ConnectorResult:
+    """Run a connector, turning a full parse queue into a 503."""
     try:
-        supabase = get_supabase_client()
-        storage_response = supabase.storage.from_(settings.storage_bucket).upload(
-            storage_path,
-            content,
-            {"content-type": file.content_type or "application/octet-stream"}
-        )
+        return await run_connector(connector, upload)
+    except ParsePoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
+async def remove_upload(storage_path: str, bucket: str):
+    """Delete a stored file (best effort)."""
+    try:
+        await get_storage_uploader().remove(bucket, [storage_path])
     except Exception as e:
+        print(f"Failed to remove {storage_path}: {e}")
+
+
+async def ingest_upload(
+    connector,
+    upload: SpooledUpload,
+    organization_id: Optional[str],
+    connector_id: Optional[str],
+    settings: Settings,
+    parse: Callable[..., Awaitable[ConnectorResult]] = process_with_connector,
+    report: Callable[[str, str], None] = lambda stage, state: None,
+    rows: Optional[list[dict]] = None,
+) -> FileUploadResponse:
+    """
+    Parse an upload, store it and record it in cad_files.
+
+    Parsing, the Storage upload and (when layer_store_enabled) conversion
+    to the layer store run concurrently, all streaming the spooled file; a
+    file that fails to parse is removed from Storage again. Content the
+    organization already stored (same sha256) is not uploaded while the
+    stored object still exists, and content
+    already in the layer store is not converted again. A failed conversion
+    doesn't fail the upload.
+
+    report(stage, state) is called as the "parse", "storage", "convert"
+    and "database" stages start and finish. When rows is given, the
+    cad_files row is appended to it instead of inserted, so a caller can
+    insert many uploads' rows in one statement.
+    """
+    file_id = str(uuid.uuid4())
+    organization = organization_id or "default"
+    upload_cache = get_upload_cache()
+    stored_path = upload_cache.get_blob(organization, upload.sha256)
+    if stored_path is not None and not await get_storage_uploader().exists(
+        settings.storage_bucket, stored_path
+    ):
+        # The stored copy was deleted since; upload this one instead
+        upload_cache.forget_blob(organization, upload.sha256)
+        stored_path = None
+    storage_path = stored_path or f"{organization}/{file_id}/{upload.filename}"
+
+    async def parse_stage() -> ConnectorResult:
+        report("parse", "running")
+        try:
+            result = await parse(connector, upload)
+        except Exception:
+            report("parse", "failed")
+            raise
+        report("parse", "done" if result.success else "failed")
+        return result
+
+    async def storage_stage() -> Optional[str]:
+        """Returns the Storage error, if any."""
+        if stored_path is not None:
+            report("storage", "skipped")
+            return None
+        report("storage", "running")
+        try:
+            await get_storage_uploader().upload(
+                settings.storage_bucket, storage_path, upload.path, upload.content_type
+            )
+        except Exception as e:
+            report("storage", "failed")
+            return str(e)
+        report("storage", "done")
+        return None
+
+    async def convert_stage() -> Optional[dict]:
+        """Returns the layer store manifest, if there is one."""
+        layer_store = get_layer_store()
+        if (
+            not settings.layer_store_enabled
+            or upload.filename.lower().split(".")[-1] not in connector.convertible_file_types
+            or not layer_store_available()
+        ):
+            report("convert", "skipped")
+            return None
+        if layer_store.has(upload.sha256):
+            report("convert", "skipped")
+            return layer_store.manifest(upload.sha256)
+        report("convert", "running")
+        try:
+            result = await connector.convert_file(upload.path, upload.filename, upload.sha256)
+        except Exception as e:
+            result = ConnectorResult(success=False, error=str(e))
+        if not result.success:
+            print(f"Layer conversion failed for {upload.filename}: {result.error}")
+            report("convert", "failed")
+            return None
+        report("convert", "done")
+        return result.data
+
+    parsed, storage_error, manifest = await asyncio.gather(
+        parse_stage(), storage_stage(), convert_stage(), return_exceptions=True
+    )
+    if isinstance(storage_error, BaseException):
+        storage_error = str(storage_error)
+    if isinstance(manifest, BaseException):
+        manifest = None
+
+    parse_failed = isinstance(parsed, BaseException) or not parsed.success
+    if parse_failed and stored_path is None and storage_error is None:
+        await remove_upload(storage_path, settings.storage_bucket)
+    if isinstance(parsed, BaseException):
+        raise parsed
+
+    if not parsed.success:
+        report("database", "skipped")
+        return FileUploadResponse(
+            success=False,
+            message=parsed.error or "Failed to process file"
+        )
+
+    metadata = parsed.data
+    if manifest is not None:
+        metadata = {
+            **metadata,
+            "layer_store": {
+                "key": upload.sha256,
+                "layers": [
+                    {"name": layer["name"], "feature_count": layer["feature_count"]}
+                    for layer in manifest["layers"]
+                ],
+            },
+        }
+
+    if storage_error is not None:
         # If storage fails, still return the metadata
+        report("database", "skipped")
         return FileUploadResponse(
             success=True,
             file_id=file_id,
-            metadata=result.data,
-            message=f"File processed successfully. Storage failed: {str(e)}"
+            metadata=metadata,
+            message=f"File processed successfully. Storage failed: {storage_error}"
         )
 
+    if stored_path is None:
+        upload_cache.put_blob(organization, upload.sha256, storage_path, upload.size)
+        message = "File uploaded and processed successfully"
+    else:
+        message = "File processed successfully (identical file already stored)"
+
     # Save metadata to database
     if organization_id:
+        report("database", "running")
         try:
+            ext = upload.filename.lower().split(".")[-1] if "." in upload.filename else ""
             cad_file = CadFileCreate(
                 organization_id=organization_id,
                 connector_id=connector_id,
-                filename=filename,
+                filename=upload.filename,
                 file_path=storage_path,
                 file_type=ext,
-                metadata=result.data,
+                metadata=metadata,
             )
-            supabase.table("cad_files").insert(cad_file.model_dump()).execute()
+            row = {"id": file_id, **cad_file.model_dump()}
+            if rows is not None:
+                rows.append(row)
+                report("database", "skipped")
+            else:
+                await run_query(get_supabase_client().table("cad_files").insert(row))
+                report("database", "done")
         except Exception as e:
             # Log error but don't fail the request
             print(f"Failed to save metadata: {e}")
+            report("database", "failed")
+    else:
+        report("database", "skipped")
 
     return FileUploadResponse(
         success=True,
         file_id=file_id,
-        metadata=result.data,
-        message="File uploaded and processed successfully"
+        metadata=metadata,
+        message=message
     )
 
 
+def connector_options(full_parse: Optional[bool], source_crs: Optional[str]) -> dict:
+    """Connector config from upload query parameters (unset options left out)."""
+    options = {"full_parse": full_parse}
+    if source_crs is not None:
+        options["source_crs"] = source_crs
+    return options
+
+
+def check_upload_type(filename: str, full_parse: Optional[bool], source_crs: Optional[str] = None):
+    """Validate the file type and get its connector (400 if unsupported)."""
+    ext = filename.lower().split(".")[-1] if "." in filename else ""
+
+    if ext not in ALL_SUPPORTED_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type: {ext}. Supported types: {', '.join(ALL_SUPPORTED_TYPES)}"
+        )
+
+    connector, _ = get_connector_for_file(ext, connector_options(full_parse, source_crs))
+    if not connector:
+        raise HTTPException(status_code=400, detail=f"No connector available for: {ext}")
+    return connector
+
+
+@router.post("/upload", response_model=FileUploadResponse)
+async def upload_file(
+    file: UploadFile = File(...),
+    organization_id: Optional[str] = None,
+    connector_id: Optional[str] = None,
+    full_parse: Optional[bool] = None,
+    source_crs: Optional[str] = None,
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Upload and process a CAD/GIS file.
+
+    Supports:
+    - AutoCAD: DXF, DWG
+    - QGIS/GIS: GeoJSON, Shapefiles, KML, GeoPackage, QGIS projects
+
+    Large DXF files get a fast metadata scan; pass full_parse=true to load
+    the whole drawing (or full_parse=false to always scan). Pass the
+    drawing's CRS as source_crs (e.g. EPSG:28356) to also build a vector
+    tileset of its geometry, served from /tiles/{tileset}/{z}/{x}/{y}.pbf.
+
+    The file will be:
+    1. Validated
+    2. Parsed for metadata extraction
+    3. Stored in Supabase Storage
+    4. Metadata saved to database
+
+    Parsing and storage run concurrently. Content that was seen before
+    (same sha256) skips parsing, and skips storage when the organization
+    already has a copy. For large files, POST /files/jobs instead.
+    """
+    connector = check_upload_type(file.filename or "unknown", full_parse, source_crs)
+
+    # Stream to a temp file (size checked as it arrives)
+    with await receive_upload(file, settings) as upload:
+        return await ingest_upload(connector, upload, organization_id, connector_id, settings)
+
+
+# ============================================================================
+# BACKGROUND UPLOAD JOBS
+# ============================================================================
+
+PARSE_BUSY_RETRY_SECONDS = 5
+PARSE_BUSY_MAX_WAIT_SECONDS = 300
+
+
+async def parse_when_available(connector, upload: SpooledUpload) -> ConnectorResult:
+    """Run a connector, waiting for parse pool capacity instead of failing."""
+    waited = 0
+    while True:
+        try:
+            return await run_connector(connector, upload)
+        except ParsePoolBusy:
+            if waited >= PARSE_BUSY_MAX_WAIT_SECONDS:
+                raise
+            await asyncio.sleep(PARSE_BUSY_RETRY_SECONDS)
+            waited += PARSE_BUSY_RETRY_SECONDS
+
+
+@router.post("/jobs", status_code=202)
+async def create_upload_job(
+    file: UploadFile = File(...),
+    organization_id: Optional[str] = None,
+    connector_id: Optional[str] = None,
+    full_parse: Optional[bool] = None,
+    source_crs: Optional[str] = None,
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Upload a CAD/GIS file and process it in the background.
+
+    Same processing as /files/upload, but returns a job ID as soon as the
+    file is received. Poll GET /files/jobs/{job_id} for progress; the
+    finished job's result is the /files/upload response. Returns 503 when
+    upload_job_queue_size jobs are already waiting.
+    """
+    connector = check_upload_type(file.filename or "unknown", full_parse, source_crs)
+    queue = get_upload_job_queue()
+    if queue.is_full:
+        raise HTTPException(
+            status_code=503, detail="Too many uploads are queued, please retry shortly", headers={"Retry-After": "5"}
+        )
+    upload = await receive_upload(file, settings)
+
+    async def process(job: UploadJob) -> dict:
+        response = await ingest_upload(
+            connector, upload, organization_id, connector_id, settings,
+            parse=parse_when_available,
+            report=job.set_stage,
+        )
+        if not response.success:
+            raise UploadJobError(response.message)
+        return response.model_dump()
+
+    try:
+        job = queue.submit(
+            upload.filename, ["parse", "storage", "convert", "database"], process, cleanup=upload.cleanup
+        )
+    except UploadJobQueueFull as e:
+        # Filled up while this upload was being received
+        upload.cleanup()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return job.to_dict()
+
+
+# ============================================================================
+# BATCH UPLOADS
+# ============================================================================
+
+
+def is_batch_archive(upload: SpooledUpload) -> bool:
+    """Whether a zip upload is an archive of files rather than a zipped shapefile."""
+    try:
+        with zipfile.ZipFile(upload.path) as zf:
+            return not any(name.lower().endswith(".shp") for name in zf.namelist())
+    except zipfile.BadZipFile:
+        return False  # Let the shapefile parser report it
+
+
+async def spool_batch(files: list[UploadFile], settings: Settings) -> list[SpooledUpload]:
+    """
+    Spool a batch's files, unpacking archives of files into their members.
+    The spooled files together are limited to batch_upload_max_total_mb.
+    """
+    max_bytes = settings.max_file_size_mb * 1024 * 1024
+    max_total_bytes = settings.batch_upload_max_total_mb * 1024 * 1024
+    uploads: list[SpooledUpload] = []
+    try:
+        for file in files:
+            upload = await receive_upload(file, settings)
+            if not upload.filename.lower().endswith(".zip") or not is_batch_archive(upload):
+                uploads.append(upload)
+            else:
+                with upload:
+                    try:
+                        uploads.extend(await run_in_threadpool(
+                            unpack_archive,
+                            upload.path,
+                            ALL_SUPPORTED_TYPES,
+                            max_bytes,
+                            settings.batch_upload_max_files,
+                            settings.upload_tmp_dir or None,
+                            max_total_bytes=max_total_bytes - sum(spooled.size for spooled in uploads),
+                        ))
+                    except UploadTooLarge as e:
+                        raise HTTPException(status_code=400, detail=f"{upload.filename}: {str(e)}")
+
+            if sum(spooled.size for spooled in uploads) > max_total_bytes:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Batch is too large. Maximum total size: {settings.batch_upload_max_total_mb}MB"
+                )
+            if len(uploads) > settings.batch_upload_max_files:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Too many files. Maximum per batch: {settings.batch_upload_max_files}"
+                )
+    except BaseException:
+        for upload in uploads:
+            upload.cleanup()
+        raise
+    return uploads
+
+
+@router.post("/upload/batch")
+async def upload_batch(
+    files: list[UploadFile] = File(...),
+    organization_id: Optional[str] = None,
+    connector_id: Optional[str] = None,
+    full_parse: Optional[bool] = None,
+    source_crs: Optional[str] = None,
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Upload and process many CAD/GIS files in one request.
+
+    Send the files as multipart parts, or as zip archives of files (a zip
+    containing a .shp is processed as one zipped shapefile instead). Every
+    file goes through the /files/upload steps; up to
+    batch_upload_concurrency files are parsed and stored at once, with
+    parsing spread over the parse pool workers.
+
+    The response is newline-delimited JSON: one /files/upload response per
+    file (plus its "index" and "filename") as each finishes, then a summary
+    line. The cad_files rows of the batch are inserted in one statement
+    once every file has finished; the summary reports how many were saved.
+    """
+    if len(files) > settings.batch_upload_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum per batch: {settings.batch_upload_max_files}"
+        )
+    uploads = await spool_batch(files, settings)
+    options = connector_options(full_parse, source_crs)
+    rows: list[dict] = []
+    limit = asyncio.Semaphore(settings.batch_upload_concurrency)
+
+    async def process(index: int, upload: SpooledUpload) -> dict:
+        ext = upload.filename.lower().split(".")[-1] if "." in upload.filename else ""
+        connector, _ = get_connector_for_file(ext, options)
+        if connector is None:
+            response = FileUploadResponse(success=False, message=f"Unsupported file type: {ext}")
+        else:
+            async with limit:
+                try:
+                    response = await ingest_upload(
+                        connector, upload, organization_id, connector_id, settings,
+                        parse=parse_when_available,
+                        rows=rows,
+                    )
+                except Exception as e:
+                    response = FileUploadResponse(success=False, message=f"Failed to process file: {str(e)}")
+                finally:
+                    upload.cleanup()
+        return {"index": index, "filename": upload.filename, **response.model_dump()}
+
+    async def results() -> AsyncIterator[bytes]:
+        tasks = [asyncio.ensure_future(process(index, upload)) for index, upload in enumerate(uploads)]
+        try:
+            succeeded = 0
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                succeeded += result["success"]
+                yield orjson.dumps(result) + b"\n"
+
+            saved = 0
+            database_error = None
+            if rows:
+                try:
+                    await run_query(get_supabase_client().table("cad_files").insert(rows))
+                    saved = len(rows)
+                except Exception as e:
+                    print(f"Failed to save batch metadata: {e}")
+                    database_error = str(e)
+
+            yield orjson.dumps({
+                "done": True,
+                "count": len(uploads),
+                "succeeded": succeeded,
+                "failed": len(uploads) - succeeded,
+                "saved": saved,
+                "database_error": database_error,
+            }) + b"\n"
+        finally:
+            # The client went away, or the batch is done
+            for task in tasks:
+                task.cancel()
+            for upload in uploads:
+                upload.cleanup()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Get the status and progress of a background upload."""
+    job = get_upload_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
 @router.get("/{file_id}")
 async def get_file(file_id: str):
     """Get file metadata by ID."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("cad_files").select("*").eq("id", file_id).single().execute()
+        response = await run_query(supabase.table("cad_files").select("*").eq("id", file_id).single())
         return response.data
     except Exception as e:
         raise HTTPException(status_code=404, detail="File not found")
 
 
+def parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """Parse "min_x,min_y,max_x,max_y" (400 if malformed)."""
+    try:
+        values = tuple(float(value) for value in bbox.split(","))
+    except ValueError:
+        values = ()
+    if len(values) != 4 or values[0] > values[2] or values[1] > values[3]:
+        raise HTTPException(status_code=400, detail="bbox must be min_x,min_y,max_x,max_y")
+    return values
+
+
+@router.get("/{file_id}/features")
+async def get_file_features(
+    file_id: str,
+    bbox: Optional[str] = Query(None, description="min_x,min_y,max_x,max_y (EPSG:4326 unless the file has no CRS)"),
+    layer: Optional[str] = Query(None, description="Only this layer"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """
+    Get a file's features from the layer store as GeoJSON.
+
+    Only the row groups that can intersect bbox are read. Available for
+    files uploaded while layer_store_enabled was set.
+    """
+    try:
+        supabase = get_supabase_client()
+        response = await run_query(supabase.table("cad_files").select("metadata").eq("id", file_id).single())
+    except Exception:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    key = ((response.data or {}).get("metadata") or {}).get("layer_store", {}).get("key")
+    if not key or not get_layer_store().has(key):
+        raise HTTPException(status_code=404, detail="No stored features for this file")
+
+    try:
+        return await run_in_threadpool(
+            get_layer_store().query, key, parse_bbox(bbox) if bbox else None, layer, limit
+        )
+    except LayerStoreUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except LayerStoreError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.get("/")
 async def list_files(
     organization_id: Optional[str] = None,
@@ -154,7 +619,7 @@ async def list_files(
             query = query.eq("connector_id", connector_id)
 
         query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
-        response = query.execute()
+        response = await run_query(query)
 
         return {"files": response.data, "count": len(response.data)}
     except Exception as e:
@@ -162,24 +627,31 @@ async def list_files(
 
 
 @router.post("/parse")
-async def parse_file(file: UploadFile = File(...)):
+async def parse_file(
+    file: UploadFile = File(...),
+    full_parse: Optional[bool] = None,
+    source_crs: Optional[str] = None,
+    settings: Settings = Depends(get_settings),
+):
     """
     Parse a CAD/GIS file and return metadata without storing.
 
-    Useful for quick analysis or preview.
+    Useful for quick analysis or preview. Large DXF files are scanned
+    unless full_parse=true; source_crs georeferences DXF geometry as for
+    /files/upload.
     """
     filename = file.filename or "unknown"
     ext = filename.lower().split(".")[-1] if "." in filename else ""
-    content = await file.read()
 
-    connector, _ = get_connector_for_file(ext)
+    connector, _ = get_connector_for_file(ext, connector_options(full_parse, source_crs))
     if not connector:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported file type: {ext}. Supported: {', '.join(ALL_SUPPORTED_TYPES)}"
         )
 
-    result = await connector.process_file(content, filename)
+    with await receive_upload(file, settings) as upload:
+        result = await process_with_connector(connector, upload)
 
     if not result.success:
         raise HTTPException(status_code=400, detail=result.error)
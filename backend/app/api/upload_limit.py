@@ -0,0 +1,68 @@
+"""
+Upload Size Limit
+Raw ASGI middleware that enforces request body limits on the upload routes
+before the multipart form is parsed.
+
+Starlette spools the whole multipart body to its own temp files before a
+route sees its UploadFile, so a size check in the route only runs once the
+upload is already on disk. Here a request whose Content-Length is over the
+limit is answered with 413 without reading the body, and a body without one
+(chunked) is counted as it streams in and cut off once it passes the limit.
+"""
+
+import json
+
+from starlette.exceptions import HTTPException
+
+# Room for multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject upload requests whose body is bigger than the route's limit.
+
+    Usage:
+        app.add_middleware(UploadSizeLimitMiddleware, limits={"/api/v1/files/upload": 50 * 1024 * 1024})
+    """
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Upload too large. Maximum size: {limit // (1024 * 1024)}MB"
+        limit += MULTIPART_OVERHEAD
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            body = json.dumps({"detail": detail}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", b"%d" % len(body)),
+                    (b"connection", b"close"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the form parser; FastAPI passes HTTPExceptions through
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,142 @@
+"""
+Tile Fast Path
+Raw ASGI middleware that serves static tileset tiles
+(GET /api/v1/tiles/{tileset}/{z}/{x}/{y}.pbf) before the request reaches
+FastAPI routing, dependency injection and the rest of the middleware stack.
+
+Response headers are built once at import time. Tile bodies are passed to
+the server as-is: PMTiles tiles are memoryviews into the memory-mapped
+archive and hot mbtiles tiles come from an in-memory LRU, so nothing is
+copied on the way out.
+
+Anything it can't answer (unknown tileset, bad coordinates, other routes)
+falls through to the regular app, which produces the usual responses.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.services.tile_store import PMTilesStore, TileData, TileStore, use_tile_store
+
+
+_BASE_HEADERS = [
+    (b"content-type", b"application/x-protobuf"),
+    (b"cache-control", b"public, max-age=86400, stale-while-revalidate=604800"),
+    (b"access-control-allow-origin", b"*"),
+]
+_GZIP_HEADERS = _BASE_HEADERS + [(b"content-encoding", b"gzip")]
+_IDENTITY_HEADERS = _BASE_HEADERS + [(b"content-encoding", b"identity")]
+_EMPTY_HEADERS = [
+    (b"cache-control", b"public, max-age=86400, stale-while-revalidate=604800"),
+    (b"access-control-allow-origin", b"*"),
+]
+
+
+class TileCache:
+    """LRU of recently served tiles, bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self._tiles: OrderedDict[tuple, TileData] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[TileData]:
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is not None:
+                self._tiles.move_to_end(key)
+            return data
+
+    def put(self, key: tuple, data: TileData):
+        if len(data) > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._tiles:
+                return
+            self._tiles[key] = data
+            self._size += len(data)
+            while self._size > self._max_bytes:
+                _, evicted = self._tiles.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class TileFastPathMiddleware:
+    """
+    Serve tileset tiles directly from the tile store.
+
+    Usage:
+        app.add_middleware(TileFastPathMiddleware, prefix="/api/v1/tiles")
+    """
+
+    def __init__(self, app, prefix: str = "/api/v1/tiles", cache_bytes: int = 64 * 1024 * 1024):
+        self.app = app
+        self.prefix = prefix.rstrip("/") + "/"
+        self.cache = TileCache(cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "GET"
+            and scope["path"].startswith(self.prefix)
+            and scope["path"].endswith(".pbf")
+        ):
+            if await self._serve_tile(scope["path"][len(self.prefix):-4], send):
+                return
+        await self.app(scope, receive, send)
+
+    def _get_tile(self, store: TileStore, tileset: str, z: int, x: int, y: int) -> Optional[TileData]:
+        """Look up a tile in a tileset's store."""
+        if isinstance(store, PMTilesStore):
+            # Already a zero-copy view into the mmap
+            return store.get_tile(z, x, y)
+
+        # The version changes with every rebuild, in place or by replacement
+        key = (tileset, store.version, z, x, y)
+        data = self.cache.get(key)
+        if data is None:
+            data = store.get_tile(z, x, y)
+            if data is not None:
+                self.cache.put(key, data)
+        return data
+
+    async def _serve_tile(self, route: str, send) -> bool:
+        """Send the tile for "{tileset}/{z}/{x}/{y}"; False to fall through."""
+        parts = route.split("/")
+        if len(parts) != 4:
+            return False
+
+        tileset, z, x, y = parts
+        if not (z.isdigit() and x.isdigit() and y.isdigit()):
+            return False
+        z, x, y = int(z), int(x), int(y)
+        if z > 22:
+            return False
+
+        # Hold the store until the body is sent: PMTiles tiles are views into its mapping
+        with use_tile_store(tileset) as store:
+            if store is None:
+                return False
+            try:
+                data = self._get_tile(store, tileset, z, x, y)
+            except Exception:
+                # Let the regular route report the error
+                return False
+            await self._send_tile(data, send)
+        return True
+
+    async def _send_tile(self, data: Optional[TileData], send):
+        """Send a tile response (204 when the tile is empty or missing)."""
+        if not data:
+            await send({"type": "http.response.start", "status": 204, "headers": _EMPTY_HEADERS})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = _GZIP_HEADERS if data[:2] == b"\x1f\x8b" else _IDENTITY_HEADERS
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers + [(b"content-length", b"%d" % len(data))],
+        })
+        await send({"type": "http.response.body", "body": data})
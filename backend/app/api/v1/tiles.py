@@ -1,54 +1,103 @@
 """
 Vector Tile Server API
 
-Serves pre-processed vector tiles from .mbtiles files.
+Serves pre-processed vector tiles from .mbtiles or .pmtiles files.
 Much faster and more reliable than fetching from external ArcGIS FeatureServers.
 
 Usage: GET /api/v1/tiles/{tileset}/{z}/{x}/{y}.pbf
+
+Planning layers are rendered on the fly from PostGIS and cached:
+       GET /api/v1/tiles/planning/{layer}/{z}/{x}/{y}.pbf
+
+Features under a point are answered from the tileset itself:
+       GET /api/v1/tiles/{tileset}/query?lat=...&lon=...
+
+A whole viewport can be fetched in one round trip:
+       GET  /api/v1/tiles/{tileset}/batch?z=15&min_x=...&min_y=...&max_x=...&max_y=...
+       POST /api/v1/tiles/{tileset}/batch  {"tiles": [[z, x, y], ...]}
+
+Batch responses are a sequence of frames, one per requested tile in request
+order. Each frame is a 17-byte big-endian header (zoom u8, x u32, y u32,
+flags u32, length u32) followed by the tile bytes as stored. Flag bit 0 is
+set when the tile is gzipped; missing tiles have length 0.
 """
 
-import sqlite3
-from pathlib import Path
+import struct
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Response
+
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response as FastAPIResponse
-import gzip
+from pydantic import BaseModel, Field
+
+from app.services.dynamic_tile_service import PLANNING_LAYERS, dynamic_tile_service
+from app.services.tile_query import tile_query_service
+from app.services.tile_store import BACKEND_ROOT, TileCoord, list_tilesets, use_tile_store
 
 router = APIRouter(prefix="/tiles", tags=["tiles"])
 
-# Cache database connections
-_db_connections: dict[str, sqlite3.Connection] = {}
+# Largest number of tiles served by one batch request
+MAX_BATCH_TILES = 256
 
-# Available tilesets and their mbtiles file paths
-TILESETS = {
-    "flood": "data/tiles/brisbane-flood.mbtiles",
-}
+TILE_BATCH_MEDIA_TYPE = "application/vnd.sitelens.tile-batch"
+_FRAME_HEADER = struct.Struct(">BIIII")
+_FLAG_GZIP = 1
 
-def get_db(tileset: str) -> Optional[sqlite3.Connection]:
-    """Get or create a database connection for a tileset."""
-    if tileset in _db_connections:
-        return _db_connections[tileset]
 
-    if tileset not in TILESETS:
-        return None
+class TileBatchRequest(BaseModel):
+    """Tiles to fetch in one batch."""
+    tiles: list[tuple[int, int, int]] = Field(..., min_length=1, max_length=MAX_BATCH_TILES)
 
-    mbtiles_path = Path(__file__).parent.parent.parent.parent / TILESETS[tileset]
 
-    if not mbtiles_path.exists():
-        return None
+@router.get("/planning/layers")
+async def list_planning_layers():
+    """List planning layers available as dynamic tiles."""
+    return {
+        "layers": [
+            {"layer": layer, **config}
+            for layer, config in PLANNING_LAYERS.items()
+        ]
+    }
 
-    try:
-        conn = sqlite3.connect(str(mbtiles_path), check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        _db_connections[tileset] = conn
-        return conn
-    except Exception:
-        return None
 
+@router.get("/planning/{layer}/{z}/{x}/{y}.pbf")
+async def get_planning_tile(layer: str, z: int, x: int, y: int):
+    """
+    Get a dynamically rendered vector tile for a planning layer.
+
+    Args:
+        layer: Planning table (planning_zones, hazard_overlays,
+            development_controls, heritage_items)
+        z: Zoom level
+        x: Tile column
+        y: Tile row (XYZ/slippy map convention)
 
-def flip_y(y: int, z: int) -> int:
-    """Convert XYZ tile coordinates to TMS (mbtiles uses TMS)."""
-    return (2 ** z) - 1 - y
+    Returns:
+        Protobuf vector tile data (gzipped)
+    """
+    if layer not in PLANNING_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Planning layer '{layer}' not found")
+
+    if z < 0 or z > 22 or x < 0 or y < 0 or x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+
+    try:
+        tile_data = await dynamic_tile_service.get_tile(layer, z, x, y)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering tile: {str(e)}")
+
+    if not tile_data:
+        return Response(status_code=204)
+
+    return FastAPIResponse(
+        content=tile_data,
+        media_type="application/x-protobuf",
+        headers={
+            "Content-Encoding": "gzip",
+            "Cache-Control": "public, max-age=3600",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
 
 
 @router.get("/{tileset}/{z}/{x}/{y}.pbf")
@@ -56,6 +105,9 @@ async def get_tile(tileset: str, z: int, x: int, y: int):
     """
     Get a vector tile from a tileset.
 
+    In the full app these requests are normally answered by
+    TileFastPathMiddleware; this route handles whatever it passes on.
+
     Args:
         tileset: Name of the tileset (e.g., "flood")
         z: Zoom level (10-16)
@@ -69,85 +121,182 @@ async def get_tile(tileset: str, z: int, x: int, y: int):
     if z < 0 or z > 22:
         raise HTTPException(status_code=400, detail="Invalid zoom level")
 
-    db = get_db(tileset)
+    with use_tile_store(tileset) as store:
+        if store is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Tileset '{tileset}' not found. Run 'npm run build:flood-tiles' to generate."
+            )
 
-    if db is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Tileset '{tileset}' not found. Run 'npm run build:flood-tiles' to generate."
-        )
+        try:
+            tile_data = store.get_tile(z, x, y)
 
-    try:
-        # Convert to TMS coordinates (Y is flipped in mbtiles)
-        tms_y = flip_y(y, z)
+            if tile_data is None:
+                # Return empty tile (no data in this area)
+                return Response(status_code=204)
 
-        cursor = db.execute(
-            "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
-            (z, x, tms_y)
-        )
-        row = cursor.fetchone()
+            # Check if data is already gzipped (most mbtiles are)
+            is_gzipped = tile_data[:2] == b'\x1f\x8b'
+
+            return FastAPIResponse(
+                content=tile_data,
+                media_type="application/x-protobuf",
+                headers={
+                    "Content-Encoding": "gzip" if is_gzipped else "identity",
+                    "Cache-Control": "public, max-age=86400, stale-while-revalidate=604800",
+                    "Access-Control-Allow-Origin": "*",
+                }
+            )
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading tile: {str(e)}")
+
+
+@router.get("/{tileset}/metadata")
+async def get_tileset_metadata(tileset: str):
+    """Get metadata for a tileset."""
+    with use_tile_store(tileset) as store:
+        if store is None:
+            raise HTTPException(status_code=404, detail=f"Tileset '{tileset}' not found")
+
+        try:
+            metadata = store.get_metadata()
+
+            return {
+                "tileset": tileset,
+                "name": metadata.get("name", tileset),
+                "description": metadata.get("description", ""),
+                "format": metadata.get("format", "pbf"),
+                "minzoom": int(metadata.get("minzoom", 0)),
+                "maxzoom": int(metadata.get("maxzoom", 22)),
+                "bounds": metadata.get("bounds", ""),
+                "center": metadata.get("center", ""),
+                "attribution": metadata.get("attribution", ""),
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading metadata: {str(e)}")
+
+
+def _validate_tile(z: int, x: int, y: int):
+    if z < 0 or z > 22 or x < 0 or y < 0 or x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=400, detail=f"Invalid tile coordinates {z}/{x}/{y}")
 
-        if row is None or row["tile_data"] is None:
-            # Return empty tile (no data in this area)
-            return Response(status_code=204)
 
-        tile_data = row["tile_data"]
+def _tile_batch_response(tileset: str, tiles: list[TileCoord]) -> Response:
+    """Read tiles in one query and frame them into a single response body."""
+    with use_tile_store(tileset) as store:
+        if store is None:
+            raise HTTPException(status_code=404, detail=f"Tileset '{tileset}' not found")
 
-        # Check if data is already gzipped (most mbtiles are)
-        is_gzipped = tile_data[:2] == b'\x1f\x8b'
+        try:
+            found = store.get_tiles(tiles)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading tiles: {str(e)}")
+
+        body = bytearray()
+        for z, x, y in tiles:
+            data = found.get((z, x, y), b"")
+            flags = _FLAG_GZIP if data[:2] == b"\x1f\x8b" else 0
+            body += _FRAME_HEADER.pack(z, x, y, flags, len(data))
+            body += data
 
         return FastAPIResponse(
-            content=tile_data,
-            media_type="application/x-protobuf",
+            content=bytes(body),
+            media_type=TILE_BATCH_MEDIA_TYPE,
             headers={
-                "Content-Encoding": "gzip" if is_gzipped else "identity",
                 "Cache-Control": "public, max-age=86400, stale-while-revalidate=604800",
                 "Access-Control-Allow-Origin": "*",
             }
         )
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading tile: {str(e)}")
 
+@router.get("/{tileset}/batch")
+async def get_tile_range(
+    tileset: str,
+    z: int = Query(..., ge=0, le=22),
+    min_x: int = Query(..., ge=0),
+    min_y: int = Query(..., ge=0),
+    max_x: int = Query(..., ge=0),
+    max_y: int = Query(..., ge=0),
+):
+    """
+    Get a rectangular block of tiles (e.g. a viewport) in one response.
 
-@router.get("/{tileset}/metadata")
-async def get_tileset_metadata(tileset: str):
-    """Get metadata for a tileset."""
-    db = get_db(tileset)
+    Tiles are framed in row-major order; see the module docstring for the
+    framing.
+    """
+    if max_x < min_x or max_y < min_y:
+        raise HTTPException(status_code=400, detail="Invalid tile range")
+    _validate_tile(z, max_x, max_y)
+
+    count = (max_x - min_x + 1) * (max_y - min_y + 1)
+    if count > MAX_BATCH_TILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tile range has {count} tiles, limit is {MAX_BATCH_TILES}"
+        )
+
+    tiles = [(z, x, y) for y in range(min_y, max_y + 1) for x in range(min_x, max_x + 1)]
+    return _tile_batch_response(tileset, tiles)
 
-    if db is None:
-        raise HTTPException(status_code=404, detail=f"Tileset '{tileset}' not found")
+
+@router.post("/{tileset}/batch")
+async def get_tile_batch(tileset: str, request: TileBatchRequest):
+    """
+    Get a list of tiles in one response.
+
+    Tiles are framed in request order; see the module docstring for the
+    framing.
+    """
+    for z, x, y in request.tiles:
+        _validate_tile(z, x, y)
+
+    return _tile_batch_response(tileset, request.tiles)
+
+
+@router.get("/{tileset}/query")
+async def query_tileset(
+    tileset: str,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    layers: Optional[str] = Query(None, description="Comma-separated tile layers to check"),
+):
+    """
+    Get the features of a tileset that contain a point.
+
+    Decodes the max-zoom tile covering the point and tests the point
+    against its geometries, e.g. "which flood layers is this click in".
+    """
+    layer_names = [name.strip() for name in layers.split(",")] if layers else None
 
     try:
-        cursor = db.execute("SELECT name, value FROM metadata")
-        metadata = {row["name"]: row["value"] for row in cursor.fetchall()}
-
-        return {
-            "tileset": tileset,
-            "name": metadata.get("name", tileset),
-            "description": metadata.get("description", ""),
-            "format": metadata.get("format", "pbf"),
-            "minzoom": int(metadata.get("minzoom", 0)),
-            "maxzoom": int(metadata.get("maxzoom", 22)),
-            "bounds": metadata.get("bounds", ""),
-            "center": metadata.get("center", ""),
-            "attribution": metadata.get("attribution", ""),
-        }
+        features = await run_in_threadpool(
+            tile_query_service.query_point, tileset, lon, lat, layer_names
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading metadata: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error querying tileset: {str(e)}")
+
+    if features is None:
+        raise HTTPException(status_code=404, detail=f"Tileset '{tileset}' not found")
+
+    return {
+        "tileset": tileset,
+        "lat": lat,
+        "lon": lon,
+        "features": features,
+    }
 
 
 @router.get("/")
-async def list_tilesets():
+async def get_tilesets():
     """List available tilesets."""
     available = []
 
-    for name, path in TILESETS.items():
-        mbtiles_path = Path(__file__).parent.parent.parent.parent / path
+    for name, path in list_tilesets().items():
         available.append({
             "name": name,
             "path": path,
-            "available": mbtiles_path.exists(),
+            "available": (BACKEND_ROOT / path).exists(),
         })
 
     return {"tilesets": available}
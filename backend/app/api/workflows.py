@@ -3,7 +3,7 @@ from typing import Optional
 import uuid
 from datetime import datetime
 
-from app.core.supabase import get_supabase_client
+from app.core.supabase import get_supabase_client, run_query
 from app.schemas import WorkflowCreate, ExecutionCreate
 
 router = APIRouter(prefix="/workflows", tags=["workflows"])
@@ -22,7 +22,7 @@ async def create_workflow(workflow: WorkflowCreate):
             "definition": workflow.definition,
             "is_active": False,
         }
-        response = supabase.table("workflows").insert(data).execute()
+        response = await run_query(supabase.table("workflows").insert(data))
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -43,7 +43,7 @@ async def list_workflows(
         if is_active is not None:
             query = query.eq("is_active", is_active)
 
-        response = query.order("updated_at", desc=True).execute()
+        response = await run_query(query.order("updated_at", desc=True))
         return {"workflows": response.data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -54,7 +54,7 @@ async def get_workflow(workflow_id: str):
     """Get a specific workflow by ID."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("workflows").select("*").eq("id", workflow_id).single().execute()
+        response = await run_query(supabase.table("workflows").select("*").eq("id", workflow_id).single())
         return response.data
     except Exception as e:
         raise HTTPException(status_code=404, detail="Workflow not found")
@@ -72,7 +72,7 @@ async def update_workflow(workflow_id: str, updates: dict):
 
     try:
         supabase = get_supabase_client()
-        response = supabase.table("workflows").update(filtered_updates).eq("id", workflow_id).execute()
+        response = await run_query(supabase.table("workflows").update(filtered_updates).eq("id", workflow_id))
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -83,7 +83,7 @@ async def delete_workflow(workflow_id: str):
     """Delete a workflow."""
     try:
         supabase = get_supabase_client()
-        supabase.table("workflows").delete().eq("id", workflow_id).execute()
+        await run_query(supabase.table("workflows").delete().eq("id", workflow_id))
         return {"success": True, "message": "Workflow deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -94,10 +94,10 @@ async def activate_workflow(workflow_id: str):
     """Activate a workflow."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("workflows").update({
+        response = await run_query(supabase.table("workflows").update({
             "is_active": True,
             "updated_at": datetime.utcnow().isoformat()
-        }).eq("id", workflow_id).execute()
+        }).eq("id", workflow_id))
         return {"success": True, "workflow": response.data[0]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,10 +108,10 @@ async def deactivate_workflow(workflow_id: str):
     """Deactivate a workflow."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("workflows").update({
+        response = await run_query(supabase.table("workflows").update({
             "is_active": False,
             "updated_at": datetime.utcnow().isoformat()
-        }).eq("id", workflow_id).execute()
+        }).eq("id", workflow_id))
         return {"success": True, "workflow": response.data[0]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -123,7 +123,7 @@ async def execute_workflow_async(workflow_id: str, execution_id: str, trigger_da
 
     try:
         # Get workflow definition
-        workflow = supabase.table("workflows").select("*").eq("id", workflow_id).single().execute()
+        workflow = await run_query(supabase.table("workflows").select("*").eq("id", workflow_id).single())
         definition = workflow.data.get("definition", {})
 
         # Simple workflow execution (placeholder)
@@ -140,19 +140,19 @@ async def execute_workflow_async(workflow_id: str, execution_id: str, trigger_da
         }
 
         # Update execution
-        supabase.table("executions").update({
+        await run_query(supabase.table("executions").update({
             "status": "completed",
             "result": result,
             "completed_at": datetime.utcnow().isoformat(),
-        }).eq("id", execution_id).execute()
+        }).eq("id", execution_id))
 
     except Exception as e:
         # Mark execution as failed
-        supabase.table("executions").update({
+        await run_query(supabase.table("executions").update({
             "status": "failed",
             "result": {"error": str(e)},
             "completed_at": datetime.utcnow().isoformat(),
-        }).eq("id", execution_id).execute()
+        }).eq("id", execution_id))
 
 
 @router.post("/{workflow_id}/execute")
@@ -165,7 +165,7 @@ async def execute_workflow(
     # Verify workflow exists and is active
     try:
         supabase = get_supabase_client()
-        workflow = supabase.table("workflows").select("*").eq("id", workflow_id).single().execute()
+        workflow = await run_query(supabase.table("workflows").select("*").eq("id", workflow_id).single())
 
         if not workflow.data.get("is_active"):
             raise HTTPException(status_code=400, detail="Workflow is not active")
@@ -185,7 +185,7 @@ async def execute_workflow(
     }
 
     try:
-        supabase.table("executions").insert(execution_data).execute()
+        await run_query(supabase.table("executions").insert(execution_data))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create execution: {e}")
 
@@ -213,9 +213,9 @@ async def list_workflow_executions(
     """List executions for a specific workflow."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("executions").select("*").eq(
+        response = await run_query(supabase.table("executions").select("*").eq(
             "workflow_id", workflow_id
-        ).order("started_at", desc=True).range(offset, offset + limit - 1).execute()
+        ).order("started_at", desc=True).range(offset, offset + limit - 1))
 
         return {"executions": response.data}
     except Exception as e:
@@ -227,7 +227,7 @@ async def get_execution(execution_id: str):
     """Get details of a specific execution."""
     try:
         supabase = get_supabase_client()
-        response = supabase.table("executions").select("*").eq("id", execution_id).single().execute()
+        response = await run_query(supabase.table("executions").select("*").eq("id", execution_id).single())
         return response.data
     except Exception as e:
         raise HTTPException(status_code=404, detail="Execution not found")
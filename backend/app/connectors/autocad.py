@@ -1,5 +1,11 @@
+import asyncio
+import os
+
 from app.connectors.base import BaseConnector, ConnectorResult
+from app.core.config import get_settings
+from app.services.dxf_features import DxfFeatureService
 from app.services.dxf_parser import DxfParserService
+from app.services.tile_store import BACKEND_ROOT, TILES_DIR
 from pydantic import BaseModel
 from typing import Optional
 
@@ -8,6 +14,10 @@ class AutoCADConfig(BaseModel):
     """Configuration for AutoCAD connector."""
     watch_folder: Optional[str] = None
     auto_process: bool = True
+    # None: full ezdxf parse below dxf_scan_threshold_mb, streaming scan above
+    full_parse: Optional[bool] = None
+    # CRS of the drawing's coordinates (e.g. "EPSG:28356"); set to build map features
+    source_crs: Optional[str] = None
 
 
 class AutoCADConnector(BaseConnector):
@@ -16,9 +26,12 @@ class AutoCADConnector(BaseConnector):
 
     Supports:
     - DXF file parsing and metadata extraction
+    - Georeferenced vector tiles from DXF geometry (when source_crs is set)
     - DWG file support (future - requires conversion)
     """
 
+    version = "2"
+
     @property
     def connector_type(self) -> str:
         return "autocad"
@@ -27,6 +40,10 @@ class AutoCADConnector(BaseConnector):
     def supported_file_types(self) -> list[str]:
         return ["dxf", "dwg"]
 
+    @property
+    def convertible_file_types(self) -> list[str]:
+        return ["dxf"]
+
     async def validate_config(self) -> ConnectorResult:
         """Validate the AutoCAD connector configuration."""
         try:
@@ -60,12 +77,12 @@ class AutoCADConnector(BaseConnector):
                 error=f"Missing dependency: {str(e)}"
             )
 
-    async def process_file(self, file_content: bytes, filename: str) -> ConnectorResult:
+    async def process_file(self, file_path: str, filename: str) -> ConnectorResult:
         """
         Process a DXF/DWG file and extract metadata.
 
         Args:
-            file_content: Raw bytes of the file
+            file_path: Path to the file on local disk
             filename: Original filename
 
         Returns:
@@ -74,31 +91,59 @@ class AutoCADConnector(BaseConnector):
         ext = filename.lower().split(".")[-1] if "." in filename else ""
 
         if ext == "dxf":
-            return await self._process_dxf(file_content, filename)
+            return await self._process_dxf(file_path, filename)
         elif ext == "dwg":
-            return await self._process_dwg(file_content, filename)
+            return await self._process_dwg(file_path, filename)
         else:
             return ConnectorResult(
                 success=False,
                 error=f"Unsupported file type: {ext}"
             )
 
-    async def _process_dxf(self, file_content: bytes, filename: str) -> ConnectorResult:
-        """Process a DXF file."""
-        # Validate the file first
-        is_valid, error = DxfParserService.validate_dxf(file_content)
-        if not is_valid:
-            return ConnectorResult(success=False, error=error)
+    async def _process_dxf(self, file_path: str, filename: str) -> ConnectorResult:
+        """
+        Process a DXF file in the parse pool (workers read it from disk).
+
+        Large drawings get the streaming metadata scan unless the config
+        asks for a full parse. With a source_crs, the drawing's geometry is
+        also georeferenced and tiled on a second worker; its result (or
+        error) is reported under "georeferenced" without failing the parse.
 
-        # Parse and extract metadata
-        metadata = DxfParserService.parse_dxf(file_content, filename)
+        Raises:
+            ParsePoolBusy: Too many drawings are already being parsed
+        """
+        config = AutoCADConfig(**self.config)
+        full_parse = config.full_parse
+        if full_parse is None:
+            full_parse = os.path.getsize(file_path) < get_settings().dxf_scan_threshold_mb * 1024 * 1024
+        parse = DxfParserService.process_dxf if full_parse else DxfParserService.scan
+
+        jobs = [self.run_in_pool("DXF", parse, file_path, filename)]
+        if config.source_crs:
+            jobs.append(self.run_in_pool(
+                "DXF features",
+                DxfFeatureService.convert, file_path, filename, config.source_crs, str(BACKEND_ROOT / TILES_DIR),
+            ))
+
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        parsed = results[0]
+        if not parsed.success:
+            return parsed
+
+        data = parsed.data.model_dump()
+        if config.source_crs:
+            converted = results[1]
+            data["georeferenced"] = converted.data if converted.success else {"error": converted.error}
 
         return ConnectorResult(
             success=True,
-            data=metadata.model_dump()
+            data=data
         )
 
-    async def _process_dwg(self, file_content: bytes, filename: str) -> ConnectorResult:
+    async def _process_dwg(self, file_path: str, filename: str) -> ConnectorResult:
         """Process a DWG file (currently not supported)."""
         # DWG files require conversion - this is a placeholder
         return ConnectorResult(
@@ -108,5 +153,5 @@ class AutoCADConnector(BaseConnector):
 
 
 def get_autocad_connector(config: dict = None) -> AutoCADConnector:
-    """Factory function to create an AutoCAD connector."""
-    return AutoCADConnector(config or {})
+    """Get the shared AutoCAD connector for a config."""
+    return AutoCADConnector.shared(config)
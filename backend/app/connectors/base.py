@@ -1,7 +1,18 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+import orjson
 from pydantic import BaseModel
 
+from app.services.parse_pool import ParsePoolBusy, ParsePoolError, get_parse_pool
+from app.services.upload_cache import get_upload_cache
+
+# Distinct configs kept as shared connector instances
+SHARED_CONNECTORS = 128
+
 
 class ConnectorConfig(BaseModel):
     """Base configuration for connectors."""
@@ -15,6 +26,31 @@ class ConnectorResult(BaseModel):
     error: Optional[str] = None
 
 
+@dataclass
+class ConnectorMetrics:
+    """Processing counters for one connector type."""
+    processed: int = 0  # process() calls that returned a result
+    cache_hits: int = 0
+    failed: int = 0  # Results with success=False
+    errors: int = 0  # Calls that raised (including a busy parse pool)
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+# Metrics by connector type, shared by every instance of the type
+_metrics: dict[str, ConnectorMetrics] = {}
+
+
+def connector_metrics() -> dict[str, dict]:
+    """Processing metrics of every connector type used so far."""
+    return {connector_type: asdict(metrics) for connector_type, metrics in sorted(_metrics.items())}
+
+
+@lru_cache(maxsize=SHARED_CONNECTORS)
+def _shared_connector(cls: type, config_key: bytes) -> "BaseConnector":
+    return cls(orjson.loads(config_key))
+
+
 class BaseConnector(ABC):
     """
     Abstract base class for all engineering tool connectors.
@@ -24,8 +60,27 @@ class BaseConnector(ABC):
     - Testing connection
     - Processing files
     - Extracting metadata
+
+    and gets a shared lifecycle from this class:
+    - shared(config): one reusable instance per connector class and config
+    - run_in_pool(): runs a parser's (error, result) function in the parse pool
+    - process(): process_file() behind the upload cache, keyed by content
+      hash, connector type/version, file type and config
+    - on_process_end(): metrics hook, called for every process() call
+
+    Connectors are shared between requests, so they must not keep
+    per-file state on the instance.
     """
 
+    # Cached results (see upload_cache) are keyed by this; bump it when
+    # process_file output changes
+    version: str = "1"
+
+    @classmethod
+    def shared(cls, config: Optional[dict] = None) -> "BaseConnector":
+        """Get the shared instance of this connector for a config."""
+        return _shared_connector(cls, orjson.dumps(config or {}, option=orjson.OPT_SORT_KEYS))
+
     def __init__(self, config: dict):
         self.config = config
         self._is_connected = False
@@ -53,12 +108,15 @@ class BaseConnector(ABC):
         pass
 
     @abstractmethod
-    async def process_file(self, file_content: bytes, filename: str) -> ConnectorResult:
+    async def process_file(self, file_path: str, filename: str) -> ConnectorResult:
         """
         Process a file and extract metadata.
 
+        Files are passed by path (uploads are spooled to disk) so connectors
+        can stream or memory-map them rather than hold them in memory.
+
         Args:
-            file_content: Raw bytes of the file
+            file_path: Path to the file on local disk
             filename: Original filename
 
         Returns:
@@ -66,6 +124,106 @@ class BaseConnector(ABC):
         """
         pass
 
+    @property
+    def convertible_file_types(self) -> list[str]:
+        """File extensions convert_file() can store as queryable layers."""
+        return []
+
+    async def convert_file(self, file_path: str, filename: str, key: str) -> ConnectorResult:
+        """
+        Convert a file's features into the layer store under key (optional
+        stage, see app.services.layer_store), in the parse pool.
+
+        Returns:
+            ConnectorResult with the layer store manifest
+
+        Raises:
+            ParsePoolBusy: Too many files are already being parsed
+        """
+        from app.services.layer_store import convert_upload, get_layer_store
+
+        ext = filename.lower().split(".")[-1] if "." in filename else ""
+        if ext not in self.convertible_file_types:
+            return ConnectorResult(success=False, error=f"Conversion not supported for: {ext}")
+
+        return await self.run_in_pool(
+            "conversion", convert_upload, str(get_layer_store().root), file_path, filename, key
+        )
+
+    async def run_in_pool(self, label: str, fn: Callable, *args) -> ConnectorResult:
+        """
+        Run a parser service's (error, result) function in the parse pool.
+
+        Raises:
+            ParsePoolBusy: Too many files are already being parsed
+        """
+        try:
+            error, data = await get_parse_pool().run(fn, *args)
+        except ParsePoolBusy:
+            raise
+        except ParsePoolError as e:
+            return ConnectorResult(success=False, error=str(e))
+        except Exception as e:
+            return ConnectorResult(success=False, error=f"Error processing {label}: {str(e)}")
+
+        if error:
+            return ConnectorResult(success=False, error=error)
+        return ConnectorResult(success=True, data=data)
+
+    async def process(self, file_path: str, filename: str, sha256: Optional[str] = None) -> ConnectorResult:
+        """
+        Process a file, reusing the cached result when the same content
+        (sha256, see upload_spool) was already processed with this
+        connector version and config. Successful results are cached.
+
+        Raises:
+            ParsePoolBusy: Too many files are already being parsed
+        """
+        started = time.perf_counter()
+        ext = filename.lower().split(".")[-1] if "." in filename else ""
+        key = (sha256, self.connector_type, self.version, ext, self.config)
+
+        try:
+            data = get_upload_cache().get_result(*key) if sha256 else None
+            if data is not None:
+                if "filename" in data:
+                    data["filename"] = filename
+                result = ConnectorResult(success=True, data=data)
+                self.on_process_end(filename, result, (time.perf_counter() - started) * 1000, cached=True)
+                return result
+
+            result = await self.process_file(file_path, filename)
+            if result.success and sha256:
+                get_upload_cache().put_result(*key, result.data)
+        except BaseException:
+            self.on_process_end(filename, None, (time.perf_counter() - started) * 1000, cached=False)
+            raise
+
+        self.on_process_end(filename, result, (time.perf_counter() - started) * 1000, cached=False)
+        return result
+
+    @property
+    def metrics(self) -> ConnectorMetrics:
+        """Metrics shared by all instances of this connector type."""
+        return _metrics.setdefault(self.connector_type, ConnectorMetrics())
+
+    def on_process_end(
+        self, filename: str, result: Optional[ConnectorResult], elapsed_ms: float, cached: bool
+    ):
+        """
+        Metrics hook called after every process() call; result is None when
+        processing raised. Override to record more, calling super().
+        """
+        metrics = self.metrics
+        if result is None:
+            metrics.errors += 1
+            return
+        metrics.processed += 1
+        metrics.cache_hits += cached
+        metrics.failed += not result.success
+        metrics.total_ms += elapsed_ms
+        metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+
     def is_file_supported(self, filename: str) -> bool:
         """Check if a file type is supported by this connector."""
         ext = filename.lower().split(".")[-1] if "." in filename else ""
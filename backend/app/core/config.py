@@ -14,6 +14,35 @@ class Settings(BaseSettings):
     # Storage
     storage_bucket: str = "cad-files"
     max_file_size_mb: int = 50
+    dxf_scan_threshold_mb: int = 20  # Larger DXF files are scanned unless a full parse is requested
+    shapefile_max_extract_mb: int = 2048  # Cap on a zipped shapefile's uncompressed size
+    upload_tmp_dir: str = ""  # Where uploads are spooled while processing; empty uses the system temp dir
+    upload_cache_path: str = "data/uploads/cache.sqlite"  # Parse results and stored blobs by content hash
+    layer_store_enabled: bool = False  # Convert vector uploads to GeoParquet for /files/{id}/features (needs pyarrow)
+    layer_store_dir: str = "data/layers"
+
+    # Parse pool (CPU-heavy file parsing in worker processes)
+    parse_workers: int = 0  # 0 uses the CPU count
+    parse_queue_size: int = 8
+    parse_timeout_seconds: float = 120.0  # Time running on a worker
+    parse_queue_timeout_seconds: float = 60.0  # Time waiting for a free worker
+    parse_memory_limit_mb: int = 2048
+
+    # Background upload jobs (POST /files/jobs)
+    upload_job_workers: int = 4
+    upload_job_queue_size: int = 32  # Jobs waiting for a worker; more are rejected with 503
+    upload_job_ttl_seconds: float = 3600.0  # How long finished jobs can be polled
+
+    # Batch uploads (POST /files/upload/batch)
+    batch_upload_max_files: int = 200  # Files per batch, counting zip archive members
+    batch_upload_max_total_mb: int = 1024  # Spooled bytes per batch, counting unpacked archive members
+    batch_upload_concurrency: int = 8  # Files parsed and stored at once
+
+    # Property sales
+    sales_store_path: str = "data/sales/psi.sqlite"  # NSW VG sales loaded by scripts/ingest_psi_sales.py
+
+    # Tiles
+    tile_cache_dir: str = "data/tiles/cache"
 
     # CORS
     cors_origins: list[str] = ["http://localhost:3000"]
@@ -1,5 +1,6 @@
 from supabase import create_client, Client
 from functools import lru_cache
+from starlette.concurrency import run_in_threadpool
 from app.core.config import get_settings
 
 
@@ -20,3 +21,16 @@ def get_supabase_anon_client() -> Client:
         settings.supabase_url,
         settings.supabase_anon_key
     )
+
+
+async def run_query(query):
+    """
+    Execute a supabase-py query builder without blocking the event loop.
+
+    The sync client does its HTTP round trip in execute(); this runs it in
+    the thread pool. The client's connection pool is shared across threads.
+
+    Usage:
+        response = await run_query(supabase.table("cad_files").select("*").eq("id", file_id))
+    """
+    return await run_in_threadpool(query.execute)
@@ -100,10 +100,12 @@ class DxfMetadata(BaseModel):
     entities_by_type: dict[str, int] = {}
     units: Optional[str] = None
     extents: Optional[dict] = None
+    timings: Optional[dict[str, float]] = None  # Milliseconds per parse stage
+    parse_mode: Optional[str] = None  # "full" (ezdxf document) or "scan" (streaming scanner)
 
 
 class FileUploadResponse(BaseModel):
     success: bool
     file_id: Optional[str] = None
-    metadata: Optional[DxfMetadata] = None
+    metadata: Optional[dict[str, Any]] = None  # DxfMetadata fields for DXF; connector-specific otherwise
     message: str
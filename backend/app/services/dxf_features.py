@@ -0,0 +1,371 @@
+"""
+DXF Features
+Converts DXF modelspace geometry into georeferenced features and builds a
+vector tileset from them for map display (runs in the parse pool).
+
+LINE, LWPOLYLINE, ARC and CIRCLE entities are flattened to coordinate
+arrays (arcs and circles with numpy, bulged polylines through ezdxf paths).
+INSERTs are expanded through a block cache: each block definition is
+flattened once, nested blocks included, and every further reference only
+applies its insert matrix to the cached coordinates. All coordinates are
+then scaled to metres and reprojected in one pyproj call, built into
+shapely geometries in bulk, and rendered into an mbtiles tileset in
+TILES_DIR, where the tile endpoints serve it by name.
+"""
+
+import gzip
+import hashlib
+import math
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+import ezdxf
+import numpy as np
+import shapely
+from ezdxf import path as ezdxf_path
+
+from app.services.dxf_parser import DxfParserService
+from app.services.mbtiles_writer import MBTilesWriter
+from app.services.tile_generator import VectorLayer, iter_touched_tiles, render_tile, tileset_metadata
+
+TILE_LAYER = "cad"
+DEFAULT_MINZOOM = 12
+DEFAULT_MAXZOOM = 18
+MAX_TILES = 100_000  # Over this, the tileset stops at a lower maxzoom
+ARC_TOLERANCE_M = 0.05  # Max chord deviation when flattening arcs
+
+# $INSUNITS -> metres
+UNIT_METRES = {1: 0.0254, 2: 0.3048, 3: 1609.344, 4: 0.001, 5: 0.01, 6: 1.0, 7: 1000.0}
+
+FLAT_EXTRUSION = (0.0, 0.0, 1.0)
+
+
+class _Shapes:
+    """Flattened shapes as one coordinate array plus per-shape attributes."""
+
+    def __init__(self):
+        self._coords: list[np.ndarray] = []
+        self.lengths: list[int] = []
+        self.layers: list[str] = []
+        self.entities: list[str] = []
+        self.closed: list[bool] = []
+        self.blocks: list[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, coords: np.ndarray, layer: str, entity: str, closed: bool, block: Optional[str] = None):
+        self._coords.append(coords)
+        self.lengths.append(len(coords))
+        self.layers.append(layer)
+        self.entities.append(entity)
+        self.closed.append(closed)
+        self.blocks.append(block)
+
+    def coords(self) -> np.ndarray:
+        """All coordinates, shape after shape; collapsed to one array on first use."""
+        if len(self._coords) != 1:
+            self._coords = [np.concatenate(self._coords) if self._coords else np.empty((0, 2))]
+        return self._coords[0]
+
+    def extend_transformed(self, block: "_Shapes", matrix: np.ndarray, layer: str, name: str):
+        """
+        Add a block's shapes through an insert matrix (one matmul for the
+        whole block). Shapes on layer "0" take the INSERT's layer.
+        """
+        if not len(block):
+            return
+        self._coords.append(block.coords() @ matrix[:2, :2] + matrix[3, :2])
+        self.lengths.extend(block.lengths)
+        self.layers.extend(layer if shape_layer == "0" else shape_layer for shape_layer in block.layers)
+        self.entities.extend(block.entities)
+        self.closed.extend(block.closed)
+        self.blocks.extend([name] * len(block))
+
+
+class _Flattener:
+    """Flattens entities into _Shapes, caching block definitions."""
+
+    def __init__(self, doc, tolerance: float):
+        self.doc = doc
+        self.tolerance = tolerance
+        self.blocks: dict[str, _Shapes] = {}
+        self._in_progress: set[str] = set()  # Blocks being flattened (to skip recursive INSERTs)
+        self.inserts = 0
+
+    def _arc_points(self, entity, closed: bool) -> np.ndarray:
+        center = entity.dxf.center
+        radius = entity.dxf.radius
+        if closed:
+            start, sweep = 0.0, 2 * math.pi
+        else:
+            start = math.radians(entity.dxf.start_angle)
+            sweep = math.radians(entity.dxf.end_angle - entity.dxf.start_angle) % (2 * math.pi) or 2 * math.pi
+        step = 2 * math.acos(max(-1.0, 1 - self.tolerance / radius)) if radius > self.tolerance else math.pi / 2
+        angles = start + np.linspace(0, sweep, max(4, math.ceil(sweep / step)) + 1)
+        return np.column_stack([center.x + radius * np.cos(angles), center.y + radius * np.sin(angles)])
+
+    def _path_points(self, entity) -> np.ndarray:
+        points = ezdxf_path.make_path(entity).flattening(self.tolerance)
+        return np.array([(point.x, point.y) for point in points], dtype=float).reshape(-1, 2)
+
+    def add_entity(self, entity, shapes: _Shapes):
+        kind = entity.dxftype()
+        layer = entity.dxf.get("layer", "0")
+
+        if kind == "LINE":
+            start, end = entity.dxf.start, entity.dxf.end
+            shapes.add(np.array([[start.x, start.y], [end.x, end.y]]), layer, kind, False)
+        elif kind == "LWPOLYLINE":
+            if entity.has_arc or tuple(entity.dxf.extrusion) != FLAT_EXTRUSION:
+                coords = self._path_points(entity)
+            else:
+                coords = np.array(entity.get_points("xy"), dtype=float).reshape(-1, 2)
+            shapes.add(coords, layer, kind, entity.closed)
+        elif kind in ("ARC", "CIRCLE"):
+            if tuple(entity.dxf.extrusion) != FLAT_EXTRUSION:
+                coords = self._path_points(entity)
+            else:
+                coords = self._arc_points(entity, kind == "CIRCLE")
+            shapes.add(coords, layer, kind, kind == "CIRCLE")
+        elif kind == "INSERT":
+            for insert in entity.multi_insert():
+                block = self.block(insert.dxf.name)
+                if block is not None:
+                    matrix = np.array(list(insert.matrix44().rows()), dtype=float)
+                    shapes.extend_transformed(block, matrix, layer, insert.dxf.name)
+                    self.inserts += 1
+
+    def block(self, name: str) -> Optional[_Shapes]:
+        """
+        A block definition flattened in block coordinates (cached). None for
+        unknown blocks and for a block that (indirectly) inserts itself.
+        """
+        if name in self.blocks:
+            return self.blocks[name]
+        if name in self._in_progress:
+            return None
+        layout = self.doc.blocks.get(name)
+        if layout is None:
+            return None
+
+        shapes = _Shapes()
+        self._in_progress.add(name)
+        try:
+            for entity in layout:
+                self.add_entity(entity, shapes)
+        finally:
+            self._in_progress.discard(name)
+        shapes.coords()
+        self.blocks[name] = shapes
+        return shapes
+
+
+def _tileset_name(file_path: str, source_crs: str) -> str:
+    """Content-derived tileset name, so the same drawing and CRS map to one tileset."""
+    digest = hashlib.sha256(source_crs.encode())
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return f"dxf-{digest.hexdigest()[:24]}"
+
+
+def _scale_to_crs_units(doc, crs) -> float:
+    """Factor from drawing units to the CRS's units (metric CRSs only)."""
+    units = doc.header.get("$INSUNITS", 0)
+    metres = UNIT_METRES.get(units)
+    unit_name = crs.axis_info[0].unit_name if crs.axis_info else ""
+    if metres is None or unit_name not in ("metre", "meter"):
+        return 1.0
+    return metres
+
+
+def _plan_tiles(
+    geometries: np.ndarray, minzoom: int, maxzoom: int, max_tiles: int
+) -> list[tuple[int, np.ndarray]]:
+    """
+    Tiles to render, zoom by zoom from minzoom: those the geometries
+    intersect, up to the highest zoom that keeps the total within
+    max_tiles (empty if even minzoom doesn't fit).
+    """
+    zooms = []
+    total = 0
+    for z, tiles in iter_touched_tiles(geometries, maxzoom):
+        if z < minzoom:
+            continue
+        total += len(tiles)
+        if total > max_tiles:
+            break
+        zooms.append((z, tiles))
+    return zooms
+
+
+def _built_maxzoom(output: Path, default: int) -> int:
+    """The maxzoom an existing tileset was built to."""
+    with closing(sqlite3.connect(f"file:{output}?mode=ro", uri=True)) as conn:
+        row = conn.execute("SELECT value FROM metadata WHERE name = 'maxzoom'").fetchone()
+    return int(row[0]) if row else default
+
+
+def _build_geometries(coords: np.ndarray, shapes: _Shapes) -> np.ndarray:
+    """Polygons for closed shapes, linestrings for open ones (None if degenerate)."""
+    lengths = np.asarray(shapes.lengths, dtype=np.int64)
+    closed = np.asarray(shapes.closed, dtype=bool)
+    geometries = np.full(len(lengths), None, dtype=object)
+
+    for mask, build in (
+        (closed & (lengths >= 3), lambda c, i: shapely.polygons(shapely.linearrings(c, indices=i))),
+        (~closed & (lengths >= 2), lambda c, i: shapely.linestrings(c, indices=i)),
+    ):
+        if not mask.any():
+            continue
+        points = np.repeat(mask, lengths)
+        indices = np.repeat(np.arange(np.count_nonzero(mask)), lengths[mask])
+        geometries[mask] = build(coords[points], indices)
+
+    return geometries
+
+
+class DxfFeatureService:
+    """Service for converting DXF drawings into georeferenced map features."""
+
+    @staticmethod
+    def convert(
+        file_path: str,
+        filename: str,
+        source_crs: str,
+        tiles_dir: str,
+        minzoom: int = DEFAULT_MINZOOM,
+        maxzoom: int = DEFAULT_MAXZOOM,
+        max_tiles: int = MAX_TILES,
+    ) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Georeference a drawing's modelspace and build its vector tileset.
+
+        The drawing's coordinates are taken to be in source_crs (scaled
+        from $INSUNITS when the CRS is metric). Tilesets are named by
+        content and CRS, so converting the same drawing again reuses the
+        tileset already built.
+
+        Only tiles the geometry intersects are rendered. When that is more
+        than max_tiles (e.g. a stray line across the state at zoom 18), the
+        tileset stops at the highest zoom that fits; if even minzoom
+        doesn't fit, no tileset is built and "tileset_error" says why.
+
+        Returns:
+            Tuple of (error_message, result); result is None on failure
+        """
+        from pyproj import CRS, Transformer
+        from pyproj.exceptions import CRSError
+
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        try:
+            crs = CRS.from_user_input(source_crs)
+        except CRSError as e:
+            return f"Invalid source CRS: {str(e)}", None
+
+        try:
+            doc = DxfParserService.load_document(file_path)
+        except ezdxf.DXFError as e:
+            return f"Invalid DXF file: {str(e)}", None
+        except Exception as e:
+            return f"Error reading file: {str(e).replace(file_path, filename)}", None
+        timings["read_ms"] = (time.perf_counter() - started) * 1000
+
+        stage = time.perf_counter()
+        flattener = _Flattener(doc, ARC_TOLERANCE_M / (UNIT_METRES.get(doc.header.get("$INSUNITS", 0)) or 1.0))
+        shapes = _Shapes()
+        for entity in doc.modelspace():
+            flattener.add_entity(entity, shapes)
+        coords = shapes.coords() * _scale_to_crs_units(doc, crs)
+        timings["flatten_ms"] = (time.perf_counter() - stage) * 1000
+
+        stage = time.perf_counter()
+        # One vectorized transform each: lon/lat for bounds, Web Mercator for tiles
+        lon, lat = Transformer.from_crs(crs, "EPSG:4326", always_xy=True).transform(coords[:, 0], coords[:, 1])
+        x, y = Transformer.from_crs(crs, "EPSG:3857", always_xy=True).transform(coords[:, 0], coords[:, 1])
+        geometries = _build_geometries(np.column_stack([x, y]), shapes)
+        keep = ~shapely.is_missing(geometries)
+        timings["transform_ms"] = (time.perf_counter() - stage) * 1000
+
+        bounds = (
+            (float(np.min(lon)), float(np.min(lat)), float(np.max(lon)), float(np.max(lat)))
+            if len(coords) else None
+        )
+        kinds = shapely.get_type_id(geometries[keep])
+        result = {
+            "crs": source_crs,
+            "feature_count": int(keep.sum()),
+            "geometry_types": {
+                name: int(np.count_nonzero(kinds == type_id))
+                for name, type_id in (("LineString", 1), ("Polygon", 3))
+                if np.count_nonzero(kinds == type_id)
+            },
+            "bbox": list(bounds) if bounds else None,
+            "blocks_flattened": len(flattener.blocks),
+            "inserts_expanded": flattener.inserts,
+            "tileset": None,
+        }
+        if not keep.any():
+            result["timings"] = {**timings, "total_ms": (time.perf_counter() - started) * 1000}
+            return None, result
+
+        stage = time.perf_counter()
+        name = _tileset_name(file_path, source_crs)
+        output = Path(tiles_dir) / f"{name}.mbtiles"
+        tile_count = None  # Unknown when the tileset was already built
+        if output.exists():
+            maxzoom = _built_maxzoom(output, maxzoom)
+        else:
+            zooms = _plan_tiles(geometries[keep], minzoom, maxzoom, max_tiles)
+            if not zooms:
+                result["tileset_error"] = f"Drawing is too large to tile (over {max_tiles} tiles at zoom {minzoom})"
+                result["timings"] = {**timings, "total_ms": (time.perf_counter() - started) * 1000}
+                return None, result
+            maxzoom = zooms[-1][0]
+
+            indices = np.flatnonzero(keep).tolist()
+            properties = [
+                {
+                    "layer": shapes.layers[i],
+                    "entity": shapes.entities[i],
+                    **({"block": shapes.blocks[i]} if shapes.blocks[i] else {}),
+                }
+                for i in indices
+            ]
+            layer = VectorLayer(
+                name=TILE_LAYER,
+                geometries=geometries[keep],
+                properties=properties,
+                minzoom=minzoom,
+                maxzoom=maxzoom,
+                bounds=bounds,
+                fields={"layer": "String", "entity": "String", "block": "String"},
+            )
+            with MBTilesWriter(output) as writer:
+                for z, tiles in zooms:
+                    for tx, ty in tiles.tolist():
+                        data = render_tile([layer], z, tx, ty)
+                        if data:
+                            # Fixed mtime keeps identical tiles byte-identical for deduplication
+                            writer.put_tile(z, tx, ty, gzip.compress(data, mtime=0))
+                writer.set_metadata(tileset_metadata(name, [layer], minzoom, maxzoom))
+                tile_count = writer.tile_count
+        timings["tiles_ms"] = (time.perf_counter() - stage) * 1000
+
+        result["tileset"] = {
+            "name": name,
+            "minzoom": minzoom,
+            "maxzoom": maxzoom,
+            "layer": TILE_LAYER,
+            "tile_count": tile_count,
+        }
+        result["timings"] = {
+            **{key: round(value, 2) for key, value in timings.items()},
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        return None, result
@@ -1,97 +1,161 @@
+import time
 import ezdxf
+from ezdxf import bbox
 from ezdxf.document import Drawing
-from io import BytesIO
-from typing import Optional
+from ezdxf.filemanagement import dxf_stream_info
+from ezdxf.lldxf.tagger import binary_tags_loader
+from io import BytesIO, TextIOWrapper
+from typing import Iterator, Optional, Union
 from app.schemas import DxfMetadata
+from app.services.dxf_scanner import DxfScanError, scan_dxf
+
+
+UNITS_MAP = {
+    0: "Unitless",
+    1: "Inches",
+    2: "Feet",
+    3: "Miles",
+    4: "Millimeters",
+    5: "Centimeters",
+    6: "Meters",
+    7: "Kilometers",
+}
 
 
 class DxfParserService:
     """Service for parsing and extracting metadata from DXF files."""
 
     @staticmethod
-    def parse_dxf(file_content: bytes, filename: str) -> DxfMetadata:
+    def load_document(source: Union[str, bytes]) -> Drawing:
         """
-        Parse a DXF file and extract metadata.
+        Load an ASCII or binary DXF document from a file path or bytes.
 
-        Args:
-            file_content: Raw bytes of the DXF file
-            filename: Original filename
+        Raises:
+            DXFError: for invalid or corrupted DXF structures
+        """
+        if isinstance(source, str):
+            # readfile detects binary DXF and the code page itself
+            return ezdxf.readfile(source)
 
-        Returns:
-            DxfMetadata object with extracted information
+        file_content = source
+        if file_content.startswith(b"AutoCAD Binary DXF"):
+            return Drawing.load(binary_tags_loader(file_content))
+
+        # Pre-R2007 files declare their code page in the header
+        info = dxf_stream_info(TextIOWrapper(BytesIO(file_content), encoding="cp1252", errors="ignore"))
+        stream = TextIOWrapper(BytesIO(file_content), encoding=info.encoding, errors="surrogateescape")
+        return ezdxf.read(stream)
+
+    @staticmethod
+    def process_dxf(source: Union[str, bytes], filename: str) -> tuple[Optional[str], Optional[DxfMetadata]]:
         """
-        try:
-            # Load DXF from bytes
-            doc: Drawing = ezdxf.read(BytesIO(file_content))
+        Validate and parse a DXF file in a single pass (runs in the parse pool).
 
-            # Extract layers
-            layers = [layer.dxf.name for layer in doc.layers]
+        source is a file path or the raw bytes of the file.
 
-            # Extract blocks
-            blocks = [block.name for block in doc.blocks if not block.name.startswith("*")]
+        The document is loaded once; loading doubles as validation. Entity
+        counts and extents are gathered in one traversal of the modelspace.
 
-            # Count entities by type
-            entities_by_type: dict[str, int] = {}
-            total_entities = 0
+        Returns:
+            Tuple of (error_message, metadata); metadata is None if invalid
+        """
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
 
-            for entity in doc.modelspace():
+        try:
+            doc = DxfParserService.load_document(source)
+        except ezdxf.DXFError as e:
+            return f"Invalid DXF file: {str(e)}", None
+        except Exception as e:
+            message = str(e)
+            if isinstance(source, str):
+                # Report the upload's name, not the temp file it was spooled to
+                message = message.replace(source, filename)
+            return f"Error reading file: {message}", None
+        timings["read_ms"] = (time.perf_counter() - started) * 1000
+
+        stage = time.perf_counter()
+        layers = [layer.dxf.name for layer in doc.layers]
+        blocks = [block.name for block in doc.blocks if not block.name.startswith("*")]
+        units_value = doc.header.get("$INSUNITS", 0)
+        units = UNITS_MAP.get(units_value, f"Unknown ({units_value})")
+        timings["tables_ms"] = (time.perf_counter() - stage) * 1000
+
+        # Count entities by type while the bounding box consumes them
+        stage = time.perf_counter()
+        entities_by_type: dict[str, int] = {}
+
+        def counted(entities) -> Iterator:
+            for entity in entities:
                 entity_type = entity.dxftype()
                 entities_by_type[entity_type] = entities_by_type.get(entity_type, 0) + 1
-                total_entities += 1
-
-            # Get drawing extents
-            extents = None
-            try:
-                msp = doc.modelspace()
-                if msp:
-                    bbox = ezdxf.bbox.extents(msp)
-                    if bbox.has_data:
-                        extents = {
-                            "min_x": bbox.extmin.x,
-                            "min_y": bbox.extmin.y,
-                            "min_z": bbox.extmin.z,
-                            "max_x": bbox.extmax.x,
-                            "max_y": bbox.extmax.y,
-                            "max_z": bbox.extmax.z,
-                        }
-            except Exception:
-                pass  # Extents calculation failed, continue without it
-
-            # Get DXF version
-            version = doc.dxfversion
-
-            # Get units (if available)
-            units = None
-            try:
-                units_value = doc.header.get("$INSUNITS", 0)
-                units_map = {
-                    0: "Unitless",
-                    1: "Inches",
-                    2: "Feet",
-                    3: "Miles",
-                    4: "Millimeters",
-                    5: "Centimeters",
-                    6: "Meters",
-                    7: "Kilometers",
+                yield entity
+
+        msp = doc.modelspace()
+        extents = None
+        try:
+            box = bbox.extents(counted(msp), fast=True)
+            if box.has_data:
+                extents = {
+                    "min_x": box.extmin.x,
+                    "min_y": box.extmin.y,
+                    "min_z": box.extmin.z,
+                    "max_x": box.extmax.x,
+                    "max_y": box.extmax.y,
+                    "max_z": box.extmax.z,
                 }
-                units = units_map.get(units_value, f"Unknown ({units_value})")
-            except Exception:
+        except Exception:
+            # Extents failed part-way; recount every entity without extents
+            entities_by_type = {}
+            for _ in counted(msp):
                 pass
+        timings["entities_ms"] = (time.perf_counter() - stage) * 1000
+        timings["total_ms"] = (time.perf_counter() - started) * 1000
+
+        return None, DxfMetadata(
+            filename=filename,
+            file_type="dxf",
+            version=doc.dxfversion,
+            layers=layers,
+            layer_count=len(layers),
+            block_count=len(blocks),
+            entity_count=sum(entities_by_type.values()),
+            entities_by_type=entities_by_type,
+            units=units,
+            extents=extents,
+            timings={name: round(ms, 2) for name, ms in timings.items()},
+            parse_mode="full",
+        )
 
-            return DxfMetadata(
-                filename=filename,
-                file_type="dxf",
-                version=version,
-                layers=layers,
-                layer_count=len(layers),
-                block_count=len(blocks),
-                entity_count=total_entities,
-                entities_by_type=entities_by_type,
-                units=units,
-                extents=extents,
-            )
+    @staticmethod
+    def scan(source: Union[str, bytes], filename: str) -> tuple[Optional[str], Optional[DxfMetadata]]:
+        """
+        Extract metadata with the streaming scanner (no ezdxf document).
 
-        except Exception as e:
+        source is a file path or the raw bytes of the file.
+
+        Returns:
+            Tuple of (error_message, metadata); metadata is None if invalid
+        """
+        try:
+            return None, scan_dxf(source, filename)
+        except DxfScanError as e:
+            return f"Invalid DXF file: {str(e)}", None
+
+    @staticmethod
+    def parse_dxf(file_content: bytes, filename: str) -> DxfMetadata:
+        """
+        Parse a DXF file and extract metadata.
+
+        Args:
+            file_content: Raw bytes of the DXF file
+            filename: Original filename
+
+        Returns:
+            DxfMetadata object with extracted information
+        """
+        error, metadata = DxfParserService.process_dxf(file_content, filename)
+        if metadata is None:
             # Return basic metadata if parsing fails
             return DxfMetadata(
                 filename=filename,
@@ -102,6 +166,7 @@ class DxfParserService:
                 entity_count=0,
                 entities_by_type={},
             )
+        return metadata
 
     @staticmethod
     def validate_dxf(file_content: bytes) -> tuple[bool, Optional[str]]:
@@ -115,7 +180,7 @@ class DxfParserService:
             Tuple of (is_valid, error_message)
         """
         try:
-            ezdxf.read(BytesIO(file_content))
+            DxfParserService.load_document(file_content)
             return True, None
         except ezdxf.DXFError as e:
             return False, f"Invalid DXF file: {str(e)}"
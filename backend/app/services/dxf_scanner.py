@@ -0,0 +1,504 @@
+"""
+DXF Metadata Scanner
+Streams DXF group-code/value pairs (ASCII or binary DXF) and collects the
+drawing metadata without building an ezdxf document: version, units, layer
+table, block names, modelspace entity counts and extents.
+
+Memory use does not depend on drawing size; only the small tables (layer
+and block names, per-block extents) are kept. Extents are approximate in
+the same way as ezdxf's fast bounding box: curves use their defining
+points (circles/arcs/ellipses their full radius), text uses its insertion
+point and block references use the referenced block's extents.
+"""
+
+import io
+import math
+import struct
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+from ezdxf.lldxf.types import BINARY_DATA, BYTES, DOUBLE, INT16, INT32, INT64
+from ezdxf.tools.codepage import toencoding
+
+from app.schemas import DxfMetadata
+
+
+BINARY_SENTINEL = b"AutoCAD Binary DXF\r\n\x1a\x00"
+
+# Entities that belong to a parent entity and aren't counted on their own
+SUB_ENTITIES = {"VERTEX", "SEQEND", "ATTRIB"}
+
+# Structure markers that aren't entities
+STRUCTURE_TYPES = {"SECTION", "ENDSEC", "TABLE", "ENDTAB", "BLOCK", "ENDBLK", "EOF"}
+
+# Point-range group codes that hold direction vectors rather than positions
+VECTOR_CODES = {
+    "ELLIPSE": {11, 21, 31},
+    "MTEXT": {11, 21, 31},
+    "XLINE": {11, 21, 31},
+    "RAY": {11, 21, 31},
+    "MLINE": {12, 22, 32, 13, 23, 33},
+    "IMAGE": {11, 21, 31, 12, 22, 32},
+    "WIPEOUT": {11, 21, 31, 12, 22, 32},
+    "TOLERANCE": {11, 21, 31},
+    "SPLINE": {12, 22, 32, 13, 23, 33},
+    "HATCH": {12, 22, 32, 13, 23, 33},  # Spline edge tangents
+}
+
+# HATCH edge type (group code 72) whose 11/21 is the major axis vector
+HATCH_ELLIPSE_EDGE = 3
+
+UNITS_MAP = {
+    0: "Unitless",
+    1: "Inches",
+    2: "Feet",
+    3: "Miles",
+    4: "Millimeters",
+    5: "Centimeters",
+    6: "Meters",
+    7: "Kilometers",
+}
+
+_CHUNK_SIZE = 1024 * 1024
+
+_UINT8 = struct.Struct("<B")
+_UINT16 = struct.Struct("<H")
+_INT16 = struct.Struct("<h")
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_DOUBLE = struct.Struct("<d")
+
+DxfSource = Union[str, Path, bytes, BinaryIO]
+
+
+class DxfScanError(Exception):
+    """Raised when the input is not a readable DXF file."""
+    pass
+
+
+class _Extents:
+    """Axis-aligned bounding box accumulator."""
+
+    __slots__ = ("min", "max")
+
+    def __init__(self):
+        self.min = [math.inf, math.inf, math.inf]
+        self.max = [-math.inf, -math.inf, -math.inf]
+
+    @property
+    def has_data(self) -> bool:
+        return self.min[0] <= self.max[0]
+
+    def add(self, axis: int, value: float):
+        if value < self.min[axis]:
+            self.min[axis] = value
+        if value > self.max[axis]:
+            self.max[axis] = value
+
+    def add_point(self, x: float, y: float, z: float = 0.0):
+        self.add(0, x)
+        self.add(1, y)
+        self.add(2, z)
+
+    def merge(self, other: "_Extents"):
+        for axis in range(3):
+            if other.min[axis] <= other.max[axis]:
+                self.add(axis, other.min[axis])
+                self.add(axis, other.max[axis])
+
+    def as_dict(self) -> Optional[dict]:
+        if not self.has_data:
+            return None
+        # Entities without z codes leave z empty
+        min_z = self.min[2] if self.min[2] <= self.max[2] else 0.0
+        max_z = self.max[2] if self.min[2] <= self.max[2] else 0.0
+        return {
+            "min_x": self.min[0],
+            "min_y": self.min[1],
+            "min_z": min_z,
+            "max_x": self.max[0],
+            "max_y": self.max[1],
+            "max_z": max_z,
+        }
+
+
+# =============================================================================
+# TAG READERS
+# =============================================================================
+
+def _iter_lines(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield lines (without line endings) reading the stream in large chunks."""
+    remainder = b""
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (remainder + chunk).split(b"\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if remainder:
+        yield remainder.rstrip(b"\r")
+
+
+def _iter_ascii_tags(stream: BinaryIO) -> Iterator[tuple[int, bytes]]:
+    """Yield (group code, raw value) pairs from an ASCII DXF stream."""
+    lines = _iter_lines(stream)
+    line_number = 1
+    for code_line in lines:
+        value = next(lines, b"")
+        try:
+            code = int(code_line)
+        except ValueError:
+            raise DxfScanError(
+                f"Invalid group code {code_line.strip()[:20]!r} at line {line_number}"
+            )
+        yield code, value
+        line_number += 2
+
+
+class _BinaryReader:
+    """Chunked reader over a binary stream with a small look-ahead buffer."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.buffer = b""
+        self.pos = 0
+
+    def _fill(self, size: int) -> bool:
+        """Ensure at least size unread bytes are buffered; False at end of file."""
+        while len(self.buffer) - self.pos < size:
+            chunk = self.stream.read(_CHUNK_SIZE)
+            if not chunk:
+                return False
+            self.buffer = self.buffer[self.pos:] + chunk
+            self.pos = 0
+        return True
+
+    def read(self, size: int) -> bytes:
+        if not self._fill(size):
+            raise DxfScanError("Unexpected end of binary DXF data")
+        data = self.buffer[self.pos:self.pos + size]
+        self.pos += size
+        return data
+
+    def unpack(self, fmt: struct.Struct):
+        if not self._fill(fmt.size):
+            raise DxfScanError("Unexpected end of binary DXF data")
+        value = fmt.unpack_from(self.buffer, self.pos)[0]
+        self.pos += fmt.size
+        return value
+
+    def read_string(self) -> bytes:
+        while True:
+            end = self.buffer.find(b"\x00", self.pos)
+            if end >= 0:
+                data = self.buffer[self.pos:end]
+                self.pos = end + 1
+                return data
+            if not self._fill(len(self.buffer) - self.pos + 1):
+                raise DxfScanError("Unterminated string in binary DXF data")
+
+    def at_end(self) -> bool:
+        return not self._fill(1)
+
+
+def _iter_binary_tags(stream: BinaryIO) -> Iterator[tuple[int, Union[bytes, float, int]]]:
+    """Yield (group code, value) pairs from a binary DXF stream (after the sentinel)."""
+    reader = _BinaryReader(stream)
+
+    # R12 files use 1-byte group codes; the first tag is always (0, "SECTION")
+    two_byte_codes = reader._fill(2) and reader.buffer[reader.pos + 1] == 0
+
+    code_format = _UINT16 if two_byte_codes else _UINT8
+
+    while not reader.at_end():
+        code = reader.unpack(code_format)
+        if code == 255 and not two_byte_codes:
+            code = reader.unpack(_UINT16)
+
+        if code in DOUBLE:
+            value = reader.unpack(_DOUBLE)
+        elif code in INT16:
+            value = reader.unpack(_INT16)
+        elif code in INT32:
+            value = reader.unpack(_INT32)
+        elif code in BINARY_DATA:
+            value = reader.read(reader.unpack(_UINT8))
+        elif code in INT64:
+            value = reader.unpack(_INT64)
+        elif code in BYTES:
+            value = reader.unpack(_UINT8)
+        else:
+            value = reader.read_string()
+        yield code, value
+
+
+def _as_float(value) -> float:
+    return value if isinstance(value, float) else float(value)
+
+
+def _as_int(value) -> int:
+    return value if isinstance(value, int) else int(float(value))
+
+
+def _as_str(value, encoding: str) -> str:
+    if isinstance(value, bytes):
+        return value.decode(encoding, errors="replace").strip()
+    return str(value)
+
+
+# =============================================================================
+# SCANNER
+# =============================================================================
+
+class _Entity:
+    """State of the entity currently being read."""
+
+    __slots__ = (
+        "type", "paperspace", "extents", "base", "radius", "axis", "block", "scale", "rotation",
+        "hatch_paths", "hatch_edge",
+    )
+
+    def __init__(self, entity_type: str):
+        self.type = entity_type
+        self.paperspace = False
+        self.extents = _Extents()
+        self.base = [None, None, 0.0]  # First 10/20/30 point
+        self.radius = 0.0
+        self.axis = [0.0, 0.0]  # Ellipse major axis
+        self.block: Optional[str] = None
+        self.scale = [1.0, 1.0]
+        self.rotation = 0.0
+        self.hatch_paths = False  # Past HATCH's elevation point, into its boundary paths
+        self.hatch_edge = 0
+
+    def is_position(self, code: int) -> bool:
+        """Check whether a point-range group code holds a position (counts toward extents)."""
+        if code in VECTOR_CODES.get(self.type, ()):
+            return False
+        if self.type == "HATCH":
+            if not self.hatch_paths:
+                # Elevation point: only its z is a position (the hatch plane)
+                return code == 30
+            if self.hatch_edge == HATCH_ELLIPSE_EDGE and code in (11, 21, 31):
+                return False
+        return True
+
+    def finish(self, block_extents: dict[str, tuple[float, float, _Extents]]) -> _Extents:
+        """Get the entity's extents including radii and referenced blocks."""
+        x, y, z = self.base
+        if x is None or y is None:
+            return self.extents
+
+        if self.type in ("CIRCLE", "ARC") and self.radius:
+            self.extents.add_point(x - self.radius, y - self.radius, z)
+            self.extents.add_point(x + self.radius, y + self.radius, z)
+        elif self.type == "ELLIPSE":
+            r = math.hypot(*self.axis)
+            self.extents.add_point(x - r, y - r, z)
+            self.extents.add_point(x + r, y + r, z)
+        elif self.type == "INSERT" and self.block in block_extents:
+            base_x, base_y, block = block_extents[self.block]
+            if block.has_data:
+                cos_r = math.cos(math.radians(self.rotation))
+                sin_r = math.sin(math.radians(self.rotation))
+                for bx in (block.min[0], block.max[0]):
+                    for by in (block.min[1], block.max[1]):
+                        dx = (bx - base_x) * self.scale[0]
+                        dy = (by - base_y) * self.scale[1]
+                        self.extents.add_point(x + dx * cos_r - dy * sin_r, y + dx * sin_r + dy * cos_r, z)
+        return self.extents
+
+
+def _open_source(source: DxfSource) -> tuple[BinaryIO, bool]:
+    """Open a path, bytes or binary stream; returns (stream, close when done)."""
+    if isinstance(source, (str, Path)):
+        return open(source, "rb"), True
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), True
+    return source, False
+
+
+def scan_dxf(source: DxfSource, filename: str) -> DxfMetadata:
+    """
+    Scan a DXF file for metadata without loading it into ezdxf.
+
+    Args:
+        source: File path, bytes or binary stream (read from its current position)
+        filename: Original filename
+
+    Returns:
+        DxfMetadata (parse_mode "scan")
+
+    Raises:
+        DxfScanError: if the input is not a readable DXF file
+    """
+    started = time.perf_counter()
+    stream, close = _open_source(source)
+
+    try:
+        if not stream.seekable():
+            stream = io.BufferedReader(stream, _CHUNK_SIZE)
+        if hasattr(stream, "peek"):
+            binary = stream.peek(len(BINARY_SENTINEL))[:len(BINARY_SENTINEL)] == BINARY_SENTINEL
+        else:
+            position = stream.tell()
+            binary = stream.read(len(BINARY_SENTINEL)) == BINARY_SENTINEL
+            stream.seek(position)
+
+        if binary:
+            stream.read(len(BINARY_SENTINEL))
+            tags = _iter_binary_tags(stream)
+        else:
+            tags = _iter_ascii_tags(stream)
+
+        version = None
+        units_value = 0
+        encoding = "cp1252"
+        layers: list[str] = []
+        blocks: list[str] = []
+        entities_by_type: dict[str, int] = {}
+        extents = _Extents()
+        block_extents: dict[str, tuple[float, float, _Extents]] = {}
+
+        section = None
+        table = None
+        header_var = None
+        expect_name = None  # Record type whose name (code 2) comes next
+        block_name = None
+        block_base = [0.0, 0.0]
+        block_bbox: Optional[_Extents] = None
+        entity: Optional[_Entity] = None
+        found_section = False
+
+        for code, value in tags:
+            if code == 0:
+                record = _as_str(value, encoding)
+
+                # Finish the previous entity
+                if entity is not None:
+                    bbox = entity.finish(block_extents)
+                    if section == "ENTITIES" and not entity.paperspace:
+                        extents.merge(bbox)
+                        if entity.type not in SUB_ENTITIES:
+                            entities_by_type[entity.type] = entities_by_type.get(entity.type, 0) + 1
+                    elif section == "BLOCKS" and block_bbox is not None:
+                        block_bbox.merge(bbox)
+                    entity = None
+
+                if record == "SECTION":
+                    found_section = True
+                    expect_name = "SECTION"
+                elif record == "ENDSEC":
+                    section = None
+                elif record == "TABLE":
+                    expect_name = "TABLE"
+                elif record == "ENDTAB":
+                    table = None
+                elif record == "BLOCK" and section == "BLOCKS":
+                    expect_name = "BLOCK"
+                    block_base = [0.0, 0.0]
+                    block_bbox = _Extents()
+                elif record == "ENDBLK":
+                    if block_name is not None and block_bbox is not None:
+                        block_extents[block_name] = (block_base[0], block_base[1], block_bbox)
+                    block_name = None
+                    block_bbox = None
+                elif record == "EOF":
+                    break
+                elif section == "TABLES":
+                    expect_name = record if record == table else None
+                elif section in ("ENTITIES", "BLOCKS") and record not in STRUCTURE_TYPES:
+                    entity = _Entity(record)
+                continue
+
+            if section == "HEADER":
+                if code == 9:
+                    header_var = _as_str(value, encoding)
+                elif header_var == "$ACADVER" and code == 1:
+                    version = _as_str(value, encoding)
+                    if version >= "AC1021":
+                        encoding = "utf-8"
+                elif header_var == "$DWGCODEPAGE" and code == 3:
+                    if version is None or version < "AC1021":
+                        encoding = toencoding(_as_str(value, "ascii"))
+                elif header_var == "$INSUNITS" and code == 70:
+                    units_value = _as_int(value)
+                continue
+
+            if code == 2 and expect_name is not None:
+                name = _as_str(value, encoding)
+                if expect_name == "SECTION":
+                    section = name
+                elif expect_name == "TABLE":
+                    table = name
+                elif expect_name == "LAYER":
+                    layers.append(name)
+                elif expect_name == "BLOCK":
+                    block_name = name
+                    # Layout blocks: *Model_Space etc. (R12: $MODEL_SPACE, $PAPER_SPACE)
+                    if not name.startswith(("*", "$")):
+                        blocks.append(name)
+                expect_name = None
+                continue
+
+            if block_name is not None and entity is None and code in (10, 20):
+                # Block base point
+                block_base[code // 10 - 1] = _as_float(value)
+                continue
+
+            if entity is None:
+                continue
+
+            if code == 67:
+                entity.paperspace = _as_int(value) == 1
+            elif 10 <= code <= 38:
+                if not entity.is_position(code):
+                    if entity.type == "ELLIPSE" and code in (11, 21):
+                        entity.axis[code // 10 - 1] = _as_float(value)
+                    continue
+                axis = code // 10 - 1
+                coordinate = _as_float(value)
+                entity.extents.add(axis, coordinate)
+                if code in (10, 20, 30) and (entity.base[axis] is None or axis == 2):
+                    entity.base[axis] = coordinate
+            elif entity.type == "HATCH" and code in (91, 72):
+                if code == 91:
+                    entity.hatch_paths = True
+                else:
+                    entity.hatch_edge = _as_int(value)
+            elif code == 40 and entity.type in ("CIRCLE", "ARC"):
+                entity.radius = _as_float(value)
+            elif entity.type == "INSERT":
+                if code == 2:
+                    entity.block = _as_str(value, encoding)
+                elif code in (41, 42):
+                    entity.scale[code - 41] = _as_float(value)
+                elif code == 50:
+                    entity.rotation = _as_float(value)
+
+        if not found_section:
+            raise DxfScanError("No DXF sections found")
+
+    except (struct.error, ValueError, UnicodeError) as e:
+        raise DxfScanError(f"Malformed DXF data: {str(e)}")
+    finally:
+        if close:
+            stream.close()
+
+    return DxfMetadata(
+        filename=filename,
+        file_type="dxf",
+        version=version,
+        layers=layers,
+        layer_count=len(layers),
+        block_count=len(blocks),
+        entity_count=sum(entities_by_type.values()),
+        entities_by_type=entities_by_type,
+        units=UNITS_MAP.get(units_value, f"Unknown ({units_value})"),
+        extents=extents.as_dict(),
+        parse_mode="scan",
+        timings={"scan_ms": round((time.perf_counter() - started) * 1000, 2)},
+    )
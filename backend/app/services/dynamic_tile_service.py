@@ -0,0 +1,130 @@
+"""
+Dynamic Tile Service
+Renders vector tiles on the fly from the PostGIS planning tables and caches
+them in local mbtiles files.
+"""
+
+import gzip
+from pathlib import Path
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.supabase import get_supabase_client
+from app.services.tile_store import BACKEND_ROOT, MBTilesCache
+
+
+# Tile extent and buffer used by get_planning_tile (ST_AsMVTGeom), in tile units
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Planning tables exposed as dynamic tile layers (rendered by get_planning_tile)
+PLANNING_LAYERS = {
+    "planning_zones": {
+        "name": "Planning Zones",
+        "minzoom": 8,
+        "maxzoom": 18,
+    },
+    "hazard_overlays": {
+        "name": "Hazard Overlays",
+        "minzoom": 8,
+        "maxzoom": 18,
+    },
+    "development_controls": {
+        "name": "Development Controls",
+        "minzoom": 10,
+        "maxzoom": 18,
+    },
+    "heritage_items": {
+        "name": "Heritage Items",
+        "minzoom": 12,
+        "maxzoom": 18,
+    },
+}
+
+
+def _decode_bytea(value) -> bytes:
+    """Decode a bytea value returned by PostgREST ("\\x..." hex string)."""
+    if value is None:
+        return b""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if value.startswith("\\x"):
+        return bytes.fromhex(value[2:])
+    return value.encode("latin-1")
+
+
+class DynamicTileService:
+    """
+    Service for on-the-fly MVT generation from PostGIS.
+
+    Tiles are rendered with the get_planning_tile() SQL function and stored
+    gzipped in one mbtiles cache per layer. Ingest invalidates the cached
+    tiles covering the features it wrote.
+    """
+
+    def __init__(self):
+        self._caches: dict[str, MBTilesCache] = {}
+
+    def get_cache(self, layer: str) -> MBTilesCache:
+        """Get or open the tile cache for a layer."""
+        if layer not in self._caches:
+            cache_dir = Path(get_settings().tile_cache_dir)
+            if not cache_dir.is_absolute():
+                cache_dir = BACKEND_ROOT / cache_dir
+            self._caches[layer] = MBTilesCache(
+                cache_dir / f"{layer}.mbtiles",
+                name=PLANNING_LAYERS[layer]["name"],
+            )
+        return self._caches[layer]
+
+    async def get_tile(self, layer: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """
+        Get a gzipped tile for a planning layer, rendering it if not cached.
+
+        Returns:
+            Gzipped MVT bytes, empty bytes for tiles without features, or None
+            if the layer doesn't exist or the zoom is out of range
+        """
+        config = PLANNING_LAYERS.get(layer)
+        if config is None or not config["minzoom"] <= z <= config["maxzoom"]:
+            return None
+
+        # Cache reads and writes wait on SQLite locks (e.g. while ingest
+        # invalidates tiles), so keep them off the event loop too
+        cache = self.get_cache(layer)
+        cached = await run_in_threadpool(cache.get_tile, z, x, y)
+        if cached is not None:
+            return cached
+
+        tile = await run_in_threadpool(self._render_tile, layer, z, x, y)
+        tile_data = gzip.compress(tile) if tile else b""
+
+        await run_in_threadpool(cache.put_tile, z, x, y, tile_data)
+        return tile_data
+
+    def _render_tile(self, layer: str, z: int, x: int, y: int) -> bytes:
+        """Render a tile with ST_AsMVT via the get_planning_tile RPC."""
+        supabase = get_supabase_client()
+        response = supabase.rpc(
+            "get_planning_tile",
+            {"p_layer": layer, "p_z": z, "p_x": x, "p_y": y},
+        ).execute()
+        return _decode_bytea(response.data)
+
+    def invalidate(self, layer: str, bbox: tuple[float, float, float, float]) -> int:
+        """
+        Drop cached tiles for a layer that intersect a WGS84 bounding box,
+        including those that only draw it inside their tile buffer.
+
+        Returns:
+            Number of cached tiles removed
+        """
+        if layer not in PLANNING_LAYERS:
+            return 0
+        return self.get_cache(layer).invalidate_bbox(bbox, buffer=TILE_BUFFER / TILE_EXTENT)
+
+
+# Singleton instance
+dynamic_tile_service = DynamicTileService()
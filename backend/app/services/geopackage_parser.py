@@ -0,0 +1,292 @@
+"""
+GeoPackage Parser
+Metadata extraction for GeoPackage uploads (runs in the parse pool).
+
+The spooled upload is opened in place through SQLite, read-only and
+immutable (no locking or journal lookups) with memory-mapped I/O. Layer
+statistics come from what the GeoPackage already indexes: feature counts
+from gpkg_ogr_contents when OGR maintained it, extents from gpkg_contents
+checked against the root node of each layer's R*Tree (used instead when
+contents are missing or stale), and attribute schemas from a small sample
+of rows, so large files are described without reading their geometries.
+
+list_layers() reads the catalogue; describe_layers() takes any subset of
+its layers, so a connector can spread the layers across pool workers.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Optional
+from urllib.parse import quote
+
+import numpy as np
+
+MMAP_LIMIT = 1024 * 1024 * 1024
+SAMPLE_SIZE = 100
+
+# R*Tree node cells: rowid then (minx, maxx, miny, maxy), big-endian
+RTREE_CELL = np.dtype([("id", ">i8"), ("bounds", ">f4", 4)])
+
+GEOMETRY_TYPE_NAMES = {
+    "GEOMETRY": "Geometry",
+    "POINT": "Point",
+    "LINESTRING": "LineString",
+    "POLYGON": "Polygon",
+    "MULTIPOINT": "MultiPoint",
+    "MULTILINESTRING": "MultiLineString",
+    "MULTIPOLYGON": "MultiPolygon",
+    "GEOMETRYCOLLECTION": "GeometryCollection",
+}
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _connect(file_path: str) -> sqlite3.Connection:
+    """Open a GeoPackage read-only and immutable, with memory-mapped reads."""
+    conn = sqlite3.connect(f"file:{quote(file_path)}?mode=ro&immutable=1", uri=True)
+    conn.execute(f"PRAGMA mmap_size = {min(os.path.getsize(file_path), MMAP_LIMIT)}")
+    return conn
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def _crs_name(conn: sqlite3.Connection, srs_id: Optional[int]) -> Optional[str]:
+    """CRS of an srs_id as "AUTHORITY:CODE" (None when undefined)."""
+    if srs_id is None or srs_id <= 0:
+        return None
+    row = conn.execute(
+        "SELECT organization, organization_coordsys_id, srs_name FROM gpkg_spatial_ref_sys WHERE srs_id = ?",
+        (srs_id,),
+    ).fetchone()
+    if not row:
+        return None
+    organization, code, name = row
+    if organization and organization.upper() != "NONE" and code is not None:
+        return f"{organization.upper()}:{code}"
+    return name
+
+
+def _rtree_extent(conn: sqlite3.Connection, table: str, column: str) -> Optional[list[float]]:
+    """Layer extent from the root node of its spatial index (None without one)."""
+    node_table = f"rtree_{table}_{column}_node"
+    if not _table_exists(conn, node_table):
+        return None
+    row = conn.execute(f"SELECT data FROM {_quote(node_table)} WHERE nodeno = 1").fetchone()
+    if not row or len(row[0]) < 4:
+        return None
+
+    data = row[0]
+    cell_count = int.from_bytes(data[2:4], "big")
+    if not cell_count:
+        return None  # Empty index
+    cells = np.frombuffer(data, dtype=RTREE_CELL, count=cell_count, offset=4)["bounds"]
+    # float32 bounds are rounded outward, so this contains the data
+    return [
+        float(cells[:, 0].min()), float(cells[:, 2].min()),
+        float(cells[:, 1].max()), float(cells[:, 3].max()),
+    ]
+
+
+def _matches_index(contents: list[float], indexed: list[float]) -> bool:
+    """Whether exact bounds equal index bounds up to the index's float32 rounding."""
+    exact = np.asarray(contents, dtype=np.float64)
+    # Two float32 steps either way: rounding outward plus a rounding by the writer
+    tolerance = 2 * np.spacing(np.abs(exact).astype(np.float32)).astype(np.float64)
+    return bool(np.all(np.abs(np.asarray(indexed, dtype=np.float64) - exact) <= tolerance))
+
+
+def _feature_count(conn: sqlite3.Connection, table: str) -> int:
+    """Row count, from gpkg_ogr_contents when OGR kept it up to date."""
+    if _table_exists(conn, "gpkg_ogr_contents"):
+        row = conn.execute(
+            "SELECT feature_count FROM gpkg_ogr_contents WHERE lower(table_name) = lower(?)", (table,)
+        ).fetchone()
+        if row and row[0] is not None and row[0] >= 0:
+            return row[0]
+    return conn.execute(f"SELECT count(*) FROM {_quote(table)}").fetchone()[0]
+
+
+def _sample_schema(
+    conn: sqlite3.Connection, table: str, geometry_column: Optional[str], sample_size: int
+) -> list[dict]:
+    """Declared columns plus the value types and nulls seen in a sample of rows."""
+    columns = [
+        {"name": name, "type": declared or None, "not_null": bool(not_null), "primary_key": bool(pk)}
+        for _, name, declared, not_null, _, pk in conn.execute(f"PRAGMA table_info({_quote(table)})")
+        if name != geometry_column
+    ]
+    if not columns:
+        return columns
+
+    selected = ", ".join(f"typeof({_quote(column['name'])})" for column in columns)
+    rows = conn.execute(f"SELECT {selected} FROM {_quote(table)} LIMIT ?", (sample_size,)).fetchall()
+    for index, column in enumerate(columns):
+        seen = [row[index] for row in rows]
+        column["sampled_types"] = sorted({kind for kind in seen if kind != "null"})
+        column["sampled_nulls"] = seen.count("null")
+    return columns
+
+
+class GeoPackageParserService:
+    """Service for extracting metadata from GeoPackage files."""
+
+    @staticmethod
+    def list_layers(file_path: str) -> tuple[Optional[str], Optional[list[dict]]]:
+        """
+        Read the layer catalogue (gpkg_contents and geometry columns).
+
+        Returns:
+            Tuple of (error_message, layers); layers is None if invalid
+        """
+        try:
+            conn = _connect(file_path)
+        except (sqlite3.Error, OSError) as e:
+            return f"Error reading GeoPackage: {str(e)}", None
+
+        try:
+            if not _table_exists(conn, "gpkg_contents"):
+                return "Not a GeoPackage (no gpkg_contents table)", None
+
+            geometry_columns = {}
+            if _table_exists(conn, "gpkg_geometry_columns"):
+                geometry_columns = {
+                    table: {"column": column, "type": geometry_type}
+                    for table, column, geometry_type in conn.execute(
+                        "SELECT table_name, column_name, geometry_type_name FROM gpkg_geometry_columns"
+                    )
+                }
+
+            layers = []
+            for row in conn.execute(
+                """
+                SELECT table_name, data_type, identifier, description, srs_id,
+                       min_x, min_y, max_x, max_y
+                FROM gpkg_contents
+                """
+            ):
+                name, data_type, identifier, description, srs_id = row[:5]
+                bounds = row[5:]
+                geometry = geometry_columns.get(name)
+                layers.append({
+                    "name": name,
+                    "type": data_type,
+                    "identifier": identifier,
+                    "description": description,
+                    "srs_id": srs_id,
+                    "crs": _crs_name(conn, srs_id),
+                    "geometry_column": geometry["column"] if geometry else None,
+                    "geometry_type": geometry["type"] if geometry else None,
+                    "contents_extent": list(bounds) if None not in bounds else None,
+                })
+            return None, layers
+        except sqlite3.Error as e:
+            return f"Error reading GeoPackage: {str(e)}", None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def describe_layers(
+        file_path: str, layers: list[dict], sample_size: int = SAMPLE_SIZE
+    ) -> list[dict]:
+        """
+        Feature counts, extents and sampled schemas for layers from list_layers().
+
+        A layer that can't be read gets an "error" entry instead of failing
+        the others.
+        """
+        conn = _connect(file_path)
+        try:
+            described = []
+            for layer in layers:
+                layer = dict(layer)
+                try:
+                    layer["feature_count"] = _feature_count(conn, layer["name"])
+
+                    indexed = None
+                    if layer["geometry_column"]:
+                        indexed = _rtree_extent(conn, layer["name"], layer["geometry_column"])
+                    layer["has_spatial_index"] = indexed is not None
+
+                    # gpkg_contents is exact but optional and may be stale; the
+                    # index is current but float32. Prefer contents only when it
+                    # is the index's extent, i.e. covers exactly the indexed data.
+                    contents = layer["contents_extent"]
+                    if contents and (indexed is None or _matches_index(contents, indexed)):
+                        layer["extent"], layer["extent_source"] = contents, "contents"
+                    elif indexed:
+                        layer["extent"], layer["extent_source"] = indexed, "rtree"
+                    else:
+                        layer["extent"], layer["extent_source"] = None, None
+
+                    if layer["type"] in ("features", "attributes"):
+                        layer["fields"] = _sample_schema(
+                            conn, layer["name"], layer["geometry_column"], sample_size
+                        )
+                except sqlite3.Error as e:
+                    layer["error"] = str(e)
+                described.append(layer)
+            return described
+        finally:
+            conn.close()
+
+    @staticmethod
+    def summarise(filename: str, layers: list[dict], started: Optional[float] = None) -> dict:
+        """Combine described layers into upload metadata (GeoJSON-style totals)."""
+        geometry_types: dict[str, int] = {}
+        for layer in layers:
+            if layer.get("geometry_type") and layer.get("feature_count"):
+                name = GEOMETRY_TYPE_NAMES.get(layer["geometry_type"].upper(), layer["geometry_type"])
+                geometry_types[name] = geometry_types.get(name, 0) + layer["feature_count"]
+
+        spatial = [layer for layer in layers if layer.get("extent")]
+        crs_names = {layer["crs"] for layer in spatial}
+        bbox = None
+        if spatial and len(crs_names) == 1:
+            extents = np.array([layer["extent"] for layer in spatial])
+            bbox = [*extents[:, :2].min(axis=0).tolist(), *extents[:, 2:].max(axis=0).tolist()]
+
+        metadata = {
+            "filename": filename,
+            "file_type": "geopackage",
+            "feature_count": sum(
+                layer.get("feature_count") or 0 for layer in layers if layer["type"] == "features"
+            ),
+            "geometry_types": geometry_types,
+            "bbox": bbox,
+            "crs": crs_names.pop() if len(crs_names) == 1 else None,
+            "layer_count": len(layers),
+            "layers": layers,
+            "geometry_info": {
+                layer["name"]: {"column": layer["geometry_column"], "type": layer["geometry_type"]}
+                for layer in layers if layer["geometry_column"]
+            },
+        }
+        if started is not None:
+            metadata["timings"] = {"total_ms": round((time.perf_counter() - started) * 1000, 2)}
+        return metadata
+
+    @staticmethod
+    def process_geopackage(file_path: str, filename: str) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Describe every layer of a GeoPackage in one call.
+
+        Returns:
+            Tuple of (error_message, metadata); metadata is None if invalid
+        """
+        started = time.perf_counter()
+        error, layers = GeoPackageParserService.list_layers(file_path)
+        if error:
+            return error, None
+        try:
+            layers = GeoPackageParserService.describe_layers(file_path, layers)
+        except (sqlite3.Error, OSError) as e:
+            return f"Error reading GeoPackage: {str(e)}", None
+        return None, GeoPackageParserService.summarise(filename, layers, started)
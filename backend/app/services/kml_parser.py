@@ -0,0 +1,161 @@
+"""
+KML Parser
+Metadata extraction for KML and KMZ uploads (runs in the parse pool).
+
+The document is streamed through the XML parser (see xml_stream), so
+memory stays flat however many placemarks it holds. KMZ documents are parsed straight from
+the zip member stream without being extracted.
+"""
+
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import IO, Optional, Union
+
+import numpy as np
+
+from app.services.xml_stream import StreamHandler, stream_parse
+
+# A placemark is counted under the first of these it contains
+GEOMETRY_PRIORITY = ["Point", "LineString", "Polygon", "MultiGeometry"]
+
+
+class _CoordinateBounds:
+    """
+    Running bounds of <coordinates> values.
+
+    Values are buffered by tuple size ("lon,lat" or "lon,lat,alt") and
+    parsed a batch at a time with numpy, rather than tuple by tuple.
+    """
+
+    def __init__(self, batch_chars: int = 4 * 1024 * 1024):
+        self.batch_chars = batch_chars
+        self.bounds: Optional[np.ndarray] = None
+        self._batches: dict[int, list[str]] = {}
+        self._buffered = 0
+
+    def add(self, text: str):
+        positions = text.split()
+        if not positions:
+            return
+        size = positions[0].count(",") + 1
+        if text.count(",") != len(positions) * (size - 1):
+            # Mixed tuple sizes; keep the lon/lat of each
+            text = " ".join(",".join(position.split(",")[:2]) for position in positions)
+            size = 2
+        self._batches.setdefault(size, []).append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.batch_chars:
+            self.flush()
+
+    def flush(self):
+        for size, texts in self._batches.items():
+            values = np.fromstring(" ".join(texts).replace(",", " "), sep=" ")
+            values = values[:len(values) // size * size].reshape(-1, size)[:, :2]
+            if not len(values):
+                continue
+            extent = np.concatenate([values.min(axis=0), values.max(axis=0)])
+            if self.bounds is not None:
+                extent = np.concatenate([
+                    np.minimum(self.bounds[:2], extent[:2]), np.maximum(self.bounds[2:], extent[2:]),
+                ])
+            self.bounds = extent
+        self._batches = {}
+        self._buffered = 0
+
+
+def _main_document(zf: zipfile.ZipFile) -> Optional[str]:
+    """The KMZ's main document: doc.kml, else the first .kml at the shallowest level."""
+    names = [name for name in zf.namelist() if name.lower().endswith(".kml")]
+    if not names:
+        return None
+    for name in names:
+        if name.lower() == "doc.kml":
+            return name
+    return min(names, key=lambda name: name.count("/"))
+
+
+class _KmlSummary(StreamHandler):
+    """Counts placemarks, folders and geometry types in one pass."""
+
+    def __init__(self):
+        self.placemarks = 0
+        self.folders = 0
+        self.geometry_types: dict[str, int] = {}
+        self.document_name = None
+        self.bounds = _CoordinateBounds()
+        self.seen: Optional[set] = None  # Geometry tags in the open placemark
+
+    def start(self, tag: str, attrib: dict, ancestors: list[str]):
+        if tag == "Placemark":
+            self.seen = set()
+
+    def end(self, tag: str, text: str, ancestors: list[str]):
+        if tag == "Placemark":
+            self.placemarks += 1
+            kind = next((kind for kind in GEOMETRY_PRIORITY if kind in (self.seen or ())), None)
+            if kind:
+                self.geometry_types[kind] = self.geometry_types.get(kind, 0) + 1
+            self.seen = None
+        elif tag == "Folder":
+            self.folders += 1
+        elif tag in GEOMETRY_PRIORITY and self.seen is not None:
+            self.seen.add(tag)
+        elif tag == "coordinates":
+            self.bounds.add(text)
+        elif tag == "name" and self.document_name is None and ancestors and ancestors[-1] == "Document":
+            self.document_name = text.strip() or None
+
+    def result(self) -> dict:
+        self.bounds.flush()
+        return {
+            "document_name": self.document_name,
+            "placemark_count": self.placemarks,
+            "feature_count": self.placemarks,
+            "folder_count": self.folders,
+            "geometry_types": self.geometry_types,
+            "bbox": self.bounds.bounds.tolist() if self.bounds.bounds is not None else None,
+        }
+
+
+def _summarise(source: Union[str, IO[bytes]]) -> dict:
+    handler = _KmlSummary()
+    stream_parse(source, handler)
+    return handler.result()
+
+
+class KmlParserService:
+    """Service for extracting metadata from KML/KMZ files."""
+
+    @staticmethod
+    def process_kml(file_path: str, filename: str) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Summarise a KML or KMZ file (KMZ by extension).
+
+        Returns:
+            Tuple of (error_message, metadata); metadata is None if invalid
+        """
+        started = time.perf_counter()
+        file_type = "kmz" if filename.lower().endswith(".kmz") else "kml"
+        try:
+            if file_type == "kmz":
+                with zipfile.ZipFile(file_path) as zf:
+                    name = _main_document(zf)
+                    if not name:
+                        return "No .kml file found in .kmz archive", None
+                    with zf.open(name) as source:
+                        summary = _summarise(source)
+            else:
+                summary = _summarise(file_path)
+        except ET.ParseError as e:
+            return f"Invalid KML: {str(e)}", None
+        except (zipfile.BadZipFile, OSError) as e:
+            return f"Error reading {file_type.upper()}: {str(e)}", None
+
+        return None, {
+            "filename": filename,
+            "file_type": file_type,
+            **summary,
+            "crs": "EPSG:4326",  # KML coordinates are always WGS84 lon/lat
+            "timings": {"total_ms": round((time.perf_counter() - started) * 1000, 2)},
+        }
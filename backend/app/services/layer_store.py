@@ -0,0 +1,245 @@
+"""
+Layer Store
+Queryable copies of uploaded vector files (GeoJSON, KML, GeoPackage,
+shapefiles, DXF), so features can be read back by bounding box without
+downloading and re-parsing the original upload.
+
+Each layer of an upload is read with geopandas, reprojected to EPSG:4326
+(layers without a CRS, e.g. DXF, keep their drawing coordinates) and
+written as GeoParquet with WKB geometry and a covering bbox column. Rows
+are sorted along a Hilbert curve and written in small row groups, so the
+row-group statistics on the bbox column act as a coarse spatial index:
+bbox reads push the filter down and skip row groups that can't match.
+
+Uploads are stored by content hash (<layer_store_dir>/<sha256>/), next to
+a layers.json manifest. Needs pyarrow, which is optional, and geopandas
+1.0+ (pyogrio reads, bbox-filtered parquet): without them the conversion
+stage is skipped and queries raise LayerStoreUnavailable.
+"""
+
+import os
+import shutil
+import time
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import orjson
+
+from app.core.config import get_settings
+from app.services.tile_store import BACKEND_ROOT
+
+MANIFEST = "layers.json"
+ROW_GROUP_SIZE = 8192
+DEFAULT_LIMIT = 1000
+
+
+class LayerStoreError(Exception):
+    """Raised for unknown layers or unreadable stored data."""
+    pass
+
+
+class LayerStoreUnavailable(LayerStoreError):
+    """Raised when pyarrow or geopandas 1.0+ is not installed."""
+    pass
+
+
+UNAVAILABLE_MESSAGE = "Layer store needs pyarrow and geopandas 1.0 or later"
+
+
+@lru_cache()
+def layer_store_available() -> bool:
+    """Whether GeoParquet can be written and read (pyarrow and geopandas >= 1.0)."""
+    try:
+        import geopandas
+        import pyarrow  # noqa: F401
+        import pyogrio  # noqa: F401
+    except ImportError:
+        return False
+    major = geopandas.__version__.split(".")[0]
+    return major.isdigit() and int(major) >= 1
+
+
+def _ogr_sources(file_path: str, filename: str) -> list[str]:
+    """Paths GDAL can read the upload from (each shapefile in a zip via /vsizip/)."""
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(file_path) as zf:
+            return [
+                f"/vsizip/{file_path}/{name}" for name in zf.namelist()
+                if name.lower().endswith(".shp") and not Path(name).name.startswith("._")
+            ]
+    return [file_path]
+
+
+def _write_layer(gdf, path: Path):
+    """Write a layer as Hilbert-sorted GeoParquet with a covering bbox."""
+    import pyarrow
+
+    if len(gdf):
+        gdf = gdf.iloc[np.argsort(gdf.geometry.hilbert_distance().to_numpy(), kind="stable")]
+    options = dict(index=False, write_covering_bbox=True, row_group_size=ROW_GROUP_SIZE)
+    try:
+        gdf.to_parquet(path, **options)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError, pyarrow.ArrowNotImplementedError):
+        # Mixed-type attribute columns (common in GeoJSON); store them as text
+        columns = [c for c in gdf.columns if c != gdf.geometry.name and gdf[c].dtype == object]
+        gdf = gdf.copy()
+        for column in columns:
+            gdf[column] = gdf[column].map(lambda value: None if value is None else str(value))
+        gdf.to_parquet(path, **options)
+
+
+def convert_upload(
+    store_dir: str, file_path: str, filename: str, key: str
+) -> tuple[Optional[str], Optional[dict]]:
+    """
+    Convert every layer of an upload into the store (runs in the parse pool).
+
+    Returns:
+        Tuple of (error_message, manifest); manifest is None on failure
+    """
+    if not layer_store_available():
+        return UNAVAILABLE_MESSAGE, None
+
+    import geopandas
+
+    started = time.perf_counter()
+    target = Path(store_dir) / key
+    staging = Path(store_dir) / f".{key}.{os.getpid()}.tmp"
+
+    try:
+        staging.mkdir(parents=True, exist_ok=True)
+        sources = [
+            (source, name)
+            for source in _ogr_sources(file_path, filename)
+            for name, geometry_type in geopandas.list_layers(source).itertuples(index=False)
+            if isinstance(geometry_type, str)  # Not an attribute-only table
+        ]
+        layers = []
+        for index, (source, name) in enumerate(sources):
+            gdf = geopandas.read_file(source, layer=name, engine="pyogrio")
+            gdf = gdf[~(gdf.geometry.isna() | gdf.geometry.is_empty)]
+            crs = None
+            if gdf.crs is not None:
+                gdf = gdf.to_crs(4326)
+                crs = "EPSG:4326"
+
+            file = f"{index}.parquet"
+            _write_layer(gdf, staging / file)
+            layers.append({
+                "name": name,
+                "file": file,
+                "feature_count": len(gdf),
+                "geometry_types": {
+                    kind: int(count) for kind, count in gdf.geom_type.value_counts().items()
+                },
+                "columns": [c for c in gdf.columns if c != gdf.geometry.name],
+                "bbox": gdf.total_bounds.tolist() if len(gdf) else None,
+                "crs": crs,
+            })
+
+        manifest = {
+            "key": key,
+            "filename": filename,
+            "layers": layers,
+            "created_at": time.time(),
+            "timings": {"total_ms": round((time.perf_counter() - started) * 1000, 2)},
+        }
+        (staging / MANIFEST).write_bytes(orjson.dumps(manifest))
+
+        try:
+            staging.rename(target)
+        except OSError:
+            pass  # Another worker stored the same content first
+        return None, manifest
+    except Exception as e:
+        return f"Error converting {filename}: {str(e)}", None
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+class LayerStore:
+    """
+    Converted uploads, by content hash.
+
+    Usage:
+        store = get_layer_store()
+        if store.has(sha256):
+            collection = store.query(sha256, bbox=(152.9, -27.6, 153.1, -27.4))
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def has(self, key: str) -> bool:
+        return (self.root / key / MANIFEST).exists()
+
+    def manifest(self, key: str) -> Optional[dict]:
+        """The stored manifest for key, or None."""
+        try:
+            return orjson.loads((self.root / key / MANIFEST).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def query(
+        self,
+        key: str,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        layer: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> dict:
+        """
+        Read features whose bounding box intersects bbox, as a GeoJSON
+        FeatureCollection (each feature names its "layer").
+
+        Raises:
+            LayerStoreUnavailable: pyarrow or geopandas 1.0+ is not installed
+            LayerStoreError: Unknown key or layer
+        """
+        if not layer_store_available():
+            raise LayerStoreUnavailable(UNAVAILABLE_MESSAGE)
+
+        import geopandas
+
+        manifest = self.manifest(key)
+        if manifest is None:
+            raise LayerStoreError(f"No stored layers for {key}")
+        layers = manifest["layers"]
+        if layer is not None:
+            layers = [entry for entry in layers if entry["name"] == layer]
+            if not layers:
+                raise LayerStoreError(f"Unknown layer: {layer}")
+
+        features = []
+        truncated = False
+        for entry in layers:
+            remaining = limit - len(features)
+            if remaining <= 0:
+                truncated = True
+                break
+            gdf = geopandas.read_parquet(self.root / key / entry["file"], bbox=bbox)
+            if len(gdf) > remaining:
+                gdf = gdf.iloc[:remaining]
+                truncated = True
+            gdf = gdf.drop(columns=["bbox"], errors="ignore")
+            for feature in gdf.to_geo_dict(drop_id=True)["features"]:
+                feature["layer"] = entry["name"]
+                features.append(feature)
+
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "crs": layers[0]["crs"] if layers else None,
+            "truncated": truncated,
+        }
+
+
+@lru_cache()
+def get_layer_store() -> LayerStore:
+    """Get the shared layer store configured from settings."""
+    path = Path(get_settings().layer_store_dir)
+    if not path.is_absolute():
+        path = BACKEND_ROOT / path
+    return LayerStore(path)
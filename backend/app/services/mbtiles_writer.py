@@ -0,0 +1,211 @@
+"""
+MBTiles Writer
+Writes generated tiles into an mbtiles file that the tile server can read.
+
+Tiles are stored with the deduplicating map/images schema (as produced by
+tippecanoe): identical tile blobs, such as fully covered ocean or flood
+tiles, are stored once and referenced from the map table. A ``tiles`` view
+keeps the file readable by any mbtiles client.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from app.services.tile_store import flip_y
+
+
+MBTILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS map (
+    zoom_level INTEGER,
+    tile_column INTEGER,
+    tile_row INTEGER,
+    tile_id TEXT,
+    PRIMARY KEY (zoom_level, tile_column, tile_row)
+);
+CREATE TABLE IF NOT EXISTS images (
+    tile_id TEXT PRIMARY KEY,
+    tile_data BLOB
+);
+CREATE VIEW IF NOT EXISTS tiles AS
+    SELECT
+        map.zoom_level AS zoom_level,
+        map.tile_column AS tile_column,
+        map.tile_row AS tile_row,
+        images.tile_data AS tile_data
+    FROM map JOIN images ON images.tile_id = map.tile_id;
+
+-- Source feature fingerprints used for incremental rebuilds
+CREATE TABLE IF NOT EXISTS feature_index (
+    layer TEXT,
+    feature_hash TEXT,
+    min_x REAL,
+    min_y REAL,
+    max_x REAL,
+    max_y REAL,
+    PRIMARY KEY (layer, feature_hash)
+);
+"""
+
+
+class MBTilesWriter:
+    """
+    Transactional mbtiles writer.
+
+    A full build writes to its own temporary file that is atomically moved
+    into place on close. An incremental update (``incremental=True`` on an
+    existing file built by this writer) applies all changes in a single
+    transaction on the live file, switched to WAL so readers keep the
+    previous version until it commits. Either way the tile server never
+    sees a half-written tileset.
+
+    Usage:
+        with MBTilesWriter(path) as writer:
+            writer.put_tile(z, x, y, gzipped_pbf)
+            writer.set_metadata({...})
+    """
+
+    def __init__(self, path: Path, batch_size: int = 1000, incremental: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.incremental = incremental and self.can_update(self.path)
+
+        if self.incremental:
+            self._tmp_path = None
+            self.conn = sqlite3.connect(str(self.path), isolation_level=None, timeout=30)
+            # WAL keeps the tile server reading the last committed snapshot; in
+            # rollback mode a large update spills to the file under an
+            # exclusive lock and readers get "database is locked"
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("BEGIN IMMEDIATE")
+        else:
+            # Unique per build: concurrent builds of the same tileset (e.g. the
+            # same drawing uploaded twice) must not share a temporary file
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+            os.close(fd)
+            self._tmp_path = Path(tmp_path)
+            self.conn = sqlite3.connect(str(self._tmp_path), isolation_level=None)
+            self.conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;")
+            self.conn.executescript(MBTILES_SCHEMA)
+            self.conn.execute("BEGIN")
+
+        self._batch: list[tuple[int, int, int, str, bytes]] = []
+        self._batch_size = batch_size
+        self.tile_count = 0
+        self.deleted_count = 0
+
+    @staticmethod
+    def can_update(path: Path) -> bool:
+        """Check whether an existing file can be updated incrementally."""
+        if not path.exists():
+            return False
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            tables = {
+                row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+        finally:
+            conn.close()
+        return {"map", "images", "metadata", "feature_index"} <= tables
+
+    def put_tile(self, z: int, x: int, y: int, tile_data: bytes):
+        """Queue a tile (XYZ coordinates) for writing."""
+        tile_id = hashlib.md5(tile_data).hexdigest()
+        self._batch.append((z, x, flip_y(y, z), tile_id, tile_data))
+        self.tile_count += 1
+        if len(self._batch) >= self._batch_size:
+            self._flush()
+
+    def delete_tile(self, z: int, x: int, y: int):
+        """Remove a tile (XYZ coordinates), e.g. when it no longer has features."""
+        self._flush()
+        cursor = self.conn.execute(
+            "DELETE FROM map WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            (z, x, flip_y(y, z))
+        )
+        self.deleted_count += cursor.rowcount
+
+    def set_metadata(self, metadata: dict):
+        """Write metadata values; dicts and lists are stored as JSON."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+            [
+                (name, json.dumps(value) if isinstance(value, (dict, list)) else str(value))
+                for name, value in metadata.items()
+            ],
+        )
+
+    def get_metadata(self) -> dict[str, str]:
+        """Read the current metadata values."""
+        return dict(self.conn.execute("SELECT name, value FROM metadata").fetchall())
+
+    def get_feature_index(self, layer: str) -> dict[str, tuple[float, float, float, float]]:
+        """Get stored feature fingerprints and their Web Mercator bounds for a layer."""
+        cursor = self.conn.execute(
+            "SELECT feature_hash, min_x, min_y, max_x, max_y FROM feature_index WHERE layer = ?",
+            (layer,)
+        )
+        return {row[0]: tuple(row[1:]) for row in cursor}
+
+    def update_feature_index(
+        self,
+        layer: str,
+        added: Iterable[tuple[str, tuple[float, float, float, float]]],
+        removed: Iterable[str],
+    ):
+        """Record added and removed feature fingerprints for a layer."""
+        self.conn.executemany(
+            "DELETE FROM feature_index WHERE layer = ? AND feature_hash = ?",
+            [(layer, feature_hash) for feature_hash in removed],
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO feature_index VALUES (?, ?, ?, ?, ?, ?)",
+            [(layer, feature_hash, *bounds) for feature_hash, bounds in added],
+        )
+
+    def _flush(self):
+        if self._batch:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO images (tile_id, tile_data) VALUES (?, ?)",
+                [(tile_id, data) for _, _, _, tile_id, data in self._batch],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO map (zoom_level, tile_column, tile_row, tile_id) VALUES (?, ?, ?, ?)",
+                [(z, x, y, tile_id) for z, x, y, tile_id, _ in self._batch],
+            )
+            self._batch = []
+
+    def close(self):
+        """Commit the changes (and move a full build into place)."""
+        self._flush()
+        # Drop blobs no longer referenced by any tile
+        self.conn.execute(
+            "DELETE FROM images WHERE tile_id NOT IN (SELECT DISTINCT tile_id FROM map)"
+        )
+        self.conn.execute("COMMIT")
+        self.conn.close()
+
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard all changes."""
+        self.conn.execute("ROLLBACK")
+        self.conn.close()
+        if self._tmp_path is not None:
+            self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "MBTilesWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return None
@@ -0,0 +1,446 @@
+"""
+Mapbox Vector Tile Encoder/Decoder
+Pure-Python encoder and decoder for MVT 2.1 protobuf tiles.
+
+Geometries are in integer tile coordinates (0..extent, y down). The
+protobuf wire format is read and written by hand so no generated bindings
+or protobuf runtime are needed.
+
+Spec: https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+"""
+
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, Union
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+from shapely.geometry.polygon import orient
+
+
+DEFAULT_EXTENT = 4096
+
+# Feature geometry types
+GEOM_UNKNOWN = 0
+GEOM_POINT = 1
+GEOM_LINESTRING = 2
+GEOM_POLYGON = 3
+
+# Geometry commands
+CMD_MOVE_TO = 1
+CMD_LINE_TO = 2
+CMD_CLOSE_PATH = 7
+
+# Protobuf wire types
+_WIRE_VARINT = 0
+_WIRE_64BIT = 1
+_WIRE_LENGTH = 2
+_WIRE_32BIT = 5
+
+# Shapely type ids grouped by MVT geometry type
+_SHAPELY_TO_MVT = {
+    0: GEOM_POINT,       # Point
+    1: GEOM_LINESTRING,  # LineString
+    2: GEOM_LINESTRING,  # LinearRing
+    3: GEOM_POLYGON,     # Polygon
+    4: GEOM_POINT,       # MultiPoint
+    5: GEOM_LINESTRING,  # MultiLineString
+    6: GEOM_POLYGON,     # MultiPolygon
+}
+
+
+def _varint(value: int) -> bytes:
+    """Encode an unsigned varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    """Zigzag-encode a signed integer."""
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _key(field, _WIRE_LENGTH) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values: list[int]) -> bytes:
+    return _length_delimited(field, b"".join(_varint(v) for v in values))
+
+
+def _command(cmd: int, count: int) -> int:
+    return (count << 3) | cmd
+
+
+def _encode_value(value: Any) -> bytes:
+    """Encode a property value as a Value message."""
+    if isinstance(value, bool):
+        return _key(7, _WIRE_VARINT) + _varint(int(value))
+    if isinstance(value, int):
+        if value < 0:
+            return _key(6, _WIRE_VARINT) + _varint(_zigzag(value))
+        return _key(5, _WIRE_VARINT) + _varint(value)
+    if isinstance(value, float):
+        return _key(3, _WIRE_64BIT) + np.float64(value).tobytes()
+    encoded = str(value).encode("utf-8")
+    return _length_delimited(1, encoded)
+
+
+def _delta_params(coords: np.ndarray, cursor: list[int]) -> list[int]:
+    """Delta and zigzag encode a run of integer coordinates from the cursor."""
+    deltas = np.diff(coords, axis=0, prepend=[cursor])
+    cursor[0], cursor[1] = int(coords[-1, 0]), int(coords[-1, 1])
+    flat = deltas.ravel()
+    return ((flat << 1) ^ (flat >> 63)).tolist()
+
+
+def _dedupe(coords: np.ndarray) -> np.ndarray:
+    """Drop consecutive duplicate vertices (created by quantization)."""
+    if len(coords) < 2:
+        return coords
+    keep = np.any(np.diff(coords, axis=0) != 0, axis=1)
+    return coords[np.concatenate(([True], keep))]
+
+
+def encode_geometry(geometry: BaseGeometry) -> tuple[int, list[int]]:
+    """
+    Encode a shapely geometry (in tile coordinates) as MVT commands.
+
+    Returns:
+        (geometry type, command integers); the command list is empty if the
+        geometry degenerates at tile resolution
+    """
+    geom_type = _SHAPELY_TO_MVT.get(shapely.get_type_id(geometry), GEOM_UNKNOWN)
+    parts = shapely.get_parts(geometry)
+    cursor = [0, 0]
+    commands: list[int] = []
+
+    if geom_type == GEOM_POINT:
+        coords = np.rint(shapely.get_coordinates(parts)).astype(np.int64)
+        if len(coords):
+            commands.append(_command(CMD_MOVE_TO, len(coords)))
+            commands.extend(_delta_params(coords, cursor))
+
+    elif geom_type == GEOM_LINESTRING:
+        for part in parts:
+            coords = _dedupe(np.rint(shapely.get_coordinates(part)).astype(np.int64))
+            if len(coords) < 2:
+                continue
+            params = _delta_params(coords, cursor)
+            commands.append(_command(CMD_MOVE_TO, 1))
+            commands.extend(params[:2])
+            commands.append(_command(CMD_LINE_TO, len(coords) - 1))
+            commands.extend(params[2:])
+
+    elif geom_type == GEOM_POLYGON:
+        for part in parts:
+            # Exterior rings must have positive area in tile coordinates
+            polygon = orient(part, sign=1.0)
+            rings = [polygon.exterior, *polygon.interiors]
+            for ring_index, ring in enumerate(rings):
+                coords = _dedupe(np.rint(shapely.get_coordinates(ring)).astype(np.int64))[:-1]
+                if len(coords) < 3:
+                    if ring_index == 0:
+                        break  # Degenerate exterior, skip the whole polygon
+                    continue
+                params = _delta_params(coords, cursor)
+                commands.append(_command(CMD_MOVE_TO, 1))
+                commands.extend(params[:2])
+                commands.append(_command(CMD_LINE_TO, len(coords) - 1))
+                commands.extend(params[2:])
+                commands.append(_command(CMD_CLOSE_PATH, 1))
+
+    return geom_type, commands
+
+
+class LayerEncoder:
+    """Accumulates features for one tile layer with deduplicated keys/values."""
+
+    def __init__(self, name: str, extent: int = DEFAULT_EXTENT):
+        self.name = name
+        self.extent = extent
+        self._keys: dict[str, int] = {}
+        self._values: dict[tuple[type, Any], int] = {}
+        self._features: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def _tag(self, key: str, value: Any) -> tuple[int, int]:
+        if isinstance(value, np.generic):
+            value = value.item()
+        key_index = self._keys.setdefault(key, len(self._keys))
+        value_key = (type(value), value)
+        value_index = self._values.setdefault(value_key, len(self._values))
+        return key_index, value_index
+
+    def add_feature(
+        self,
+        geometry: BaseGeometry,
+        properties: Optional[dict] = None,
+        feature_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Add a feature in tile coordinates.
+
+        Returns:
+            False if the geometry was empty at tile resolution and skipped
+        """
+        geom_type, commands = encode_geometry(geometry)
+        if not commands:
+            return False
+
+        tags: list[int] = []
+        for key, value in (properties or {}).items():
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            tags.extend(self._tag(str(key), value))
+
+        feature = bytearray()
+        if feature_id is not None and feature_id >= 0:
+            feature += _key(1, _WIRE_VARINT) + _varint(feature_id)
+        if tags:
+            feature += _packed(2, tags)
+        feature += _key(3, _WIRE_VARINT) + _varint(geom_type)
+        feature += _packed(4, commands)
+
+        self._features.append(bytes(feature))
+        return True
+
+    def encode(self) -> bytes:
+        """Serialize the layer message."""
+        layer = bytearray()
+        layer += _key(15, _WIRE_VARINT) + _varint(2)
+        layer += _length_delimited(1, self.name.encode("utf-8"))
+        for feature in self._features:
+            layer += _length_delimited(2, feature)
+        for key in self._keys:
+            layer += _length_delimited(3, key.encode("utf-8"))
+        for _, value in self._values:
+            layer += _length_delimited(4, _encode_value(value))
+        layer += _key(5, _WIRE_VARINT) + _varint(self.extent)
+        return bytes(layer)
+
+
+def encode_tile(layers: list[LayerEncoder]) -> bytes:
+    """Serialize layers into a tile; empty layers are omitted."""
+    return b"".join(
+        _length_delimited(3, layer.encode()) for layer in layers if len(layer)
+    )
+
+
+# =============================================================================
+# DECODING
+# =============================================================================
+
+@dataclass
+class DecodedLayer:
+    """A decoded tile layer with geometries in tile coordinates."""
+    name: str
+    extent: int = DEFAULT_EXTENT
+    geometries: list[BaseGeometry] = field(default_factory=list)
+    properties: list[dict] = field(default_factory=list)
+    ids: list[Optional[int]] = field(default_factory=list)
+
+
+def _read_varint(data: memoryview, pos: int) -> tuple[int, int]:
+    """Read an unsigned varint, returning (value, new position)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _iter_fields(data: memoryview) -> Iterator[tuple[int, Union[int, memoryview]]]:
+    """Iterate (field number, value) pairs of a protobuf message."""
+    pos = 0
+    end = len(data)
+    while pos < end:
+        key, pos = _read_varint(data, pos)
+        number, wire_type = key >> 3, key & 0x07
+        if wire_type == _WIRE_VARINT:
+            value, pos = _read_varint(data, pos)
+        elif wire_type == _WIRE_LENGTH:
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        elif wire_type == _WIRE_64BIT:
+            value = data[pos:pos + 8]
+            pos += 8
+        elif wire_type == _WIRE_32BIT:
+            value = data[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        yield number, value
+
+
+def _read_packed(data: memoryview) -> list[int]:
+    values = []
+    pos = 0
+    while pos < len(data):
+        value, pos = _read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_value(data: memoryview) -> Any:
+    """Decode a Value message."""
+    for number, value in _iter_fields(data):
+        if number == 1:
+            return bytes(value).decode("utf-8")
+        if number == 2:
+            return struct.unpack("<f", value)[0]
+        if number == 3:
+            return struct.unpack("<d", value)[0]
+        if number == 4:
+            return value - (1 << 64) if value >= (1 << 63) else value
+        if number == 5:
+            return value
+        if number == 6:
+            return _unzigzag(value)
+        if number == 7:
+            return bool(value)
+    return None
+
+
+def _ring_area(coords: list[tuple[int, int]]) -> float:
+    """Signed shoelace area; positive for exterior rings in tile coordinates."""
+    area = 0
+    for (x0, y0), (x1, y1) in zip(coords, coords[1:] + coords[:1]):
+        area += x0 * y1 - x1 * y0
+    return area / 2
+
+
+def decode_geometry(geom_type: int, commands: list[int]) -> Optional[BaseGeometry]:
+    """Decode MVT geometry commands into a shapely geometry (tile coordinates)."""
+    x = y = 0
+    paths: list[list[tuple[int, int]]] = []
+    closed: list[bool] = []
+    i = 0
+
+    while i < len(commands):
+        cmd, count = commands[i] & 0x07, commands[i] >> 3
+        i += 1
+        if cmd == CMD_CLOSE_PATH:
+            if closed:
+                closed[-1] = True
+            continue
+        for _ in range(count):
+            x += _unzigzag(commands[i])
+            y += _unzigzag(commands[i + 1])
+            i += 2
+            if cmd == CMD_MOVE_TO:
+                paths.append([(x, y)])
+                closed.append(False)
+            else:
+                paths[-1].append((x, y))
+
+    if not paths:
+        return None
+
+    if geom_type == GEOM_POINT:
+        points = [p for path in paths for p in path]
+        return shapely.points(points[0]) if len(points) == 1 else shapely.multipoints(points)
+
+    if geom_type == GEOM_LINESTRING:
+        lines = [shapely.linestrings(path) for path in paths if len(path) >= 2]
+        if not lines:
+            return None
+        return lines[0] if len(lines) == 1 else shapely.multilinestrings(lines)
+
+    if geom_type == GEOM_POLYGON:
+        # Exterior rings have positive area; following negative rings are holes
+        polygons: list[list[list[tuple[int, int]]]] = []
+        for ring in paths:
+            if len(ring) < 3:
+                continue
+            area = _ring_area(ring)
+            if area > 0 or not polygons:
+                polygons.append([ring])
+            elif area < 0:
+                polygons[-1].append(ring)
+        shapes = [shapely.Polygon(rings[0], rings[1:]) for rings in polygons]
+        if not shapes:
+            return None
+        return shapes[0] if len(shapes) == 1 else shapely.MultiPolygon(shapes)
+
+    return None
+
+
+def _decode_layer(data: memoryview) -> DecodedLayer:
+    name = ""
+    extent = DEFAULT_EXTENT
+    keys: list[str] = []
+    values: list[Any] = []
+    raw_features: list[memoryview] = []
+
+    for number, value in _iter_fields(data):
+        if number == 1:
+            name = bytes(value).decode("utf-8")
+        elif number == 2:
+            raw_features.append(value)
+        elif number == 3:
+            keys.append(bytes(value).decode("utf-8"))
+        elif number == 4:
+            values.append(_decode_value(value))
+        elif number == 5:
+            extent = value
+
+    layer = DecodedLayer(name=name, extent=extent)
+    for raw in raw_features:
+        feature_id = None
+        tags: list[int] = []
+        geom_type = GEOM_UNKNOWN
+        commands: list[int] = []
+        for number, value in _iter_fields(raw):
+            if number == 1:
+                feature_id = value
+            elif number == 2:
+                tags = _read_packed(value)
+            elif number == 3:
+                geom_type = value
+            elif number == 4:
+                commands = _read_packed(value)
+
+        geometry = decode_geometry(geom_type, commands)
+        if geometry is None:
+            continue
+        layer.geometries.append(geometry)
+        layer.properties.append({keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])})
+        layer.ids.append(feature_id)
+
+    return layer
+
+
+def decode_tile(data: Union[bytes, memoryview]) -> dict[str, DecodedLayer]:
+    """
+    Decode an (uncompressed) MVT tile.
+
+    Returns:
+        Layers keyed by name
+    """
+    layers = {}
+    for number, value in _iter_fields(memoryview(data)):
+        if number == 3:
+            layer = _decode_layer(value)
+            layers[layer.name] = layer
+    return layers
@@ -0,0 +1,197 @@
+"""
+Parse Pool
+Process pool for CPU-heavy file parsing (DXF and other connector formats),
+so large drawings are parsed on other cores while the API keeps serving.
+
+The pool admits a bounded number of jobs (running plus queued) and rejects
+the rest with ParsePoolBusy. Jobs queue here, not in the executor: one is
+submitted only when a worker is free, so its timeout covers execution
+alone, and a job that waits too long for a worker gets ParsePoolBusy
+without disturbing the others. Each worker has an address-space limit so a
+runaway parse fails with MemoryError instead of taking down the host. A
+timed-out job can't be interrupted inside a worker, so the pool is
+recycled: its processes are terminated and jobs that were running
+alongside it are retried once on the fresh pool.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from app.core.config import get_settings
+
+
+class ParsePoolError(Exception):
+    """Base error for parse pool failures."""
+    pass
+
+
+class ParsePoolBusy(ParsePoolError):
+    """Raised when the parse queue is full."""
+    pass
+
+
+class ParseTimeout(ParsePoolError):
+    """Raised when a parse job exceeds its timeout."""
+    pass
+
+
+class ParseMemoryError(ParsePoolError):
+    """Raised when a parse job exceeds the worker memory limit."""
+    pass
+
+
+def _init_worker(memory_limit_mb: int):
+    """Apply the address-space limit in each worker process."""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass  # Not supported on this platform
+
+
+class ParsePool:
+    """
+    Bounded process pool for parse jobs.
+
+    Usage:
+        error, metadata = await get_parse_pool().run(DxfParserService.process_dxf, file_path, filename)
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: int = 8,
+        timeout: float = 120.0,
+        memory_limit_mb: int = 2048,
+        queue_timeout: float = 60.0,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.memory_limit_mb,),
+            )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        """Free worker slots, for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.workers)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _start(self, fn: Callable[..., Any], *args) -> tuple[ProcessPoolExecutor, asyncio.Future]:
+        """
+        Wait for a free worker, then submit the job to it.
+
+        Raises:
+            ParsePoolBusy: No worker came free within the queue timeout
+        """
+        slots = self._get_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ParsePoolBusy(
+                f"Parser is busy (no worker free after {self.queue_timeout:.0f}s), please retry shortly"
+            )
+
+        loop = asyncio.get_running_loop()
+        try:
+            executor = self._get_executor()
+            job = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The worker stays busy until the job ends, even if the caller stops waiting
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(slots.release))
+        return executor, asyncio.wrap_future(job)
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Terminate a pool whose worker is stuck and start fresh on next use."""
+        if self._executor is not executor:
+            return  # Already recycled by another job
+        self._executor = None
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def pending(self) -> int:
+        """Jobs running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run a picklable function in the pool.
+
+        Cancelling the awaiting task drops a job that hasn't started; one that
+        is already running finishes in the background.
+
+        Raises:
+            ParsePoolBusy: The queue is full, or no worker came free in time
+            ParseTimeout: The job ran longer than the timeout
+            ParseMemoryError: The job hit the worker memory limit
+        """
+        if self._pending >= self.workers + self.max_queue:
+            raise ParsePoolBusy("Parser is busy, please retry shortly")
+
+        self._pending += 1
+        try:
+            for attempt in range(2):
+                executor, future = await self._start(fn, *args)
+                try:
+                    return await asyncio.wait_for(future, timeout or self.timeout)
+                except asyncio.TimeoutError:
+                    self._recycle(executor)
+                    raise ParseTimeout(f"Parsing took longer than {timeout or self.timeout:.0f}s")
+                except MemoryError:
+                    raise ParseMemoryError(
+                        f"Parsing needed more than {self.memory_limit_mb} MB of memory"
+                    )
+                except BrokenProcessPool:
+                    # A worker died (recycled for another job or crashed)
+                    self._recycle(executor)
+                    if attempt:
+                        raise ParsePoolError("Parser worker crashed")
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache()
+def get_parse_pool() -> ParsePool:
+    """Get the shared parse pool configured from settings."""
+    settings = get_settings()
+    return ParsePool(
+        workers=settings.parse_workers or None,
+        max_queue=settings.parse_queue_size,
+        timeout=settings.parse_timeout_seconds,
+        memory_limit_mb=settings.parse_memory_limit_mb,
+        queue_timeout=settings.parse_queue_timeout_seconds,
+    )
@@ -7,6 +7,9 @@ import httpx
 from typing import Optional
 from datetime import datetime
 import json
+import re
+
+from fastapi.concurrency import run_in_threadpool
 
 from app.schemas.planning import (
     AustralianState,
@@ -30,6 +33,7 @@ from app.schemas.planning import (
     PropertyAnalysis,
     PropertyAnalysisBrief,
 )
+from app.services.tile_query import tile_query_service
 
 
 class PlanningService:
@@ -45,6 +49,18 @@ class PlanningService:
     QLD_MSES_LAYER = "Environment/MattersOfStateEnvironmentalSignificance/MapServer/0"
     QLD_KOALA_LAYER = "Environment/KoalaPlan/MapServer/0"
 
+    # Local Brisbane flood tileset (scripts/build_flood_tiles.py)
+    BRISBANE_FLOOD_TILESET = "flood"
+    BRISBANE_FLOOD_LAYERS = {
+        "flood_overall": "Flood Risk (Overall)",
+        "flood_river": "Brisbane River Flood Awareness",
+        "flood_creek": "Creek Flood Awareness",
+        "flood_overland": "Overland Flow Flood Awareness",
+        "flood_historic_2022": "Historic Flood Extent (Feb 2022)",
+        "flood_historic_2011": "Historic Flood Extent (Jan 2011)",
+        "flood_historic_1974": "Historic Flood Extent (Jan 1974)",
+    }
+
     # NSW ePlanning API endpoints
     NSW_PLANNING_API = "https://mapprod3.environment.nsw.gov.au/arcgis/rest/services"
     NSW_ZONING_LAYER = "ePlanning/Planning_Portal_Principal_Planning/MapServer/19"
@@ -705,10 +721,14 @@ class PlanningService:
                 )
 
         elif state == AustralianState.QLD:
+            # Brisbane flood awareness tiles answer locally when they cover the point
+            local_flood = await self._get_local_flood_overlays(geometry["x"], geometry["y"])
+            hazards.extend(local_flood)
+
             # Query QLD flood - FloodCheck service
-            flood_features = await self._query_arcgis(
+            flood_features = [] if local_flood else await self._query_arcgis(
                 self.QLD_PLANNING_API,
-                "FloodCheck/FloodStudies/MapServer/0",
+                self.QLD_FLOOD_LAYER,
                 geometry,
                 out_fields="*",
             )
@@ -784,6 +804,84 @@ class PlanningService:
 
         return hazards
 
+    async def _get_local_flood_overlays(self, lon: float, lat: float) -> list[HazardOverlay]:
+        """
+        Get Brisbane flood overlays from the local flood tileset.
+
+        Returns an empty list when the tileset is missing, doesn't cover the
+        point or has no flood feature there (callers then fall back to the
+        QLD FloodCheck service).
+        """
+        try:
+            if not tile_query_service.covers(self.BRISBANE_FLOOD_TILESET, lon, lat):
+                return []
+            features = await run_in_threadpool(
+                tile_query_service.query_point,
+                self.BRISBANE_FLOOD_TILESET,
+                lon,
+                lat,
+                list(self.BRISBANE_FLOOD_LAYERS),
+            )
+        except Exception as e:
+            print(f"Error querying local flood tiles: {e}")
+            return []
+
+        # Keep the most severe feature per layer (flood risk polygons overlap)
+        severity = list(HazardLevel)
+        worst: dict[str, tuple[Optional[str], HazardLevel]] = {}
+        for feature in features or []:
+            category = self._flood_risk_category(feature["properties"])
+            level = self._flood_risk_level(category)
+            current = worst.get(feature["layer"])
+            if current is None or severity.index(level) > severity.index(current[1]):
+                worst[feature["layer"]] = (category, level)
+
+        hazards = []
+        for layer, (category, level) in worst.items():
+            historic = layer.startswith("flood_historic")
+            hazards.append(
+                HazardOverlay(
+                    hazard_type=HazardType.FLOOD,
+                    category=category,
+                    level=level,
+                    name=self.BRISBANE_FLOOD_LAYERS[layer],
+                    description=(
+                        "Property was inside a recorded historic flood extent"
+                        if historic
+                        else "Property is within a Brisbane City Council flood awareness area"
+                    ),
+                    planning_implications=[
+                        "Flood overlay code in City Plan 2014 likely applies",
+                        "Minimum habitable floor level requirements may apply",
+                        "Flood impact assessment may be required for development",
+                    ],
+                    required_assessments=["Flood Impact Assessment"],
+                    source="Brisbane City Council Flood Awareness",
+                )
+            )
+
+        return hazards
+
+    def _flood_risk_category(self, properties: dict) -> Optional[str]:
+        """Pick the flood risk/likelihood attribute from a flood feature."""
+        for key, value in properties.items():
+            lowered = key.lower()
+            if isinstance(value, str) and ("risk" in lowered or "likelihood" in lowered):
+                return value
+        return None
+
+    def _flood_risk_level(self, category: Optional[str]) -> HazardLevel:
+        """Map a flood risk category to a hazard level."""
+        # Whole words only: "Overland flow - high" is not low
+        words = set(re.findall(r"[a-z]+", (category or "").lower()))
+        if "extreme" in words:
+            return HazardLevel.EXTREME
+        if "high" in words:
+            return HazardLevel.HIGH
+        if "low" in words:
+            return HazardLevel.LOW
+        return HazardLevel.MEDIUM
+
     async def _get_environmental_overlays(
         self, geometry: dict, state: AustralianState
     ) -> list[EnvironmentalOverlay]:
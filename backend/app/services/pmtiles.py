@@ -0,0 +1,328 @@
+"""
+PMTiles v3 Reader
+Reads tiles from single-file PMTiles archives using memory-mapped range reads.
+
+A PMTiles archive is a fixed 127-byte header followed by a root directory,
+JSON metadata, leaf directories and tile data. Tiles are addressed by a
+Hilbert-curve tile id, and directories are run-length encoded so a lookup is
+a binary search over at most three directory levels. No SQLite is involved.
+
+Spec: https://github.com/protomaps/PMTiles/blob/main/spec/v3/spec.md
+"""
+
+import gzip
+import json
+import mmap
+import struct
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+HEADER_SIZE = 127
+MAGIC = b"PMTiles"
+
+# Compression identifiers
+COMPRESSION_UNKNOWN = 0
+COMPRESSION_NONE = 1
+COMPRESSION_GZIP = 2
+COMPRESSION_BROTLI = 3
+COMPRESSION_ZSTD = 4
+
+# Tile type identifiers
+TILE_TYPE_FORMATS = {
+    1: "pbf",
+    2: "png",
+    3: "jpg",
+    4: "webp",
+    5: "avif",
+}
+
+# Header layout after the 7-byte magic (little endian)
+_HEADER_STRUCT = struct.Struct("<B11Q6B4iB2i")
+
+# Maximum directory nesting (root + leaves)
+MAX_DIRECTORY_DEPTH = 4
+
+
+@dataclass(frozen=True)
+class PMTilesHeader:
+    """Decoded PMTiles v3 header."""
+    version: int
+    root_offset: int
+    root_length: int
+    metadata_offset: int
+    metadata_length: int
+    leaf_directory_offset: int
+    leaf_directory_length: int
+    tile_data_offset: int
+    tile_data_length: int
+    addressed_tiles_count: int
+    tile_entries_count: int
+    tile_contents_count: int
+    clustered: bool
+    internal_compression: int
+    tile_compression: int
+    tile_type: int
+    min_zoom: int
+    max_zoom: int
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+    center_zoom: int
+    center_lon: float
+    center_lat: float
+
+
+@dataclass(frozen=True)
+class DirectoryEntry:
+    """A run-length encoded directory entry."""
+    tile_id: int
+    offset: int
+    length: int
+    run_length: int
+
+
+def parse_header(data: bytes) -> PMTilesHeader:
+    """Parse the fixed-size PMTiles header."""
+    if len(data) < HEADER_SIZE or data[:7] != MAGIC:
+        raise ValueError("Not a PMTiles archive")
+
+    fields = _HEADER_STRUCT.unpack_from(data, 7)
+    if fields[0] != 3:
+        raise ValueError(f"Unsupported PMTiles version: {fields[0]}")
+
+    return PMTilesHeader(
+        version=fields[0],
+        root_offset=fields[1],
+        root_length=fields[2],
+        metadata_offset=fields[3],
+        metadata_length=fields[4],
+        leaf_directory_offset=fields[5],
+        leaf_directory_length=fields[6],
+        tile_data_offset=fields[7],
+        tile_data_length=fields[8],
+        addressed_tiles_count=fields[9],
+        tile_entries_count=fields[10],
+        tile_contents_count=fields[11],
+        clustered=fields[12] == 1,
+        internal_compression=fields[13],
+        tile_compression=fields[14],
+        tile_type=fields[15],
+        min_zoom=fields[16],
+        max_zoom=fields[17],
+        min_lon=fields[18] / 10_000_000,
+        min_lat=fields[19] / 10_000_000,
+        max_lon=fields[20] / 10_000_000,
+        max_lat=fields[21] / 10_000_000,
+        center_zoom=fields[22],
+        center_lon=fields[23] / 10_000_000,
+        center_lat=fields[24] / 10_000_000,
+    )
+
+
+def zxy_to_tile_id(z: int, x: int, y: int) -> int:
+    """
+    Convert XYZ tile coordinates to a PMTiles tile id.
+
+    Tile ids count all tiles of lower zoom levels, then walk the Hilbert
+    curve within the zoom level.
+    """
+    if z > 31:
+        raise ValueError("Zoom level exceeds 31")
+    n = 1 << z
+    if x < 0 or y < 0 or x >= n or y >= n:
+        raise ValueError(f"Tile {z}/{x}/{y} is out of range")
+
+    tile_id = ((1 << (2 * z)) - 1) // 3
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        tile_id += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve stays continuous
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - (x & (s - 1))
+                y = s - 1 - (y & (s - 1))
+            x, y = y, x
+        s >>= 1
+    return tile_id
+
+
+def _read_varint(buf: bytes, pos: int) -> tuple[int, int]:
+    """Read an unsigned LEB128 varint, returning (value, new position)."""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def deserialize_directory(buf: bytes) -> list[DirectoryEntry]:
+    """Decode a (decompressed) PMTiles directory into entries."""
+    num_entries, pos = _read_varint(buf, 0)
+
+    tile_ids = [0] * num_entries
+    last_id = 0
+    for i in range(num_entries):
+        delta, pos = _read_varint(buf, pos)
+        last_id += delta
+        tile_ids[i] = last_id
+
+    run_lengths = [0] * num_entries
+    for i in range(num_entries):
+        run_lengths[i], pos = _read_varint(buf, pos)
+
+    lengths = [0] * num_entries
+    for i in range(num_entries):
+        lengths[i], pos = _read_varint(buf, pos)
+
+    offsets = [0] * num_entries
+    for i in range(num_entries):
+        value, pos = _read_varint(buf, pos)
+        if value == 0 and i > 0:
+            # Contiguous with the previous entry
+            offsets[i] = offsets[i - 1] + lengths[i - 1]
+        else:
+            offsets[i] = value - 1
+
+    return [
+        DirectoryEntry(tile_ids[i], offsets[i], lengths[i], run_lengths[i])
+        for i in range(num_entries)
+    ]
+
+
+def find_entry(entries: list[DirectoryEntry], tile_id: int) -> Optional[DirectoryEntry]:
+    """Binary search a directory for the entry covering a tile id."""
+    lo, hi = 0, len(entries) - 1
+    while lo <= hi:
+        mid = (lo + hi) >> 1
+        diff = tile_id - entries[mid].tile_id
+        if diff > 0:
+            lo = mid + 1
+        elif diff < 0:
+            hi = mid - 1
+        else:
+            return entries[mid]
+
+    # hi is now the last entry with tile_id < requested id
+    if hi >= 0:
+        entry = entries[hi]
+        if entry.run_length == 0:
+            # Leaf directory pointer
+            return entry
+        if tile_id - entry.tile_id < entry.run_length:
+            return entry
+    return None
+
+
+class PMTilesReader:
+    """
+    Memory-mapped reader for a PMTiles v3 archive.
+
+    Tile payloads are returned as ``memoryview`` slices of the mapping, so no
+    bytes are copied until the response is written to the socket.
+    """
+
+    def __init__(self, path: Path, directory_cache_size: int = 256):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self.header = parse_header(self._mmap[:HEADER_SIZE])
+
+        self._directory_cache: OrderedDict[tuple[int, int], list[DirectoryEntry]] = OrderedDict()
+        self._directory_cache_size = directory_cache_size
+        self._metadata: Optional[dict] = None
+
+    def close(self):
+        """Release the memory mapping and file handle."""
+        self._directory_cache.clear()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _decompress(self, data: bytes, compression: int) -> bytes:
+        """Decompress an internal section (directories/metadata)."""
+        if compression in (COMPRESSION_NONE, COMPRESSION_UNKNOWN):
+            return data
+        if compression == COMPRESSION_GZIP:
+            return gzip.decompress(data)
+        raise ValueError(f"Unsupported PMTiles internal compression: {compression}")
+
+    def _get_directory(self, offset: int, length: int) -> list[DirectoryEntry]:
+        """Read and decode a directory, caching the most recently used ones."""
+        key = (offset, length)
+        entries = self._directory_cache.get(key)
+        if entries is not None:
+            self._directory_cache.move_to_end(key)
+            return entries
+
+        raw = self._decompress(
+            self._mmap[offset:offset + length],
+            self.header.internal_compression,
+        )
+        entries = deserialize_directory(raw)
+
+        self._directory_cache[key] = entries
+        if len(self._directory_cache) > self._directory_cache_size:
+            self._directory_cache.popitem(last=False)
+        return entries
+
+    def get_tile(self, z: int, x: int, y: int) -> Optional[memoryview]:
+        """
+        Get the raw (possibly compressed) tile payload for XYZ coordinates.
+
+        Returns:
+            A memoryview into the archive, or None if the tile does not exist
+        """
+        header = self.header
+        if z < header.min_zoom or z > header.max_zoom:
+            return None
+
+        try:
+            tile_id = zxy_to_tile_id(z, x, y)
+        except ValueError:
+            return None
+
+        offset, length = header.root_offset, header.root_length
+        for _ in range(MAX_DIRECTORY_DEPTH):
+            entry = find_entry(self._get_directory(offset, length), tile_id)
+            if entry is None:
+                return None
+
+            if entry.run_length > 0:
+                start = header.tile_data_offset + entry.offset
+                return self._view[start:start + entry.length]
+
+            # Descend into the leaf directory
+            offset = header.leaf_directory_offset + entry.offset
+            length = entry.length
+
+        return None
+
+    def get_metadata(self) -> dict:
+        """Get the archive's JSON metadata."""
+        if self._metadata is None:
+            header = self.header
+            if header.metadata_length == 0:
+                self._metadata = {}
+            else:
+                raw = self._decompress(
+                    self._mmap[header.metadata_offset:header.metadata_offset + header.metadata_length],
+                    header.internal_compression,
+                )
+                self._metadata = json.loads(raw)
+        return self._metadata
+
+    @property
+    def tile_format(self) -> str:
+        """Tile format name (e.g., "pbf")."""
+        return TILE_TYPE_FORMATS.get(self.header.tile_type, "unknown")
@@ -4,12 +4,16 @@ Provides property sales data and market analysis.
 """
 
 import httpx
+import sqlite3
 from datetime import date, timedelta
 from typing import Optional
 import random
 import math
 from statistics import median, mean
 
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
 from app.schemas.property_sales import (
     PropertySale,
     SalesSearchRequest,
@@ -21,6 +25,7 @@ from app.schemas.property_sales import (
     PropertyType,
     SaleType,
 )
+from app.services.sales_store import get_sales_store
 
 
 class PropertySalesService:
@@ -42,8 +47,24 @@ class PropertySalesService:
     async def search_sales(self, request: SalesSearchRequest) -> SalesSearchResponse:
         """
         Search for property sales.
-        Falls back to mock data if API is unavailable.
+        Served from the local NSW VG sales store when it has been loaded
+        (see sales_store); falls back to mock data if API is unavailable.
         """
+        store = get_sales_store()
+        if store.available():
+            try:
+                matches = await run_in_threadpool(store.search, request)
+            except sqlite3.Error as e:
+                print(f"Sales store error: {e}")
+                matches = None
+            if matches is not None:
+                page = matches[request.offset:request.offset + request.limit]
+                return SalesSearchResponse(
+                    total=len(matches),
+                    sales=[sale.to_property_sale() for sale in page],
+                    stats=self._calculate_stats(matches),
+                )
+
         # Try NSW Valuer General API first
         if self._api_token and request.lat and request.lon:
             try:
@@ -230,7 +251,7 @@ class PropertySalesService:
         return 750000  # Default
 
     def _calculate_stats(self, sales: list[PropertySale]) -> SalesStatistics:
-        """Calculate sales statistics."""
+        """Calculate sales statistics (from PropertySales or the sales store's StoredSales)."""
         if not sales:
             return SalesStatistics(
                 total_sales=0,
@@ -310,31 +331,7 @@ class PropertySalesService:
 
         response = await self.search_sales(search_req)
 
-        # Score and sort by similarity
-        comparables = []
-        for sale in response.sales:
-            score = self._calculate_similarity(request, sale)
-            distance = self._calculate_distance(
-                request.lat, request.lon, sale.lat or 0, sale.lon or 0
-            )
-            days_since = (date.today() - sale.contract_date).days
-
-            # Time adjustment (assume 5% annual growth)
-            time_factor = 1 + (days_since / 365) * 0.05
-            time_adjusted = int(sale.sale_price * time_factor)
-
-            comparable = ComparableSale(
-                **sale.model_dump(),
-                similarity_score=score,
-                distance_m=distance,
-                days_since_sale=days_since,
-                time_adjusted_price=time_adjusted,
-            )
-            comparables.append(comparable)
-
-        # Sort by similarity
-        comparables.sort(key=lambda x: x.similarity_score, reverse=True)
-        comparables = comparables[:request.limit]
+        comparables = self._rank_comparables(request, response.sales, request.limit)
 
         # Estimate value from comparables
         if comparables:
@@ -362,55 +359,99 @@ class PropertySalesService:
             market_stats=response.stats,
         )
 
-    def _calculate_similarity(
-        self, request: ComparableSalesRequest, sale: PropertySale
-    ) -> float:
-        """Calculate similarity score between target and sale."""
-        score = 1.0
+    def _rank_comparables(
+        self, request: ComparableSalesRequest, sales: list[PropertySale], limit: int
+    ) -> list[ComparableSale]:
+        """
+        Score sales against the target and return the best `limit`, most
+        similar first (ties keep search order).
+
+        Scoring runs over column arrays in one NumPy pass; only the
+        returned sales are built into ComparableSale models.
+        """
+        if not sales or limit <= 0:
+            return []
+
+        today = date.today()
+        scores, distances, days_since = self._score_sales(request, sales, today)
+        prices = np.fromiter((sale.sale_price for sale in sales), dtype=float, count=len(sales))
+        # Time adjustment (assume 5% annual growth)
+        time_adjusted = prices * (1 + days_since / 365 * 0.05)
+
+        top = np.arange(len(sales))
+        if limit < len(sales):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            # argpartition splits ties at the cut arbitrarily; keep the earliest tied sales
+            cut = scores[top].min()
+            above = np.flatnonzero(scores > cut)
+            top = np.concatenate([above, np.flatnonzero(scores == cut)[:limit - len(above)]])
+        top = top[np.lexsort((top, -scores[top]))]
+
+        return [
+            ComparableSale(
+                **sales[i].model_dump(),
+                similarity_score=float(scores[i]),
+                distance_m=float(distances[i]),
+                days_since_sale=int(days_since[i]),
+                time_adjusted_price=int(time_adjusted[i]),
+            )
+            for i in top.tolist()
+        ]
+
+    def _score_sales(
+        self, request: ComparableSalesRequest, sales: list[PropertySale], today: date
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Similarity scores (0-1), distances from the target (m) and days
+        since sale for each sale.
+        """
+        count = len(sales)
+        lat = np.fromiter((sale.lat or 0.0 for sale in sales), dtype=float, count=count)
+        lon = np.fromiter((sale.lon or 0.0 for sale in sales), dtype=float, count=count)
+        land_area = np.fromiter((sale.land_area_sqm or 0.0 for sale in sales), dtype=float, count=count)
+        contract_dates = np.array([sale.contract_date for sale in sales], dtype="datetime64[D]")
+
+        distances = self._haversine(request.lat, request.lon, lat, lon)
+        days_since = (np.datetime64(today, "D") - contract_dates).astype(np.int64)
+        scores = np.ones(count)
 
         # Property type match
-        if request.property_type and sale.property_type != request.property_type:
-            score *= 0.7
+        if request.property_type:
+            mismatched = np.fromiter(
+                (sale.property_type != request.property_type for sale in sales), dtype=bool, count=count
+            )
+            scores[mismatched] *= 0.7
 
         # Land area similarity
-        if request.land_area_sqm and sale.land_area_sqm:
-            size_diff = abs(request.land_area_sqm - sale.land_area_sqm)
-            size_ratio = size_diff / request.land_area_sqm
-            score *= max(0.5, 1 - size_ratio)
-
-        # Distance penalty
-        if sale.lat and sale.lon:
-            distance = self._calculate_distance(
-                request.lat, request.lon, sale.lat, sale.lon
-            )
-            # Reduce score for farther properties
-            distance_factor = max(0.5, 1 - (distance / request.radius_m) * 0.5)
-            score *= distance_factor
+        if request.land_area_sqm:
+            size_ratio = np.abs(request.land_area_sqm - land_area) / request.land_area_sqm
+            scores *= np.where(land_area != 0, np.maximum(0.5, 1 - size_ratio), 1.0)
+
+        # Distance penalty (sales without a location aren't penalised)
+        located = (lat != 0) & (lon != 0)
+        distance_factor = np.maximum(0.5, 1 - (distances / request.radius_m) * 0.5)
+        scores *= np.where(located, distance_factor, 1.0)
 
         # Recency bonus
-        days_ago = (date.today() - sale.contract_date).days
-        if days_ago < 90:
-            score *= 1.1
-        elif days_ago > 365:
-            score *= 0.9
-
-        return min(1.0, max(0.0, score))
-
-    def _calculate_distance(
-        self, lat1: float, lon1: float, lat2: float, lon2: float
-    ) -> float:
-        """Calculate distance between two points in meters."""
+        scores *= np.select([days_since < 90, days_since > 365], [1.1, 0.9], 1.0)
+
+        return np.clip(scores, 0.0, 1.0), distances, days_since
+
+    def _haversine(
+        self, lat1: float, lon1: float, lat2: np.ndarray, lon2: np.ndarray
+    ) -> np.ndarray:
+        """Calculate distances from one point to arrays of points in meters."""
         R = 6371000  # Earth radius in meters
 
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
+        lat1_rad = np.radians(lat1)
+        lat2_rad = np.radians(lat2)
+        delta_lat = np.radians(lat2 - lat1)
+        delta_lon = np.radians(lon2 - lon1)
 
-        a = math.sin(delta_lat / 2) ** 2 + \
-            math.cos(lat1_rad) * math.cos(lat2_rad) * \
-            math.sin(delta_lon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        a = np.sin(delta_lat / 2) ** 2 + \
+            np.cos(lat1_rad) * np.cos(lat2_rad) * \
+            np.sin(delta_lon / 2) ** 2
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
         return R * c
 
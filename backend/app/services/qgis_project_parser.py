@@ -0,0 +1,94 @@
+"""
+QGIS Project Parser
+Metadata extraction for QGIS projects (.qgs, and .qgz archives), run in
+the parse pool.
+
+Projects are streamed through the XML parser (see xml_stream) rather than
+built into a tree; a .qgz's project is parsed straight from the zip member
+stream.
+"""
+
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import IO, Optional, Union
+
+from app.services.xml_stream import StreamHandler, stream_parse
+
+MAX_LAYERS = 20
+
+
+class _ProjectSummary(StreamHandler):
+    """Collects the project version, title, CRS and map layers."""
+
+    def __init__(self):
+        self.version = "unknown"
+        self.title = None
+        self.crs = None
+        self.layers: list[dict] = []
+        self.layer: Optional[dict] = None  # The open <maplayer>
+
+    def start(self, tag: str, attrib: dict, ancestors: list[str]):
+        if not ancestors:
+            self.version = attrib.get("version", "unknown")
+        elif tag == "maplayer":
+            self.layer = {
+                "name": "Unknown",
+                "type": attrib.get("type", "unknown"),
+                "geometry": attrib.get("geometry", "unknown"),
+            }
+
+    def end(self, tag: str, text: str, ancestors: list[str]):
+        if tag == "maplayer" and self.layer is not None:
+            self.layers.append(self.layer)
+            self.layer = None
+        elif self.layer is not None and ancestors[-1] == "maplayer":
+            if tag == "layername" and text:
+                self.layer["name"] = text
+            elif tag == "datasource" and text:
+                self.layer["datasource"] = text[:100]  # Truncate long paths
+        elif tag == "title" and len(ancestors) == 1:
+            self.title = text or None
+        elif tag == "authid" and self.crs is None and ancestors[-2:] == ["projectCrs", "spatialrefsys"]:
+            self.crs = text or None
+
+    def result(self) -> dict:
+        return {
+            "version": self.version,
+            "project_title": self.title,
+            "layer_count": len(self.layers),
+            "layers": self.layers[:MAX_LAYERS],
+            "crs": self.crs,
+        }
+
+
+def _summarise(source: Union[str, IO[bytes]]) -> dict:
+    handler = _ProjectSummary()
+    stream_parse(source, handler)
+    return handler.result()
+
+
+class QgisProjectParserService:
+    """Service for extracting metadata from QGIS project files."""
+
+    @staticmethod
+    def process_project(file_path: str, filename: str) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Summarise a .qgs or .qgz project (by extension).
+
+        Returns:
+            Tuple of (error_message, metadata); metadata is None if invalid
+        """
+        try:
+            if filename.lower().endswith(".qgz"):
+                with zipfile.ZipFile(file_path) as zf:
+                    qgs_files = [name for name in zf.namelist() if name.endswith(".qgs")]
+                    if not qgs_files:
+                        return "No .qgs file found in .qgz archive", None
+                    with zf.open(qgs_files[0]) as qgs:
+                        summary = _summarise(qgs)
+            else:
+                summary = _summarise(file_path)
+        except (ET.ParseError, zipfile.BadZipFile, OSError) as e:
+            return f"Error processing QGIS project: {str(e)}", None
+
+        return None, {"filename": filename, "file_type": "qgis_project", **summary}
@@ -0,0 +1,553 @@
+"""
+Sales Store
+Local store of NSW Valuer General property sales (PSI bulk sales data), so
+sales searches are answered without upstream calls.
+
+The Valuer General publishes sales as weekly .DAT files, zipped; the
+yearly archive is a zip of the weekly zips. Each "B" record of the current
+(2001 onwards) format is one sale. PSI files carry no coordinates, so sales
+are located by property id from a property locations CSV (property_id,
+lat, lon, e.g. NSW property centroids); sales without a location can still
+be found by suburb or postcode.
+
+The store is one SQLite file:
+- sales: one row per sale (keyed by dealing number and property id, so a
+  later file's correction replaces the earlier row), with B-tree indexes
+  on contract date and on locality/postcode by contract date
+- sales_index: an R*Tree over (lon, lat, contract day) of located sales,
+  so a radius search within a date window is a single index lookup
+- property_locations: coordinates by property id
+- loaded_files: the sha256 of every .DAT file loaded, so re-running a load
+  skips files that are already in
+
+load_files() is the incremental (weekly) loader: each file is staged and
+merged in one transaction, keeping the indexes current. bulk_load() is for
+yearly archives and first loads: the secondary indexes are dropped while
+rows are merged and rebuilt once at the end.
+"""
+
+import csv
+import hashlib
+import io
+import sqlite3
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+from urllib.parse import quote
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.schemas.property_sales import PropertySale, PropertyType, SalesSearchRequest
+from app.services.tile_store import BACKEND_ROOT
+
+EARTH_RADIUS_M = 6371000
+METRES_PER_DEGREE = 111320
+BATCH_SIZE = 50000
+
+# Sale columns, in staging/insert order
+SALE_COLUMNS = (
+    "district_code", "property_id", "dealing_number", "property_name", "unit_number",
+    "house_number", "street_name", "locality", "postcode", "land_area_sqm", "contract_day",
+    "settlement_day", "price", "zone_code", "nature", "primary_purpose", "strata_lot", "property_type",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY,
+    district_code TEXT,
+    property_id TEXT,
+    dealing_number TEXT,
+    property_name TEXT,
+    unit_number TEXT,
+    house_number TEXT,
+    street_name TEXT,
+    locality TEXT,
+    postcode TEXT,
+    land_area_sqm REAL,
+    contract_day INTEGER,  -- date.toordinal()
+    settlement_day INTEGER,
+    price REAL,
+    zone_code TEXT,
+    nature TEXT,
+    primary_purpose TEXT,
+    strata_lot TEXT,
+    property_type TEXT,
+    UNIQUE (dealing_number, property_id)
+);
+CREATE TABLE IF NOT EXISTS property_locations (
+    property_id TEXT PRIMARY KEY,
+    lat REAL,
+    lon REAL
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS sales_index USING rtree(
+    id, min_lon, max_lon, min_lat, max_lat, min_day, max_day
+);
+CREATE TABLE IF NOT EXISTS loaded_files (
+    sha256 TEXT PRIMARY KEY,
+    name TEXT,
+    sales INTEGER,
+    loaded_at REAL
+);
+"""
+
+SECONDARY_INDEXES = {
+    "sales_contract_day": "sales (contract_day)",
+    "sales_locality": "sales (locality, contract_day)",
+    "sales_postcode": "sales (postcode, contract_day)",
+    "sales_property": "sales (property_id)",
+}
+
+MERGE_SALES = f"""
+INSERT INTO sales ({", ".join(SALE_COLUMNS)})
+SELECT {", ".join(SALE_COLUMNS)} FROM staging WHERE true
+ON CONFLICT (dealing_number, property_id) DO UPDATE SET
+    {", ".join(f"{column} = excluded.{column}" for column in SALE_COLUMNS)}
+"""
+
+# R*Tree entries of located sales; the incremental form covers staged sales only
+INDEX_SALES = """
+INSERT OR REPLACE INTO sales_index
+SELECT s.id, l.lon, l.lon, l.lat, l.lat, s.contract_day, s.contract_day
+FROM {source}
+JOIN property_locations l ON l.property_id = s.property_id
+WHERE s.contract_day IS NOT NULL
+"""
+INDEX_STAGED = INDEX_SALES.format(
+    source="staging i JOIN sales s ON s.dealing_number = i.dealing_number AND s.property_id = i.property_id"
+)
+INDEX_ALL = INDEX_SALES.format(source="sales s")
+
+SORT_COLUMNS = {
+    "contract_date": "s.contract_day",
+    "sale_price": "s.price",
+    "land_area_sqm": "COALESCE(s.land_area_sqm, 0)",
+}
+
+SELECT_SALES = """
+SELECT s.id, s.property_id, s.dealing_number, s.property_name, s.unit_number, s.house_number,
+       s.street_name, s.locality, s.postcode, s.land_area_sqm, s.contract_day, s.settlement_day,
+       s.price, s.zone_code, s.property_type, l.lat, l.lon
+"""
+
+
+class StoredSale(NamedTuple):
+    """
+    A sale as read from the store. Has the PropertySale fields statistics
+    need; to_property_sale() builds the full model.
+    """
+    sale_id: int
+    property_id: str
+    dealing_number: str
+    property_name: str
+    unit_number: str
+    house_number: str
+    street_name: str
+    locality: str
+    postcode: str
+    land_area_sqm: Optional[float]
+    contract_date: date
+    settlement_day: Optional[int]
+    sale_price: float
+    zone_code: Optional[str]
+    property_type: str
+    lat: Optional[float]
+    lon: Optional[float]
+    price_per_sqm: Optional[float]
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "StoredSale":
+        """Build from a SELECT_SALES row."""
+        area, contract_day, price = row[9], row[10], row[12]
+        return cls(
+            *row[:10], date.fromordinal(contract_day), *row[11:],
+            round(price / area, 2) if area else None,
+        )
+
+    def to_property_sale(self) -> PropertySale:
+        number = f"{self.unit_number}/{self.house_number}" if self.unit_number and self.house_number \
+            else (self.house_number or self.unit_number)
+        address = " ".join(part for part in (number, self.street_name.title()) if part)
+        return PropertySale(
+            id=f"NSW-{self.dealing_number or self.sale_id}-{self.property_id}",
+            dealing_number=self.dealing_number or None,
+            address=address or self.property_name.title() or "Unknown",
+            suburb=self.locality.title(),
+            postcode=self.postcode,
+            lat=self.lat,
+            lon=self.lon,
+            property_type=self.property_type,
+            land_area_sqm=self.land_area_sqm,
+            zone_code=self.zone_code,
+            sale_price=self.sale_price,
+            contract_date=self.contract_date,
+            settlement_date=date.fromordinal(self.settlement_day) if self.settlement_day else None,
+            price_per_sqm=self.price_per_sqm,
+            source="NSW Valuer General",
+        )
+
+
+@dataclass
+class LoadResult:
+    """What a load added to the store."""
+    files: int = 0
+    skipped_files: list[str] = field(default_factory=list)  # Already loaded
+    sales: int = 0
+    rejected: int = 0  # B records without a price or contract date
+    elapsed_seconds: float = 0.0
+
+
+def _parse_day(value: str) -> Optional[int]:
+    """CCYYMMDD to a date ordinal (None when blank or invalid)."""
+    if len(value) != 8:
+        return None
+    try:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:])).toordinal()
+    except ValueError:
+        return None
+
+
+def _property_type(nature: str, purpose: str, strata_lot: str) -> str:
+    """Classify a sale from its nature of property (V/R/3) and primary purpose."""
+    purpose = purpose.upper()
+    if nature == "V":
+        return PropertyType.LAND.value
+    if strata_lot:
+        return PropertyType.UNIT.value
+    if any(word in purpose for word in ("COMMERC", "SHOP", "OFFICE", "RETAIL")):
+        return PropertyType.COMMERCIAL.value
+    if any(word in purpose for word in ("INDUSTR", "FACTORY", "WAREHOUSE")):
+        return PropertyType.INDUSTRIAL.value
+    if any(word in purpose for word in ("FARM", "RURAL", "GRAZING")):
+        return PropertyType.RURAL.value
+    if nature == "R" or "RESID" in purpose:
+        return PropertyType.HOUSE.value
+    return PropertyType.OTHER.value
+
+
+def parse_psi(content: bytes) -> tuple[list[tuple], int]:
+    """
+    Parse the B (sale) records of a PSI .DAT file.
+
+    Returns:
+        Tuple of (rows in SALE_COLUMNS order, rejected record count)
+    """
+    rows = []
+    rejected = 0
+    for line in content.decode("latin-1").splitlines():
+        if not line.startswith("B;"):
+            continue
+        fields = line.split(";")
+        if len(fields) < 24:
+            rejected += 1
+            continue
+
+        contract_day = _parse_day(fields[13])
+        try:
+            price = float(fields[15])
+        except ValueError:
+            price = 0.0
+        if contract_day is None or price <= 0:
+            rejected += 1
+            continue
+
+        try:
+            area = float(fields[11])
+            if fields[12] == "H":
+                area *= 10000
+        except ValueError:
+            area = None
+
+        nature, purpose, strata_lot = fields[17], fields[18].strip(), fields[19].strip()
+        rows.append((
+            fields[1], fields[2], fields[23].strip(), fields[5].strip(), fields[6].strip(),
+            fields[7].strip(), fields[8].strip(), fields[9].strip().upper(), fields[10].strip(),
+            area or None, contract_day, _parse_day(fields[14]), price, fields[16].strip() or None,
+            nature, purpose, strata_lot, _property_type(nature, purpose, strata_lot),
+        ))
+    return rows, rejected
+
+
+def iter_dat_files(path: Path) -> Iterator[tuple[str, bytes]]:
+    """Yield (name, content) of each .DAT file in a path, recursing into zips."""
+    if path.suffix.lower() != ".zip":
+        yield path.name, path.read_bytes()
+        return
+
+    def walk(archive: zipfile.ZipFile, prefix: str) -> Iterator[tuple[str, bytes]]:
+        for name in sorted(archive.namelist()):
+            lower = name.lower()
+            if lower.endswith(".dat"):
+                yield f"{prefix}{name}", archive.read(name)
+            elif lower.endswith(".zip"):
+                with zipfile.ZipFile(io.BytesIO(archive.read(name))) as inner:
+                    yield from walk(inner, f"{prefix}{name}/")
+
+    with zipfile.ZipFile(path) as archive:
+        yield from walk(archive, f"{path.name}/")
+
+
+class SalesStore:
+    """
+    SQLite store of NSW VG sales.
+
+    Usage:
+        store = get_sales_store()
+        store.load_files([Path("20260105.zip")])
+        matches = store.search(SalesSearchRequest(lat=-33.87, lon=151.21))
+        page = [sale.to_property_sale() for sale in matches[:50]]
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def available(self) -> bool:
+        """Whether sales have been loaded."""
+        return self.path.exists()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _connect_writer(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), isolation_level=None, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _load(self, paths: list[Path], bulk: bool) -> LoadResult:
+        started = time.perf_counter()
+        result = LoadResult()
+        conn = self._connect_writer()
+        try:
+            if bulk:
+                conn.execute("PRAGMA synchronous=OFF")
+                conn.execute("PRAGMA cache_size=-262144")  # 256MB
+                for name in SECONDARY_INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+            else:
+                self._create_indexes(conn)
+            conn.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS staging ({', '.join(SALE_COLUMNS)})"
+            )
+
+            placeholders = ", ".join("?" * len(SALE_COLUMNS))
+            for path in paths:
+                for name, content in iter_dat_files(path):
+                    sha256 = hashlib.sha256(content).hexdigest()
+                    if conn.execute("SELECT 1 FROM loaded_files WHERE sha256 = ?", (sha256,)).fetchone():
+                        result.skipped_files.append(name)
+                        continue
+
+                    rows, rejected = parse_psi(content)
+                    conn.execute("BEGIN")
+                    try:
+                        conn.execute("DELETE FROM staging")
+                        for start in range(0, len(rows), BATCH_SIZE):
+                            conn.executemany(
+                                f"INSERT INTO staging VALUES ({placeholders})", rows[start:start + BATCH_SIZE]
+                            )
+                        conn.execute(MERGE_SALES)
+                        if not bulk:
+                            conn.execute(INDEX_STAGED)
+                        conn.execute(
+                            "INSERT INTO loaded_files VALUES (?, ?, ?, ?)", (sha256, name, len(rows), time.time())
+                        )
+                        conn.execute("COMMIT")
+                    except BaseException:
+                        conn.execute("ROLLBACK")
+                        raise
+
+                    result.files += 1
+                    result.sales += len(rows)
+                    result.rejected += rejected
+
+            if bulk:
+                conn.execute("PRAGMA synchronous=FULL")
+                self._create_indexes(conn)
+                self._rebuild_index(conn)
+        finally:
+            conn.close()
+
+        result.elapsed_seconds = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _create_indexes(conn: sqlite3.Connection):
+        for name, definition in SECONDARY_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+    @staticmethod
+    def _rebuild_index(conn: sqlite3.Connection):
+        """Rebuild the spatial/temporal index of every located sale."""
+        conn.execute("BEGIN")
+        conn.execute("DELETE FROM sales_index")
+        conn.execute(INDEX_ALL)
+        conn.execute("COMMIT")
+
+    def load_files(self, paths: list[Path]) -> LoadResult:
+        """
+        Load PSI files (.DAT, or zips of them) incrementally, one
+        transaction per .DAT file. Files loaded before are skipped.
+        """
+        return self._load(paths, bulk=False)
+
+    def bulk_load(self, paths: list[Path]) -> LoadResult:
+        """
+        Load many PSI files (e.g. yearly archives) with the secondary and
+        spatial indexes rebuilt once at the end. Searches during a bulk
+        load may miss sales.
+        """
+        return self._load(paths, bulk=True)
+
+    def load_locations(self, csv_path: Path) -> int:
+        """
+        Load property coordinates from a CSV with property id and lat/lon
+        columns (propid/property_id, lat/latitude, lon/lng/longitude), then
+        re-index the sales.
+
+        Returns:
+            Number of locations loaded
+        """
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            columns = {name.lower(): name for name in reader.fieldnames or []}
+
+            def column(*names: str) -> str:
+                for name in names:
+                    if name in columns:
+                        return columns[name]
+                raise ValueError(f"{csv_path.name} has no {names[0]} column")
+
+            property_id = column("property_id", "propid", "propertyid")
+            lat = column("lat", "latitude")
+            lon = column("lon", "lng", "longitude")
+
+            count = 0
+
+            def rows() -> Iterator[tuple[str, float, float]]:
+                nonlocal count
+                for record in reader:
+                    try:
+                        row = record[property_id].strip(), float(record[lat]), float(record[lon])
+                    except (TypeError, ValueError):
+                        continue
+                    count += 1
+                    yield row
+
+            conn = self._connect_writer()
+            try:
+                conn.execute("BEGIN")
+                conn.executemany("INSERT OR REPLACE INTO property_locations VALUES (?, ?, ?)", rows())
+                conn.execute("COMMIT")
+                self._rebuild_index(conn)
+            finally:
+                conn.close()
+        return count
+
+    # ------------------------------------------------------------------
+    # Searching
+    # ------------------------------------------------------------------
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{quote(str(self.path))}?mode=ro", uri=True)
+
+    def search(self, request: SalesSearchRequest) -> Optional[list[StoredSale]]:
+        """
+        All sales matching a search, sorted as requested (the caller pages
+        them and computes statistics). Build models for the page only, with
+        StoredSale.to_property_sale().
+
+        Returns None when the store can't answer: nothing loaded, an LGA
+        filter (PSI files have no LGA), or no location, suburb or postcode
+        to search around.
+        """
+        located = request.lat is not None and request.lon is not None
+        if not self.available() or request.lga_name or not (located or request.suburb or request.postcode):
+            return None
+
+        clauses: list[str] = []
+        params: list = []
+        if located:
+            # Radius as a bounding box on the index; exact distances below
+            dlat = request.radius_m / METRES_PER_DEGREE
+            dlon = dlat / max(np.cos(np.radians(request.lat)), 0.01)
+            source = (
+                "FROM sales_index r JOIN sales s ON s.id = r.id "
+                "JOIN property_locations l ON l.property_id = s.property_id"
+            )
+            clauses += ["r.max_lon >= ?", "r.min_lon <= ?", "r.max_lat >= ?", "r.min_lat <= ?"]
+            params += [request.lon - dlon, request.lon + dlon, request.lat - dlat, request.lat + dlat]
+            day_column = "r"
+        else:
+            source = "FROM sales s LEFT JOIN property_locations l ON l.property_id = s.property_id"
+            day_column = None
+
+        if request.sold_after:
+            clauses.append("r.max_day >= ?" if day_column else "s.contract_day >= ?")
+            params.append(request.sold_after.toordinal())
+        if request.sold_before:
+            clauses.append("r.min_day <= ?" if day_column else "s.contract_day <= ?")
+            params.append(request.sold_before.toordinal())
+        if request.suburb:
+            clauses.append("s.locality = ?")
+            params.append(request.suburb.strip().upper())
+        if request.postcode:
+            clauses.append("s.postcode = ?")
+            params.append(request.postcode.strip())
+        if request.property_type:
+            clauses.append(f"s.property_type IN ({', '.join('?' * len(request.property_type))})")
+            params += [getattr(kind, "value", kind) for kind in request.property_type]
+        if request.zone_code:
+            clauses.append("s.zone_code = ?")
+            params.append(request.zone_code)
+        if request.min_price:
+            clauses.append("s.price >= ?")
+            params.append(request.min_price)
+        if request.max_price:
+            clauses.append("s.price <= ?")
+            params.append(request.max_price)
+        if request.min_land_area:
+            clauses.append("COALESCE(s.land_area_sqm, 0) >= ?")
+            params.append(request.min_land_area)
+        if request.max_land_area:
+            clauses.append("COALESCE(s.land_area_sqm, 0) <= ?")
+            params.append(request.max_land_area)
+
+        order = SORT_COLUMNS.get(request.sort_by, SORT_COLUMNS["contract_date"])
+        direction = "DESC" if request.sort_desc else "ASC"
+        sql = (
+            f"{SELECT_SALES} {source} "
+            f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} "
+            f"ORDER BY {order} {direction}, s.id"
+        )
+
+        conn = self._connect_reader()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        if located and rows:
+            lat = np.radians(np.array([row[15] for row in rows], dtype=float))
+            lon = np.radians(np.array([row[16] for row in rows], dtype=float))
+            lat0, lon0 = np.radians(request.lat), np.radians(request.lon)
+            a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat0) * np.cos(lat) * np.sin((lon - lon0) / 2) ** 2
+            distances = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+            rows = [row for row, inside in zip(rows, (distances <= request.radius_m).tolist()) if inside]
+
+        return [StoredSale.from_row(row) for row in rows]
+
+
+@lru_cache()
+def get_sales_store() -> SalesStore:
+    """Get the shared sales store configured from settings."""
+    path = Path(get_settings().sales_store_path)
+    if not path.is_absolute():
+        path = BACKEND_ROOT / path
+    return SalesStore(path)
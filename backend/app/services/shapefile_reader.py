@@ -0,0 +1,370 @@
+"""
+Shapefile Reader
+Streaming reader for ESRI Shapefiles (.shp/.shx/.dbf/.prj), used to parse
+zipped shapefile uploads in the parse pool.
+
+The .shp, .shx and .dbf files are memory-mapped. Record offsets come from
+the .shx index (or a walk of the record headers when it's missing), and
+per-record shape types and part counts are gathered from the mapping with
+numpy in fixed-size batches, so memory stays bounded however many records
+the file holds. DBF attributes are only decoded when iterated.
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+BATCH_SIZE = 65536
+HEADER_SIZE = 100
+
+SHAPE_TYPE_NAMES = {
+    0: "Null", 1: "Point", 3: "PolyLine", 5: "Polygon", 8: "MultiPoint",
+    11: "PointZ", 13: "PolyLineZ", 15: "PolygonZ", 18: "MultiPointZ",
+    21: "PointM", 23: "PolyLineM", 25: "PolygonM", 28: "MultiPointM", 31: "MultiPatch",
+}
+POINT_TYPES = {1, 11, 21}
+MULTIPOINT_TYPES = {8, 18, 28}
+POLYLINE_TYPES = {3, 13, 23}
+POLYGON_TYPES = {5, 15, 25}
+
+# DBF language driver IDs for the common code pages (.cpg files take precedence)
+DBF_CODE_PAGES = {0x01: "cp437", 0x02: "cp850", 0x03: "cp1252", 0x57: "cp1252", 0x58: "cp1252"}
+CPG_ALIASES = {"UTF-8": "utf-8", "UTF8": "utf-8", "1252": "cp1252", "ANSI 1252": "cp1252"}
+
+
+class ShapefileError(Exception):
+    """Raised for missing or malformed shapefile components."""
+    pass
+
+
+def _map(path: Path) -> Optional[mmap.mmap]:
+    """Memory-map a file read-only (None for empty files)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _gather_int32(buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Read a little-endian int32 at each byte offset."""
+    return buffer[offsets[:, None] + np.arange(4)].view("<i4").ravel()
+
+
+class DbfTable:
+    """Lazily decoded dBASE attribute table."""
+
+    def __init__(self, path: Path, encoding: Optional[str] = None):
+        self._map = _map(path)
+        if self._map is None or len(self._map) < 32:
+            raise ShapefileError("Empty .dbf file")
+
+        self.record_count, self.header_length, self.record_length = struct.unpack_from(
+            "<IHH", self._map, 4
+        )
+        self.encoding = encoding or DBF_CODE_PAGES.get(self._map[29], "utf-8")
+
+        self.fields: list[dict] = []
+        position = 32
+        while position + 32 <= self.header_length and self._map[position] != 0x0D:
+            name, field_type, length, decimals = struct.unpack_from("<11sc4xBB", self._map, position)
+            self.fields.append({
+                "name": name.split(b"\x00", 1)[0].decode(self.encoding, "replace"),
+                "type": field_type.decode("ascii", "replace"),
+                "length": length,
+                "decimals": decimals,
+            })
+            position += 32
+
+    def _decode(self, field: dict, raw: bytes):
+        value = raw.decode(self.encoding, "replace").strip()
+        if field["type"] in ("N", "F"):
+            if not value or value.startswith("*"):
+                return None
+            try:
+                return int(value) if field["decimals"] == 0 and "." not in value else float(value)
+            except ValueError:
+                return None
+        if field["type"] == "L":
+            return value in ("T", "t", "Y", "y") if value not in ("", "?") else None
+        return value or None
+
+    def iter_records(self) -> Iterator[Optional[dict]]:
+        """Yield each record's attributes (None for deleted records)."""
+        for index in range(self.record_count):
+            start = self.header_length + index * self.record_length
+            if start + self.record_length > len(self._map):
+                return
+            if self._map[start] == 0x2A:  # "*": deleted
+                yield None
+                continue
+            position = start + 1
+            record = {}
+            for field in self.fields:
+                raw = self._map[position:position + field["length"]]
+                record[field["name"]] = self._decode(field, raw)
+                position += field["length"]
+            yield record
+
+    def close(self):
+        self._map.close()
+
+
+class Shapefile:
+    """
+    A shapefile on disk, opened by the path of its .shp file; sibling
+    .shx/.dbf/.prj/.cpg files are found by name.
+
+    Usage:
+        with Shapefile(path) as shp:
+            summary = shp.summary()
+    """
+
+    def __init__(self, shp_path: Path):
+        self.path = Path(shp_path)
+        siblings = {p.suffix.lower(): p for p in self.path.parent.glob(self.path.stem + ".*")}
+
+        self._shp = _map(self.path)
+        if self._shp is None or len(self._shp) < HEADER_SIZE:
+            raise ShapefileError(f"{self.path.name}: file is too short")
+        file_code, = struct.unpack_from(">i", self._shp, 0)
+        if file_code != 9994:
+            raise ShapefileError(f"{self.path.name}: not a shapefile")
+
+        self.shape_type, = struct.unpack_from("<i", self._shp, 32)
+        self.bbox = list(struct.unpack_from("<4d", self._shp, 36))
+        self._shx = _map(siblings[".shx"]) if ".shx" in siblings else None
+
+        encoding = None
+        if ".cpg" in siblings:
+            code_page = siblings[".cpg"].read_text(errors="ignore").strip()
+            encoding = CPG_ALIASES.get(code_page.upper(), code_page.lower() or None)
+        self.dbf = DbfTable(siblings[".dbf"], encoding) if ".dbf" in siblings else None
+        self.prj = siblings[".prj"].read_text(errors="ignore").strip() if ".prj" in siblings else None
+
+    def __enter__(self) -> "Shapefile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._shp.close()
+        if self._shx is not None:
+            self._shx.close()
+        if self.dbf is not None:
+            self.dbf.close()
+
+    def record_offsets(self) -> np.ndarray:
+        """Byte offset of every record header in the .shp file."""
+        if self._shx is not None:
+            index = np.frombuffer(self._shx, dtype=">i4", offset=HEADER_SIZE)
+            return index[0::2].astype(np.int64) * 2
+
+        # No index: walk the record headers (content length is in 16-bit words)
+        offsets = []
+        position = HEADER_SIZE
+        end = len(self._shp)
+        while position + 8 <= end:
+            offsets.append(position)
+            content_length, = struct.unpack_from(">i", self._shp, position + 4)
+            position += 8 + content_length * 2
+        return np.array(offsets, dtype=np.int64)
+
+    def _polygon_kind(self, content: int) -> str:
+        """Polygon or MultiPolygon, by counting outer (clockwise) rings."""
+        num_parts, num_points = struct.unpack_from("<2i", self._shp, content + 36)
+        parts = np.frombuffer(self._shp, dtype="<i4", count=num_parts, offset=content + 44)
+        points = np.frombuffer(
+            self._shp, dtype="<f8", count=num_points * 2, offset=content + 44 + 4 * num_parts
+        ).reshape(-1, 2)
+
+        x, y = points[:, 0], points[:, 1]
+        cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+        parts = parts[(parts >= 0) & (parts < len(cross))]  # Skip degenerate rings
+        if not len(parts):
+            return "Polygon"
+        cross[parts[1:] - 1] = 0  # Don't join one ring's end to the next ring's start
+        areas = np.add.reduceat(cross, parts)
+        return "MultiPolygon" if np.count_nonzero(areas < 0) > 1 else "Polygon"
+
+    def geometry_types(self) -> dict[str, int]:
+        """Count records by GeoJSON geometry type (null shapes as "Unknown")."""
+        buffer = np.frombuffer(self._shp, dtype=np.uint8)
+        offsets = self.record_offsets()
+        counts: dict[str, int] = {}
+
+        def add(name: str, count: int):
+            if count:
+                counts[name] = counts.get(name, 0) + int(count)
+
+        for start in range(0, len(offsets), BATCH_SIZE):
+            content = offsets[start:start + BATCH_SIZE] + 8
+            content = content[content + 48 <= len(buffer)]
+            types = _gather_int32(buffer, content)
+
+            add("Unknown", np.isin(types, [0]).sum())
+            add("Point", np.isin(types, list(POINT_TYPES)).sum())
+            add("MultiPoint", np.isin(types, list(MULTIPOINT_TYPES)).sum())
+            add("MultiPatch", np.isin(types, [31]).sum())
+
+            lines = content[np.isin(types, list(POLYLINE_TYPES))]
+            parts = _gather_int32(buffer, lines + 36)
+            add("LineString", np.count_nonzero(parts == 1))
+            add("MultiLineString", np.count_nonzero(parts > 1))
+
+            polygons = content[np.isin(types, list(POLYGON_TYPES))]
+            parts = _gather_int32(buffer, polygons + 36)
+            add("Polygon", np.count_nonzero(parts == 1))
+            # Several rings may be holes of one polygon; check orientation
+            for offset in polygons[parts > 1].tolist():
+                add(self._polygon_kind(offset), 1)
+
+        return counts
+
+    @property
+    def crs(self) -> Optional[str]:
+        """CRS from the .prj file, as "AUTHORITY:CODE" where possible."""
+        if not self.prj:
+            return None
+        try:
+            from pyproj import CRS
+
+            crs = CRS.from_wkt(self.prj)
+            authority = crs.to_authority(min_confidence=70)
+            return ":".join(authority) if authority else crs.name
+        except Exception:
+            return None
+
+    def summary(self) -> dict:
+        """Layer metadata in the same shape as the GeoJSON parser's."""
+        fields = self.dbf.fields if self.dbf is not None else []
+        feature_count = len(self.record_offsets())
+        return {
+            "name": self.path.stem,
+            "shape_type": SHAPE_TYPE_NAMES.get(self.shape_type, f"Unknown ({self.shape_type})"),
+            "feature_count": feature_count,
+            "geometry_types": self.geometry_types() if feature_count else {},
+            "properties": [field["name"] for field in fields],
+            "property_count": len(fields),
+            "fields": fields,
+            "bbox": self.bbox if feature_count else None,
+            "crs": self.crs,
+        }
+
+
+def extract_shapefiles(archive: str, directory: str, max_bytes: int) -> list[Path]:
+    """
+    Extract the shapefiles in a zip archive (components only) to a directory.
+
+    Returns:
+        Paths of the extracted .shp files
+
+    Raises:
+        ShapefileError: No shapefile in the archive, or it expands past max_bytes
+    """
+    components = {".shp", ".shx", ".dbf", ".prj", ".cpg"}
+    with zipfile.ZipFile(archive) as zf:
+        members = [
+            info for info in zf.infolist()
+            if not info.is_dir()
+            and Path(info.filename).suffix.lower() in components
+            and not Path(info.filename).name.startswith("._")  # macOS resource forks
+        ]
+        if not any(Path(info.filename).suffix.lower() == ".shp" for info in members):
+            raise ShapefileError("No .shp file found in archive")
+        if sum(info.file_size for info in members) > max_bytes:
+            raise ShapefileError(f"Shapefile expands to more than {max_bytes // (1024 * 1024)} MB")
+
+        # One numbered folder per archive folder, so siblings stay together
+        # and no member name can escape the extraction directory
+        folders: dict[str, Path] = {}
+        shapefiles = []
+        for info in members:
+            parent = str(Path(info.filename).parent)
+            if parent not in folders:
+                folders[parent] = Path(directory) / str(len(folders))
+                folders[parent].mkdir()
+            folder = folders[parent]
+            name = Path(info.filename).stem + Path(info.filename).suffix.lower()
+            target = folder / name
+            with zf.open(info) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            if target.suffix == ".shp":
+                shapefiles.append(target)
+
+    return sorted(shapefiles)
+
+
+class ShapefileParserService:
+    """Service for extracting metadata from (zipped) shapefiles."""
+
+    @staticmethod
+    def process_shapefile(
+        file_path: str, filename: str, max_extract_bytes: int = 2 * 1024 ** 3
+    ) -> tuple[Optional[str], Optional[dict]]:
+        """
+        Summarise a zipped shapefile or a bare .shp (runs in the parse pool).
+
+        A bare .shp has no attribute table or CRS; counts and geometry types
+        still come from the records.
+
+        Returns:
+            Tuple of (error_message, metadata); metadata is None if invalid
+        """
+        started = time.perf_counter()
+        try:
+            with tempfile.TemporaryDirectory(prefix="shapefile-") as directory:
+                if zipfile.is_zipfile(file_path):
+                    paths = extract_shapefiles(file_path, directory, max_extract_bytes)
+                else:
+                    paths = [Path(file_path)]
+
+                layers = []
+                for path in paths:
+                    with Shapefile(path) as shapefile:
+                        layers.append(shapefile.summary())
+        except ShapefileError as e:
+            # Report a bare .shp by its upload name, not the spooled temp file
+            return f"Invalid shapefile: {str(e).replace(Path(file_path).name, filename)}", None
+        except (zipfile.BadZipFile, OSError, struct.error, ValueError) as e:
+            return f"Error reading shapefile: {str(e)}", None
+
+        if not zipfile.is_zipfile(file_path):
+            layers[0]["name"] = Path(filename).stem
+
+        # Totals across layers, in the GeoJSON metadata shape
+        geometry_types: dict[str, int] = {}
+        properties: list[str] = []
+        for layer in layers:
+            for name, count in layer["geometry_types"].items():
+                geometry_types[name] = geometry_types.get(name, 0) + count
+            properties += [name for name in layer["properties"] if name not in properties]
+
+        boxes = [layer["bbox"] for layer in layers if layer["bbox"]]
+        same_crs = len({layer["crs"] for layer in layers}) == 1
+        bbox = None
+        if boxes and same_crs:
+            boxes = np.array(boxes)
+            bbox = [*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist()]
+
+        return None, {
+            "filename": filename,
+            "file_type": "shapefile",
+            "feature_count": sum(layer["feature_count"] for layer in layers),
+            "geometry_types": geometry_types,
+            "properties": properties,
+            "property_count": len(properties),
+            "bbox": bbox,
+            "crs": layers[0]["crs"] if same_crs else None,
+            "layer_count": len(layers),
+            "layers": layers,
+            "timings": {"total_ms": round((time.perf_counter() - started) * 1000, 2)},
+        }
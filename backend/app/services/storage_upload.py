@@ -0,0 +1,209 @@
+"""
+Storage Upload
+Async Supabase Storage client for uploads, over one pooled httpx client.
+
+Files are streamed from disk. Small files go up in a single request; files
+of RESUMABLE_THRESHOLD or more use Supabase's resumable (TUS) endpoint in
+fixed-size chunks, so only one chunk is in memory and a dropped connection
+resumes from the last acknowledged offset instead of starting over.
+"""
+
+import asyncio
+import base64
+import os
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+
+
+TUS_VERSION = "1.0.0"
+TUS_CHUNK_SIZE = 6 * 1024 * 1024  # Supabase requires 6 MB chunks (except the last)
+RESUMABLE_THRESHOLD = TUS_CHUNK_SIZE
+STREAM_CHUNK_SIZE = 1024 * 1024
+MAX_RETRIES = 3
+
+
+class StorageUploadError(Exception):
+    """Raised when Supabase Storage rejects an upload."""
+    pass
+
+
+def _tus_metadata(values: dict[str, str]) -> str:
+    """Encode the Upload-Metadata header (comma-separated "key base64(value)")."""
+    return ",".join(
+        f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in values.items()
+    )
+
+
+async def _read_chunks(file_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a file in chunks without blocking the event loop."""
+    with open(file_path, "rb") as f:
+        while chunk := await run_in_threadpool(f.read, chunk_size):
+            yield chunk
+
+
+class StorageUploader:
+    """
+    Uploads files to Supabase Storage.
+
+    Usage:
+        await get_storage_uploader().upload("cad-files", "org/id/site.dxf", path, "application/dxf")
+    """
+
+    def __init__(self, supabase_url: str, key: str, timeout: float = 60.0, max_connections: int = 20):
+        self.base_url = supabase_url.rstrip("/") + "/storage/v1"
+        self.headers = {"authorization": f"Bearer {key}", "apikey": key}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections),
+            )
+        return self._client
+
+    async def upload(
+        self,
+        bucket: str,
+        object_path: str,
+        file_path: str,
+        content_type: Optional[str] = None,
+        upsert: bool = False,
+    ):
+        """
+        Upload a local file to bucket/object_path.
+
+        Raises:
+            StorageUploadError: Storage rejected the upload or it kept failing
+        """
+        content_type = content_type or "application/octet-stream"
+        size = os.path.getsize(file_path)
+        if size >= RESUMABLE_THRESHOLD:
+            await self._upload_resumable(bucket, object_path, file_path, size, content_type, upsert)
+        else:
+            await self._upload_simple(bucket, object_path, file_path, content_type, upsert)
+
+    async def _upload_simple(
+        self, bucket: str, object_path: str, file_path: str, content_type: str, upsert: bool
+    ):
+        response = await self._get_client().post(
+            f"{self.base_url}/object/{bucket}/{quote(object_path)}",
+            content=_read_chunks(file_path),
+            headers={
+                "content-type": content_type,
+                "content-length": str(os.path.getsize(file_path)),
+                "x-upsert": "true" if upsert else "false",
+            },
+        )
+        if response.status_code >= 400:
+            raise StorageUploadError(f"Upload failed ({response.status_code}): {response.text}")
+
+    async def _upload_resumable(
+        self, bucket: str, object_path: str, file_path: str, size: int, content_type: str, upsert: bool
+    ):
+        client = self._get_client()
+        response = await client.post(
+            f"{self.base_url}/upload/resumable",
+            headers={
+                "tus-resumable": TUS_VERSION,
+                "upload-length": str(size),
+                "upload-metadata": _tus_metadata({
+                    "bucketName": bucket,
+                    "objectName": object_path,
+                    "contentType": content_type,
+                }),
+                "x-upsert": "true" if upsert else "false",
+            },
+        )
+        if response.status_code != 201:
+            raise StorageUploadError(f"Could not start upload ({response.status_code}): {response.text}")
+        location = response.headers["location"]
+
+        offset = 0
+        failures = 0
+        with open(file_path, "rb") as f:
+            while offset < size:
+                f.seek(offset)
+                chunk = await run_in_threadpool(f.read, TUS_CHUNK_SIZE)
+                try:
+                    response = await client.patch(
+                        location,
+                        content=chunk,
+                        headers={
+                            "tus-resumable": TUS_VERSION,
+                            "upload-offset": str(offset),
+                            "content-type": "application/offset+octet-stream",
+                        },
+                    )
+                    if response.status_code == 204:
+                        offset = int(response.headers["upload-offset"])
+                        failures = 0
+                        continue
+                    if response.status_code < 500 and response.status_code != 409:
+                        raise StorageUploadError(
+                            f"Upload failed at byte {offset} ({response.status_code}): {response.text}"
+                        )
+                except httpx.TransportError:
+                    pass
+
+                # Connection dropped, server error or offset conflict: ask
+                # the server how far it got and resume from there
+                failures += 1
+                if failures > MAX_RETRIES:
+                    raise StorageUploadError(f"Upload failed at byte {offset} after {MAX_RETRIES} retries")
+                await asyncio.sleep(2 ** failures)
+                offset = await self._resume_offset(location, offset)
+
+    async def _resume_offset(self, location: str, offset: int) -> int:
+        """Get the server's offset for a resumable upload (keep ours if unknown)."""
+        try:
+            response = await self._get_client().head(location, headers={"tus-resumable": TUS_VERSION})
+            return int(response.headers["upload-offset"])
+        except (httpx.TransportError, KeyError, ValueError):
+            return offset
+
+    async def exists(self, bucket: str, object_path: str) -> bool:
+        """
+        Check that an object is still in a bucket.
+
+        Returns False when Storage can't confirm it (missing, or the check
+        failed), so callers fall back to uploading again.
+        """
+        try:
+            response = await self._get_client().head(
+                f"{self.base_url}/object/authenticated/{bucket}/{quote(object_path)}"
+            )
+        except httpx.TransportError:
+            return False
+        return response.status_code < 400
+
+    async def remove(self, bucket: str, object_paths: list[str]):
+        """Delete objects from a bucket."""
+        response = await self._get_client().request(
+            "DELETE",
+            f"{self.base_url}/object/{bucket}",
+            json={"prefixes": object_paths},
+        )
+        if response.status_code >= 400:
+            raise StorageUploadError(f"Delete failed ({response.status_code}): {response.text}")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+@lru_cache()
+def get_storage_uploader() -> StorageUploader:
+    """Get the shared storage uploader (service role key, like get_supabase_client)."""
+    settings = get_settings()
+    return StorageUploader(settings.supabase_url, settings.supabase_service_role_key)
@@ -0,0 +1,346 @@
+"""
+Vector Tile Generator
+Builds Mapbox Vector Tiles from local GeoJSON/GeoPackage layers without
+PostGIS, and seeds them into mbtiles in parallel worker processes.
+
+Each layer is reprojected to Web Mercator once and indexed with an STRtree.
+Rendering a tile queries the tree, then clips, transforms, simplifies and
+quantizes the candidate geometries with vectorized shapely operations
+before encoding them.
+"""
+
+import gzip
+import hashlib
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import orjson
+import shapely
+from shapely import STRtree
+
+from app.services.mbtiles_writer import MBTilesWriter
+from app.services.mvt import DEFAULT_EXTENT, LayerEncoder, encode_tile
+from app.services.tile_math import MERCATOR_EXTENT, tile_bounds_mercator
+
+
+DEFAULT_BUFFER = 64
+
+
+@dataclass(frozen=True)
+class LayerSource:
+    """A GeoJSON/GeoPackage file to be rendered as one tile layer."""
+    path: str
+    name: str
+    source_layer: Optional[str] = None  # GeoPackage layer name
+    minzoom: int = 0
+    maxzoom: int = 16
+    properties: Optional[tuple[str, ...]] = None  # None keeps all columns
+
+
+@dataclass
+class VectorLayer:
+    """A layer's geometries in Web Mercator with an STRtree index."""
+    name: str
+    geometries: np.ndarray
+    properties: list[dict]
+    minzoom: int = 0
+    maxzoom: int = 16
+    bounds: tuple[float, float, float, float] = (-180.0, -85.0511, 180.0, 85.0511)
+    fields: dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.tree = STRtree(self.geometries)
+        self.feature_hashes = _feature_hashes(self.geometries, self.properties)
+        # Content-derived ids stay stable across rebuilds (53 bits, safe in JS)
+        self.feature_ids = [int(h[:13], 16) for h in self.feature_hashes]
+
+    @classmethod
+    def from_source(cls, source: LayerSource) -> "VectorLayer":
+        """Load a layer from a GeoJSON or GeoPackage file."""
+        import geopandas
+
+        gdf = geopandas.read_file(source.path, layer=source.source_layer)
+        gdf = gdf[~(gdf.geometry.isna() | gdf.geometry.is_empty)]
+        if gdf.crs is None:
+            gdf = gdf.set_crs(4326)
+
+        columns = [c for c in gdf.columns if c != gdf.geometry.name]
+        if source.properties is not None:
+            columns = [c for c in columns if c in source.properties]
+
+        bounds = tuple(gdf.to_crs(4326).total_bounds.tolist()) if len(gdf) else (-180.0, -85.0511, 180.0, 85.0511)
+        gdf = gdf.to_crs(3857)
+
+        attributes = gdf[columns].astype(object).where(gdf[columns].notna(), None)
+
+        return cls(
+            name=source.name,
+            geometries=np.asarray(gdf.geometry.values, dtype=object),
+            properties=attributes.to_dict("records"),
+            minzoom=source.minzoom,
+            maxzoom=source.maxzoom,
+            bounds=bounds,
+            fields={c: _field_type(gdf[c].dtype) for c in columns},
+        )
+
+    def tiles(self, z: int) -> set[tuple[int, int]]:
+        """Get the (x, y) tiles at a zoom touched by any geometry's bounds."""
+        if not len(self.geometries):
+            return set()
+        return tiles_for_bounds(shapely.bounds(self.geometries), z)
+
+
+def _feature_hashes(geometries: np.ndarray, properties: list[dict]) -> list[str]:
+    """Fingerprint features by geometry WKB and properties; duplicates get a suffix."""
+    hashes = []
+    seen: dict[str, int] = {}
+    for wkb, props in zip(shapely.to_wkb(geometries), properties):
+        digest = hashlib.sha1(wkb)
+        digest.update(orjson.dumps(props, option=orjson.OPT_SORT_KEYS, default=str))
+        h = digest.hexdigest()
+        count = seen.get(h, 0)
+        seen[h] = count + 1
+        hashes.append(f"{h}-{count}" if count else h)
+    return hashes
+
+
+def tiles_for_bounds(bounds: np.ndarray, z: int, buffer: float = 0.0) -> set[tuple[int, int]]:
+    """
+    Get the (x, y) tiles at a zoom touched by Web Mercator bounding boxes.
+
+    Args:
+        bounds: (N, 4) array of (min_x, min_y, max_x, max_y)
+        z: Zoom level
+        buffer: Extra margin as a fraction of the tile size
+    """
+    if not len(bounds):
+        return set()
+
+    n = 1 << z
+    size = 2 * MERCATOR_EXTENT / n
+    pad = buffer * size
+    b = np.asarray(bounds, dtype=float)
+    min_x = np.clip(((b[:, 0] - pad + MERCATOR_EXTENT) // size).astype(np.int64), 0, n - 1)
+    max_x = np.clip(((b[:, 2] + pad + MERCATOR_EXTENT) // size).astype(np.int64), 0, n - 1)
+    min_y = np.clip(((MERCATOR_EXTENT - b[:, 3] - pad) // size).astype(np.int64), 0, n - 1)
+    max_y = np.clip(((MERCATOR_EXTENT - b[:, 1] + pad) // size).astype(np.int64), 0, n - 1)
+
+    tiles: set[tuple[int, int]] = set()
+    for x0, x1, y0, y1 in zip(min_x.tolist(), max_x.tolist(), min_y.tolist(), max_y.tolist()):
+        for tx in range(x0, x1 + 1):
+            for ty in range(y0, y1 + 1):
+                tiles.add((tx, ty))
+    return tiles
+
+
+# (dx, dy) of a tile's four children, relative to twice its (x, y)
+_CHILD_OFFSETS = np.array([[0, 0], [1, 0], [0, 1], [1, 1]], dtype=np.int64)
+
+
+def iter_touched_tiles(geometries: np.ndarray, maxzoom: int) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yield (z, tiles) for zooms 0 to maxzoom: the (x, y) tiles that Web
+    Mercator geometries actually intersect, as an (N, 2) array.
+
+    Each zoom only tests the children of the previous zoom's tiles, so a
+    long thin geometry costs a few tiles per zoom instead of every tile in
+    its bounding box. Callers can stop iterating once they have enough.
+    """
+    tree = STRtree(geometries)
+    tiles = np.zeros((1, 2), dtype=np.int64)
+    for z in range(maxzoom + 1):
+        if z:
+            tiles = (tiles[:, None, :] * 2 + _CHILD_OFFSETS).reshape(-1, 2)
+        size = 2 * MERCATOR_EXTENT / (1 << z)
+        boxes = shapely.box(
+            tiles[:, 0] * size - MERCATOR_EXTENT,
+            MERCATOR_EXTENT - (tiles[:, 1] + 1) * size,
+            (tiles[:, 0] + 1) * size - MERCATOR_EXTENT,
+            MERCATOR_EXTENT - tiles[:, 1] * size,
+        )
+        tiles = tiles[np.unique(tree.query(boxes, predicate="intersects")[0])]
+        yield z, tiles
+        if not len(tiles):
+            return
+
+
+def _field_type(dtype) -> str:
+    """Map a pandas dtype to a TileJSON vector_layers field type."""
+    if dtype.kind == "b":
+        return "Boolean"
+    if dtype.kind in "iuf":
+        return "Number"
+    return "String"
+
+
+def render_tile(
+    layers: list[VectorLayer],
+    z: int,
+    x: int,
+    y: int,
+    extent: int = DEFAULT_EXTENT,
+    buffer: int = DEFAULT_BUFFER,
+    simplification: float = 1.0,
+) -> bytes:
+    """
+    Render one XYZ tile from the given layers.
+
+    Args:
+        layers: Layers to include (in order)
+        z, x, y: Tile coordinates
+        extent: Tile coordinate extent
+        buffer: Clip buffer around the tile in tile units
+        simplification: Simplification tolerance in tile units (0 disables)
+
+    Returns:
+        Uncompressed MVT bytes (empty if no features survive)
+    """
+    min_x, min_y, max_x, max_y = tile_bounds_mercator(z, x, y)
+    scale = extent / (max_x - min_x)
+    pad = buffer / scale
+    clip = (min_x - pad, min_y - pad, max_x + pad, max_y + pad)
+    origin = np.array([min_x, max_y])
+    factor = np.array([scale, -scale])
+
+    encoders = []
+    for layer in layers:
+        if not layer.minzoom <= z <= layer.maxzoom:
+            continue
+
+        indices = layer.tree.query(shapely.box(*clip))
+        if not len(indices):
+            continue
+        indices.sort()
+
+        geoms = shapely.clip_by_rect(layer.geometries[indices], *clip)
+        geoms = shapely.transform(geoms, lambda coords: (coords - origin) * factor)
+        if simplification > 0:
+            geoms = shapely.simplify(geoms, simplification, preserve_topology=True)
+        geoms = shapely.set_precision(geoms, 1.0)
+
+        keep = ~shapely.is_empty(geoms)
+        encoder = LayerEncoder(layer.name, extent)
+        for index, geom in zip(indices[keep].tolist(), geoms[keep]):
+            encoder.add_feature(geom, layer.properties[index], layer.feature_ids[index])
+        encoders.append(encoder)
+
+    return encode_tile(encoders)
+
+
+# Per-process layers for seeding workers
+_worker_layers: list[VectorLayer] = []
+
+
+def _init_worker(sources: list[LayerSource]):
+    """Load and index the layers once per worker process."""
+    global _worker_layers
+    _worker_layers = [VectorLayer.from_source(source) for source in sources]
+
+
+def _render_worker_tile(tile: tuple[int, int, int]) -> tuple[int, int, int, bytes]:
+    """Render and gzip a tile in a worker process."""
+    z, x, y = tile
+    data = render_tile(_worker_layers, z, x, y)
+    # Fixed mtime keeps identical tiles byte-identical for deduplication
+    return z, x, y, gzip.compress(data, mtime=0) if data else b""
+
+
+def tileset_metadata(name: str, layers: list[VectorLayer], minzoom: int, maxzoom: int) -> dict:
+    """Build mbtiles metadata (bounds, center, vector_layers) for layers."""
+    west = min(layer.bounds[0] for layer in layers)
+    south = min(layer.bounds[1] for layer in layers)
+    east = max(layer.bounds[2] for layer in layers)
+    north = max(layer.bounds[3] for layer in layers)
+
+    return {
+        "name": name,
+        "format": "pbf",
+        "type": "overlay",
+        "minzoom": minzoom,
+        "maxzoom": maxzoom,
+        "bounds": f"{west},{south},{east},{north}",
+        "center": f"{(west + east) / 2},{(south + north) / 2},{minzoom}",
+        "json": {
+            "vector_layers": [
+                {
+                    "id": layer.name,
+                    "fields": layer.fields,
+                    "minzoom": max(layer.minzoom, minzoom),
+                    "maxzoom": min(layer.maxzoom, maxzoom),
+                }
+                for layer in layers
+            ]
+        },
+    }
+
+
+def iter_seed_tiles(layers: list[VectorLayer], minzoom: int, maxzoom: int) -> Iterator[tuple[int, int, int]]:
+    """Yield every tile touched by the layers, zoom by zoom."""
+    for z in range(minzoom, maxzoom + 1):
+        tiles: set[tuple[int, int]] = set()
+        for layer in layers:
+            if layer.minzoom <= z <= layer.maxzoom:
+                tiles |= layer.tiles(z)
+        for x, y in sorted(tiles):
+            yield z, x, y
+
+
+def render_tiles(
+    sources: list[LayerSource],
+    tiles: list[tuple[int, int, int]],
+    workers: Optional[int] = None,
+) -> Iterator[tuple[int, int, int, bytes]]:
+    """
+    Render tiles across a process pool.
+
+    Yields:
+        (z, x, y, gzipped MVT) in input order; empty tiles yield b""
+    """
+    if not tiles:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(256, math.ceil(len(tiles) / (workers * 8))))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(sources,),
+    ) as pool:
+        yield from pool.map(_render_worker_tile, tiles, chunksize=chunksize)
+
+
+def seed_tiles(
+    sources: list[LayerSource],
+    output: Path,
+    name: str,
+    minzoom: int,
+    maxzoom: int,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Render all tiles for the sources into an mbtiles file.
+
+    Tiles are rendered in a process pool; empty tiles are not written.
+
+    Returns:
+        Number of tiles written
+    """
+    layers = [VectorLayer.from_source(source) for source in sources]
+    tiles = list(iter_seed_tiles(layers, minzoom, maxzoom))
+
+    with MBTilesWriter(output) as writer:
+        for done, (z, x, y, data) in enumerate(render_tiles(sources, tiles, workers), start=1):
+            if data:
+                writer.put_tile(z, x, y, data)
+            if progress:
+                progress(done, len(tiles))
+
+        writer.set_metadata(tileset_metadata(name, layers, minzoom, maxzoom))
+        return writer.tile_count
@@ -0,0 +1,80 @@
+"""
+Tile Math Helpers
+Conversions between WGS84 coordinates, Web Mercator and XYZ tile indices.
+"""
+
+import math
+
+
+# Web Mercator half-circumference in metres
+MERCATOR_EXTENT = 20037508.342789244
+
+# Latitude limit of the Web Mercator projection
+MAX_LATITUDE = 85.0511287798066
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> tuple[int, int]:
+    """Get the XYZ tile containing a WGS84 point at a zoom level."""
+    n = 1 << z
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    lat_rad = math.radians(lat)
+
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def lonlat_to_tile_fraction(lon: float, lat: float, z: int) -> tuple[float, float]:
+    """Get fractional tile coordinates (tile index plus position within it)."""
+    n = 1 << z
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    lat_rad = math.radians(lat)
+
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def bbox_to_tile_range(
+    bbox: tuple[float, float, float, float], z: int, buffer: float = 0.0
+) -> tuple[int, int, int, int]:
+    """
+    Get the XYZ tile range covering a WGS84 bounding box.
+
+    Args:
+        bbox: (west, south, east, north)
+        z: Zoom level
+        buffer: Tile buffer as a fraction of a tile (e.g. 64 / 4096); tiles
+            whose buffered area reaches the bbox are included too
+
+    Returns:
+        (min_x, min_y, max_x, max_y) inclusive tile indices
+    """
+    west, south, east, north = bbox
+    n = 1 << z
+    min_fx, min_fy = lonlat_to_tile_fraction(west, north, z)
+    max_fx, max_fy = lonlat_to_tile_fraction(east, south, z)
+
+    def clamp(value: float) -> int:
+        return min(max(math.floor(value), 0), n - 1)
+
+    return clamp(min_fx - buffer), clamp(min_fy - buffer), clamp(max_fx + buffer), clamp(max_fy + buffer)
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Get the WGS84 bounds (west, south, east, north) of an XYZ tile."""
+    n = 1 << z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return west, south, east, north
+
+
+def tile_bounds_mercator(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Get the Web Mercator bounds (min_x, min_y, max_x, max_y) of an XYZ tile."""
+    size = 2 * MERCATOR_EXTENT / (1 << z)
+    min_x = -MERCATOR_EXTENT + x * size
+    max_y = MERCATOR_EXTENT - y * size
+    return min_x, max_y - size, min_x + size, max_y
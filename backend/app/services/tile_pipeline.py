@@ -0,0 +1,209 @@
+"""
+Tile Build Pipeline
+Downloads source layers from ArcGIS FeatureServers and builds an mbtiles
+tileset from them, rebuilding only the tiles whose source features changed.
+
+Change detection uses each feature's fingerprint (geometry WKB plus
+properties, see VectorLayer.feature_hashes). Fingerprints and feature bounds are stored in the tileset's feature_index
+table; on the next build, the bounds of added and removed features mark the
+dirty tiles at every zoom, and only those are re-rendered.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+import numpy as np
+import orjson
+import shapely
+
+from app.services.mbtiles_writer import MBTilesWriter
+from app.services.mvt import DEFAULT_EXTENT
+from app.services.tile_generator import (
+    DEFAULT_BUFFER,
+    LayerSource,
+    VectorLayer,
+    iter_seed_tiles,
+    render_tiles,
+    tiles_for_bounds,
+    tileset_metadata,
+)
+
+
+@dataclass
+class BuildResult:
+    """Summary of a tileset build."""
+    incremental: bool
+    tiles_rendered: int = 0
+    tiles_written: int = 0
+    tiles_deleted: int = 0
+    features_added: dict[str, int] = field(default_factory=dict)
+    features_removed: dict[str, int] = field(default_factory=dict)
+
+
+async def download_arcgis_layer(
+    client: httpx.AsyncClient,
+    url: str,
+    output: Path,
+    page_size: int = 2000,
+) -> int:
+    """
+    Download all features of an ArcGIS FeatureServer layer as GeoJSON.
+
+    Pages through the layer with resultOffset and streams each page to
+    disk, so memory use is bounded by the page size.
+
+    Args:
+        client: HTTP client
+        url: Layer URL (ending in /FeatureServer/<id>)
+        output: GeoJSON file to write
+        page_size: Features per request
+
+    Returns:
+        Number of features downloaded
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_name(output.name + ".tmp")
+    count = 0
+    offset = 0
+
+    with open(tmp_path, "wb") as f:
+        f.write(b'{"type":"FeatureCollection","features":[')
+
+        while True:
+            response = await client.get(f"{url}/query", params={
+                "where": "1=1",
+                "outFields": "*",
+                "returnGeometry": "true",
+                "outSR": "4326",
+                "f": "geojson",
+                "resultOffset": offset,
+                "resultRecordCount": page_size,
+            })
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+
+            if "error" in data:
+                raise RuntimeError(f"ArcGIS error: {data['error']}")
+
+            features = data.get("features", [])
+            for feature in features:
+                if count:
+                    f.write(b",")
+                f.write(orjson.dumps(feature))
+                count += 1
+
+            exceeded = (
+                data.get("exceededTransferLimit")
+                or data.get("properties", {}).get("exceededTransferLimit")
+            )
+            if not features or (not exceeded and len(features) < page_size):
+                break
+            offset += len(features)
+
+        f.write(b"]}")
+
+    tmp_path.replace(output)
+    return count
+
+
+def feature_fingerprints(layer: VectorLayer) -> dict[str, tuple[float, float, float, float]]:
+    """Map each feature's fingerprint to its Web Mercator bounds."""
+    bounds = shapely.bounds(layer.geometries).tolist()
+    return {h: tuple(bbox) for h, bbox in zip(layer.feature_hashes, bounds)}
+
+
+def _pipeline_config(sources: list[LayerSource], minzoom: int, maxzoom: int) -> str:
+    """Serialize the build settings; a change forces a full rebuild."""
+    return json.dumps({
+        "layers": [[s.name, s.minzoom, s.maxzoom, s.properties] for s in sources],
+        "minzoom": minzoom,
+        "maxzoom": maxzoom,
+    }, sort_keys=True)
+
+
+def build_tileset(
+    sources: list[LayerSource],
+    output: Path,
+    name: str,
+    minzoom: int,
+    maxzoom: int,
+    workers: Optional[int] = None,
+    incremental: bool = True,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> BuildResult:
+    """
+    Build or incrementally update an mbtiles tileset from source layers.
+
+    Tiles are rendered in parallel worker processes, identical tiles are
+    stored once, and all writes happen in one transaction (or a temporary
+    file that replaces the tileset on success).
+
+    Args:
+        sources: Layers to render
+        output: mbtiles path
+        name: Tileset name
+        minzoom, maxzoom: Zoom range
+        workers: Worker processes (default: CPU count)
+        incremental: Reuse unchanged tiles from an existing tileset
+        progress: Callback receiving (tiles done, tiles total)
+    """
+    layers = [VectorLayer.from_source(source) for source in sources]
+    config = _pipeline_config(sources, minzoom, maxzoom)
+
+    writer = MBTilesWriter(output, incremental=incremental)
+    if writer.incremental and writer.get_metadata().get("pipeline_config") != config:
+        # Build settings changed, so every tile has to be rendered again
+        writer.abort()
+        writer = MBTilesWriter(output)
+
+    with writer:
+        result = BuildResult(incremental=writer.incremental)
+        dirty_bounds = []
+
+        for layer in layers:
+            current = feature_fingerprints(layer)
+            previous = writer.get_feature_index(layer.name) if writer.incremental else {}
+
+            added = [(h, bbox) for h, bbox in current.items() if h not in previous]
+            removed = [h for h in previous if h not in current]
+
+            dirty_bounds.extend(bbox for _, bbox in added)
+            dirty_bounds.extend(previous[h] for h in removed)
+            writer.update_feature_index(layer.name, added, removed)
+
+            result.features_added[layer.name] = len(added)
+            result.features_removed[layer.name] = len(removed)
+
+        if writer.incremental:
+            # Features reach into neighbouring tiles through the clip buffer
+            buffer = DEFAULT_BUFFER / DEFAULT_EXTENT
+            bounds = np.array(dirty_bounds, dtype=float).reshape(-1, 4)
+            tiles = [
+                (z, x, y)
+                for z in range(minzoom, maxzoom + 1)
+                for x, y in sorted(tiles_for_bounds(bounds, z, buffer))
+            ]
+        else:
+            tiles = list(iter_seed_tiles(layers, minzoom, maxzoom))
+
+        for done, (z, x, y, data) in enumerate(render_tiles(sources, tiles, workers), start=1):
+            if data:
+                writer.put_tile(z, x, y, data)
+            elif writer.incremental:
+                writer.delete_tile(z, x, y)
+            if progress:
+                progress(done, len(tiles))
+
+        writer.set_metadata({
+            **tileset_metadata(name, layers, minzoom, maxzoom),
+            "pipeline_config": config,
+        })
+
+        result.tiles_rendered = len(tiles)
+        result.tiles_written = writer.tile_count
+        result.tiles_deleted = writer.deleted_count
+
+    return result
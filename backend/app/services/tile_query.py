@@ -0,0 +1,124 @@
+"""
+Tile Query Service
+Answers "which features are under this point" from a local vector tileset
+by decoding the covering max-zoom tile, so no upstream service is called.
+
+Decoded tiles are kept in an LRU cache; nearby lookups (e.g. repeated
+clicks or a property analysis followed by a map click) reuse them.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import shapely
+
+from app.services.mvt import DecodedLayer, decode_tile
+from app.services.tile_math import lonlat_to_tile_fraction
+from app.services.tile_store import TileStore, use_tile_store
+
+
+class TileQueryService:
+    """Point-in-polygon queries against pre-built vector tilesets."""
+
+    def __init__(self, cache_size: int = 256):
+        self._cache: OrderedDict[tuple, dict[str, tuple[DecodedLayer, np.ndarray]]] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def _decoded_tile(
+        self, store: TileStore, z: int, x: int, y: int
+    ) -> dict[str, tuple[DecodedLayer, np.ndarray]]:
+        """Get a decoded tile (layers with geometry arrays), using the cache."""
+        # The version changes with every rebuild, in place or by replacement
+        key = (store.path, store.version, z, x, y)
+        with self._lock:
+            layers = self._cache.get(key)
+            if layers is not None:
+                self._cache.move_to_end(key)
+                return layers
+
+        data = store.get_tile(z, x, y)
+        layers = {}
+        if data:
+            if data[:2] == b"\x1f\x8b":
+                data = gzip.decompress(data)
+            layers = {
+                name: (layer, np.array(layer.geometries, dtype=object))
+                for name, layer in decode_tile(data).items()
+            }
+
+        with self._lock:
+            self._cache[key] = layers
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return layers
+
+    def covers(self, tileset: str, lon: float, lat: float) -> bool:
+        """Check whether a point lies within a tileset's bounds."""
+        with use_tile_store(tileset) as store:
+            if store is None:
+                return False
+            bounds = store.get_metadata().get("bounds", "")
+        try:
+            west, south, east, north = (float(v) for v in bounds.split(","))
+        except ValueError:
+            return False
+        return west <= lon <= east and south <= lat <= north
+
+    def query_point(
+        self,
+        tileset: str,
+        lon: float,
+        lat: float,
+        layers: Optional[list[str]] = None,
+    ) -> Optional[list[dict]]:
+        """
+        Find features in a tileset that contain a point.
+
+        Args:
+            tileset: Tileset name (e.g. "flood")
+            lon: Longitude
+            lat: Latitude
+            layers: Only check these tile layers (default: all)
+
+        Returns:
+            Matching features as {"layer", "id", "properties"} dicts, or
+            None if the tileset is not available
+        """
+        with use_tile_store(tileset) as store:
+            if store is None:
+                return None
+
+            z = int(store.get_metadata().get("maxzoom", 14))
+            fx, fy = lonlat_to_tile_fraction(lon, lat, z)
+            n = 1 << z
+            x, y = min(int(fx), n - 1), min(int(fy), n - 1)
+            decoded = self._decoded_tile(store, z, x, y)
+
+        matches = []
+        for name, (layer, geometries) in decoded.items():
+            if layers is not None and name not in layers:
+                continue
+            if not len(geometries):
+                continue
+
+            # Point position in this layer's tile coordinates
+            px = (fx - x) * layer.extent
+            py = (fy - y) * layer.extent
+            hits = np.flatnonzero(shapely.intersects_xy(geometries, px, py))
+
+            for index in hits.tolist():
+                matches.append({
+                    "layer": name,
+                    "id": layer.ids[index],
+                    "properties": layer.properties[index],
+                })
+
+        return matches
+
+
+# Singleton instance
+tile_query_service = TileQueryService()
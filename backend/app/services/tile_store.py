@@ -0,0 +1,380 @@
+"""
+Tile Store Service
+Read access to pre-built vector tilesets stored as .mbtiles or .pmtiles files.
+"""
+
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from app.services.pmtiles import PMTilesReader
+from app.services.tile_math import bbox_to_tile_range
+
+
+# Backend root (tileset paths are relative to this directory)
+BACKEND_ROOT = Path(__file__).parent.parent.parent
+
+# Directory holding tile archives
+TILES_DIR = "data/tiles"
+
+# Named tilesets and their archive paths (.mbtiles or .pmtiles). Any other
+# archive in TILES_DIR is served under its file name (e.g. seeded layers).
+TILESETS = {
+    "flood": "data/tiles/brisbane-flood.mbtiles",
+}
+
+TILESET_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+TILE_ARCHIVE_SUFFIXES = (".pmtiles", ".mbtiles")
+
+TileData = Union[bytes, memoryview]
+TileCoord = tuple[int, int, int]
+
+
+def flip_y(y: int, z: int) -> int:
+    """Convert XYZ tile coordinates to TMS (mbtiles uses TMS)."""
+    return (2 ** z) - 1 - y
+
+
+class TileStore(ABC):
+    """
+    Abstract read-only tile archive.
+
+    Readers hold a store through use_tile_store(); a store replaced by a
+    rebuild is retired and closed once its last reader is done.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._inode = path.stat().st_ino
+        self._users = 0
+        self._retired = False
+        self._users_lock = threading.Lock()
+
+    def is_replaced(self) -> bool:
+        """Check whether the archive file was replaced (e.g. by a rebuild)."""
+        try:
+            return self.path.stat().st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    @property
+    def version(self) -> tuple:
+        """
+        Identifies the archive's current content; changes when a rebuild
+        replaces the file or updates it in place. Use it in tile cache keys.
+        """
+        return (self._inode,)
+
+    def acquire(self):
+        """Register a reader."""
+        with self._users_lock:
+            self._users += 1
+
+    def release(self):
+        """Unregister a reader; closes a retired store once it has none left."""
+        with self._users_lock:
+            self._users -= 1
+            close = self._retired and self._users == 0
+        if close:
+            self.close()
+
+    def retire(self):
+        """Mark the store as replaced; it is closed when no reader holds it."""
+        with self._users_lock:
+            self._retired = True
+            close = self._users == 0
+        if close:
+            self.close()
+
+    def close(self):
+        """Release the archive's file handles."""
+        pass
+
+    @abstractmethod
+    def get_tile(self, z: int, x: int, y: int) -> Optional[TileData]:
+        """Get raw tile data for XYZ coordinates, or None if missing."""
+        pass
+
+    @abstractmethod
+    def get_metadata(self) -> dict[str, str]:
+        """Get tileset metadata as mbtiles-style name/value pairs."""
+        pass
+
+    def get_tiles(self, tiles: list[TileCoord]) -> dict[TileCoord, TileData]:
+        """Get several XYZ tiles at once; missing tiles are left out."""
+        found = {}
+        for z, x, y in tiles:
+            data = self.get_tile(z, x, y)
+            if data is not None:
+                found[(z, x, y)] = data
+        return found
+
+
+class MBTilesStore(TileStore):
+    """Tile store backed by an mbtiles SQLite database."""
+
+    def __init__(self, path: Path, timeout: float = 5.0):
+        super().__init__(path)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, timeout=timeout)
+        self.conn.row_factory = sqlite3.Row
+
+    @property
+    def version(self) -> tuple:
+        # data_version changes whenever another connection commits to the
+        # file, e.g. an incremental MBTilesWriter build on the live tileset
+        return (self._inode, self.conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def close(self):
+        self.conn.close()
+
+    def get_tile(self, z: int, x: int, y: int) -> Optional[TileData]:
+        # Convert to TMS coordinates (Y is flipped in mbtiles)
+        cursor = self.conn.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            (z, x, flip_y(y, z))
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return row["tile_data"]
+
+    def get_tiles(self, tiles: list[TileCoord]) -> dict[TileCoord, TileData]:
+        """
+        Get several tiles with one query per zoom level.
+
+        A compact block of tiles (a viewport) is read with a range query;
+        scattered tiles use a row-value IN list.
+        """
+        by_zoom: dict[int, set[tuple[int, int]]] = {}
+        for z, x, y in tiles:
+            by_zoom.setdefault(z, set()).add((x, flip_y(y, z)))
+
+        found = {}
+        for z, wanted in by_zoom.items():
+            columns = [x for x, _ in wanted]
+            rows = [row for _, row in wanted]
+            area = (max(columns) - min(columns) + 1) * (max(rows) - min(rows) + 1)
+
+            if area <= 2 * len(wanted):
+                cursor = self.conn.execute(
+                    """
+                    SELECT tile_column, tile_row, tile_data FROM tiles
+                    WHERE zoom_level = ?
+                      AND tile_column BETWEEN ? AND ?
+                      AND tile_row BETWEEN ? AND ?
+                    """,
+                    (z, min(columns), max(columns), min(rows), max(rows))
+                )
+            else:
+                values = ", ".join("(?, ?)" for _ in wanted)
+                cursor = self.conn.execute(
+                    f"""
+                    SELECT tile_column, tile_row, tile_data FROM tiles
+                    WHERE zoom_level = ? AND (tile_column, tile_row) IN (VALUES {values})
+                    """,
+                    (z, *(v for tile in wanted for v in tile))
+                )
+
+            for column, row, data in cursor:
+                if (column, row) in wanted:
+                    found[(z, column, flip_y(row, z))] = data
+
+        return found
+
+    def get_metadata(self) -> dict[str, str]:
+        cursor = self.conn.execute("SELECT name, value FROM metadata")
+        return {row["name"]: row["value"] for row in cursor.fetchall()}
+
+
+class MBTilesCache(MBTilesStore):
+    """
+    Writable mbtiles store used to cache dynamically rendered tiles.
+
+    Empty tiles are cached as zero-length blobs so repeated requests for
+    areas without data don't hit the database either.
+    """
+
+    def __init__(self, path: Path, name: str, tile_format: str = "pbf"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch(exist_ok=True)
+        super().__init__(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                tile_data BLOB,
+                PRIMARY KEY (zoom_level, tile_column, tile_row)
+            );
+        """)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+                [("name", name), ("format", tile_format)],
+            )
+
+    def put_tile(self, z: int, x: int, y: int, tile_data: bytes):
+        """Store a rendered tile (XYZ coordinates)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+                (z, x, flip_y(y, z), tile_data)
+            )
+
+    def invalidate_bbox(self, bbox: tuple[float, float, float, float], buffer: float = 0.0) -> int:
+        """
+        Delete cached tiles intersecting a WGS84 bounding box at every zoom.
+
+        Args:
+            bbox: (west, south, east, north)
+            buffer: The tiles' render buffer as a fraction of a tile, so
+                neighbours that draw the area inside their buffer go too
+
+        Returns:
+            Number of tiles removed
+        """
+        zooms = [row[0] for row in self.conn.execute("SELECT DISTINCT zoom_level FROM tiles")]
+        removed = 0
+
+        with self.conn:
+            for z in zooms:
+                min_x, min_y, max_x, max_y = bbox_to_tile_range(bbox, z, buffer)
+                cursor = self.conn.execute(
+                    """
+                    DELETE FROM tiles
+                    WHERE zoom_level = ?
+                      AND tile_column BETWEEN ? AND ?
+                      AND tile_row BETWEEN ? AND ?
+                    """,
+                    (z, min_x, max_x, flip_y(max_y, z), flip_y(min_y, z))
+                )
+                removed += cursor.rowcount
+
+        return removed
+
+
+class PMTilesStore(TileStore):
+    """Tile store backed by a memory-mapped PMTiles v3 archive."""
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self.reader = PMTilesReader(path)
+
+    def close(self):
+        try:
+            self.reader.close()
+        except BufferError:
+            # Tiles still being sent are views into the mapping; it is
+            # unmapped when the last of them is released
+            pass
+
+    def get_tile(self, z: int, x: int, y: int) -> Optional[TileData]:
+        return self.reader.get_tile(z, x, y)
+
+    def get_metadata(self) -> dict[str, str]:
+        header = self.reader.header
+        metadata = {
+            key: value if isinstance(value, str) else str(value)
+            for key, value in self.reader.get_metadata().items()
+            if key != "vector_layers"
+        }
+        metadata.update({
+            "format": self.reader.tile_format,
+            "minzoom": str(header.min_zoom),
+            "maxzoom": str(header.max_zoom),
+            "bounds": f"{header.min_lon},{header.min_lat},{header.max_lon},{header.max_lat}",
+            "center": f"{header.center_lon},{header.center_lat},{header.center_zoom}",
+        })
+        return metadata
+
+
+# Cache open tile stores
+_stores: dict[str, TileStore] = {}
+_stores_lock = threading.RLock()
+
+
+def list_tilesets() -> dict[str, str]:
+    """Get all tileset names and their archive paths (relative to the backend)."""
+    tilesets = dict(TILESETS)
+    tiles_dir = BACKEND_ROOT / TILES_DIR
+    if tiles_dir.is_dir():
+        for path in sorted(tiles_dir.iterdir()):
+            if path.suffix in TILE_ARCHIVE_SUFFIXES and TILESET_NAME_PATTERN.match(path.stem):
+                tilesets.setdefault(path.stem, f"{TILES_DIR}/{path.name}")
+    return tilesets
+
+
+def get_tileset_path(tileset: str) -> Optional[Path]:
+    """Resolve the archive path for a tileset name."""
+    if tileset in TILESETS:
+        return BACKEND_ROOT / TILESETS[tileset]
+
+    if not TILESET_NAME_PATTERN.match(tileset):
+        return None
+
+    for suffix in TILE_ARCHIVE_SUFFIXES:
+        path = BACKEND_ROOT / TILES_DIR / f"{tileset}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def open_tile_store(path: Path) -> TileStore:
+    """Open a tile archive, choosing the backend from the file extension."""
+    if path.suffix == ".pmtiles":
+        return PMTilesStore(path)
+    return MBTilesStore(path)
+
+
+def get_tile_store(tileset: str) -> Optional[TileStore]:
+    """
+    Get or open the tile store for a tileset, reopening rebuilt archives.
+
+    The replaced store is retired, so callers reading tiles should hold
+    the store with use_tile_store() rather than keep the returned one.
+    """
+    with _stores_lock:
+        current = _stores.get(tileset)
+        if current is not None and not current.is_replaced():
+            return current
+
+        path = get_tileset_path(tileset)
+        if path is None or not path.exists():
+            return None
+
+        try:
+            store = open_tile_store(path)
+        except Exception:
+            return None
+
+        _stores[tileset] = store
+        if current is not None:
+            current.retire()
+        return store
+
+
+@contextmanager
+def use_tile_store(tileset: str) -> Iterator[Optional[TileStore]]:
+    """
+    Hold a tileset's store (None if unavailable) for the duration of the block.
+
+    Usage:
+        with use_tile_store("flood") as store:
+            if store is not None:
+                data = store.get_tile(z, x, y)
+    """
+    with _stores_lock:
+        store = get_tile_store(tileset)
+        if store is not None:
+            store.acquire()
+    try:
+        yield store
+    finally:
+        if store is not None:
+            store.release()
@@ -0,0 +1,122 @@
+"""
+Upload Cache
+Content-addressed index of uploads, keyed by the sha256 computed while the
+upload is spooled (see upload_spool):
+
+- parse_results: connector output (ConnectorResult.data) per content hash,
+  connector type/version, file extension and connector options, so a file
+  that was already parsed is not parsed again.
+- stored_blobs: where each organization's copy of a blob lives in Supabase
+  Storage, so re-uploading the same file only inserts a cad_files row.
+
+Bump a connector's version to invalidate its cached results when its
+output changes.
+"""
+
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from app.core.config import get_settings
+from app.services.tile_store import BACKEND_ROOT
+
+
+class UploadCache:
+    """SQLite index of parse results and stored blobs by content hash."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS parse_results (
+                sha256 TEXT,
+                connector TEXT,
+                version TEXT,
+                file_type TEXT,
+                options TEXT,
+                data BLOB,
+                created_at REAL,
+                PRIMARY KEY (sha256, connector, version, file_type, options)
+            );
+            CREATE TABLE IF NOT EXISTS stored_blobs (
+                organization TEXT,
+                sha256 TEXT,
+                storage_path TEXT,
+                size INTEGER,
+                created_at REAL,
+                PRIMARY KEY (organization, sha256)
+            );
+        """)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _options_key(options: Optional[dict]) -> str:
+        return orjson.dumps(options or {}, option=orjson.OPT_SORT_KEYS).decode()
+
+    def get_result(
+        self, sha256: str, connector: str, version: str, file_type: str, options: Optional[dict] = None
+    ) -> Optional[dict]:
+        """Get a cached connector result, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT data FROM parse_results
+                WHERE sha256 = ? AND connector = ? AND version = ? AND file_type = ? AND options = ?
+                """,
+                (sha256, connector, version, file_type, self._options_key(options)),
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def put_result(
+        self, sha256: str, connector: str, version: str, file_type: str, options: Optional[dict], data: dict
+    ):
+        """Cache a successful connector result."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parse_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    sha256, connector, version, file_type, self._options_key(options),
+                    orjson.dumps(data), time.time(),
+                ),
+            )
+
+    def get_blob(self, organization: str, sha256: str) -> Optional[str]:
+        """Get the storage path of an organization's copy of a blob, or None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT storage_path FROM stored_blobs WHERE organization = ? AND sha256 = ?",
+                (organization, sha256),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_blob(self, organization: str, sha256: str, storage_path: str, size: int):
+        """Record that a blob was uploaded to storage."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO stored_blobs VALUES (?, ?, ?, ?, ?)",
+                (organization, sha256, storage_path, size, time.time()),
+            )
+
+    def forget_blob(self, organization: str, sha256: str):
+        """Drop a blob record (e.g. the stored object was deleted)."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM stored_blobs WHERE organization = ? AND sha256 = ?",
+                (organization, sha256),
+            )
+
+
+@lru_cache()
+def get_upload_cache() -> UploadCache:
+    """Get the shared upload cache configured from settings."""
+    path = Path(get_settings().upload_cache_path)
+    if not path.is_absolute():
+        path = BACKEND_ROOT / path
+    return UploadCache(path)
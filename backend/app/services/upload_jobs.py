@@ -0,0 +1,186 @@
+"""
+Upload Jobs
+Background processing for uploads that are accepted first and processed
+later (POST /files/jobs), with status that clients poll.
+
+Jobs run as asyncio tasks, at most `workers` at a time; the heavy lifting
+inside them already happens elsewhere (parsing in the parse pool, Storage
+uploads as async streaming requests). At most `max_queued` more wait for a slot
+(each holds a spooled upload on disk); further jobs are rejected with
+UploadJobQueueFull. Jobs are kept in memory by the process that accepted
+them and forgotten `ttl_seconds` after they finish.
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import get_settings
+
+
+class UploadJobError(Exception):
+    """Raised by a job function to fail the job with a message."""
+    pass
+
+
+class UploadJobQueueFull(Exception):
+    """Raised when too many jobs are already queued."""
+    pass
+
+
+@dataclass
+class UploadJob:
+    """Status of a background upload."""
+    id: str
+    filename: str
+    stages: dict[str, str]  # stage -> pending, running, done, skipped, failed
+    status: str = "queued"  # queued, running, completed, failed
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def set_stage(self, stage: str, state: str):
+        self.stages[stage] = state
+
+    @property
+    def progress(self) -> float:
+        """Fraction of stages finished."""
+        if not self.stages:
+            return 0.0
+        finished = sum(state in ("done", "skipped") for state in self.stages.values())
+        return round(finished / len(self.stages), 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "progress": self.progress,
+            "stages": dict(self.stages),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+JobFunction = Callable[[UploadJob], Awaitable[Any]]
+
+
+class UploadJobQueue:
+    """
+    Runs upload jobs in the background with bounded concurrency.
+
+    Usage:
+        job = get_upload_job_queue().submit(filename, ["parse", "storage"], process)
+        ...
+        get_upload_job_queue().get(job.id).to_dict()
+    """
+
+    def __init__(self, workers: int = 4, ttl_seconds: float = 3600.0, max_queued: int = 32):
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.max_queued = max_queued
+        self._jobs: dict[str, UploadJob] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def submit(
+        self,
+        filename: str,
+        stages: list[str],
+        fn: JobFunction,
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> UploadJob:
+        """
+        Queue a job; fn(job) runs once a worker slot is free.
+
+        fn reports progress with job.set_stage() and returns the job result.
+        Raising UploadJobError (or any exception) fails the job. cleanup()
+        runs when the job ends, including when it is cancelled before it
+        started (e.g. to remove its spooled upload).
+
+        Raises:
+            UploadJobQueueFull: max_queued jobs are already waiting
+        """
+        if self.is_full:
+            raise UploadJobQueueFull("Too many uploads are queued, please retry shortly")
+        self._prune()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        job = UploadJob(
+            id=str(uuid.uuid4()),
+            filename=filename,
+            stages={stage: "pending" for stage in stages},
+        )
+        self._jobs[job.id] = job
+
+        # Keep a reference so the task isn't garbage collected mid-run
+        task = asyncio.create_task(self._run(job, fn, cleanup))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: UploadJob, fn: JobFunction, cleanup: Optional[Callable[[], None]]):
+        try:
+            async with self._slots:
+                job.status = "running"
+                try:
+                    job.result = await fn(job)
+                    job.status = "completed"
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e)
+                    print(f"Upload job {job.id} failed: {e}")
+                finally:
+                    job.finished_at = time.time()
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        """Get a job by ID (None if unknown or expired)."""
+        return self._jobs.get(job_id)
+
+    @property
+    def active(self) -> int:
+        """Jobs queued or running."""
+        return len(self._tasks)
+
+    @property
+    def is_full(self) -> bool:
+        """Whether a new job would be rejected."""
+        return self.active >= self.workers + self.max_queued
+
+    def _prune(self):
+        """Forget jobs that finished more than ttl_seconds ago."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def shutdown(self):
+        """Cancel jobs that haven't finished."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+@lru_cache()
+def get_upload_job_queue() -> UploadJobQueue:
+    """Get the shared upload job queue configured from settings."""
+    settings = get_settings()
+    return UploadJobQueue(
+        workers=settings.upload_job_workers,
+        ttl_seconds=settings.upload_job_ttl_seconds,
+        max_queued=settings.upload_job_queue_size,
+    )
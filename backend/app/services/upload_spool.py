@@ -0,0 +1,193 @@
+"""
+Upload Spool
+Copies uploaded files to a temp file in fixed-size chunks instead of
+reading them into memory, hashing as it goes. A request holds at most one
+chunk of the file in memory whatever its size.
+
+By the time a route gets an UploadFile, Starlette has already received
+the whole multipart body into its own spooled temp file, so the size
+checks here only stop an oversized file from being copied and processed.
+Oversized requests are turned away before the body is read by
+UploadSizeLimitMiddleware (app/api/upload_limit.py).
+
+Connectors and parse workers are handed the temp file path, so large files
+are never copied into (or pickled across) processes as bytes. Zip archives
+of several files can be unpacked into one spooled upload per member.
+"""
+
+import hashlib
+import mimetypes
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload passes the size limit."""
+    pass
+
+
+@dataclass
+class SpooledUpload:
+    """An upload written to a temp file; removed on cleanup()."""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+    content_type: Optional[str] = None
+
+    def open(self) -> BinaryIO:
+        """Open the spooled file for reading."""
+        return open(self.path, "rb")
+
+    def cleanup(self):
+        """Delete the temp file."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+
+def _write_chunk(out: BinaryIO, digest, chunk: bytes):
+    out.write(chunk)
+    digest.update(chunk)
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_bytes: int,
+    tmp_dir: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    Stream an upload to a temp file.
+
+    The file keeps its extension so path-based readers (ezdxf, sqlite3,
+    zipfile) can rely on it. Use the result as a context manager to remove
+    the temp file when done:
+
+        with await spool_upload(file, max_bytes) as upload:
+            result = await connector.process_file(upload.path, upload.filename)
+
+    Raises:
+        UploadTooLarge: The upload is bigger than max_bytes
+    """
+    # Starlette records the size once the multipart part is parsed (the
+    # file is already on disk; this only skips copying it)
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload is {file.size} bytes; limit is {max_bytes}")
+
+    filename = file.filename or "unknown"
+    suffix = os.path.splitext(filename)[1].lower()
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=tmp_dir)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload is over the {max_bytes} byte limit")
+                # Disk write and hashing release the GIL; keep them off the event loop
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return SpooledUpload(
+        path=path,
+        filename=filename,
+        size=size,
+        sha256=digest.hexdigest(),
+        content_type=file.content_type,
+    )
+
+
+def unpack_archive(
+    path: str,
+    extensions: list[str],
+    max_bytes: int,
+    max_files: int,
+    tmp_dir: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_total_bytes: Optional[int] = None,
+) -> list[SpooledUpload]:
+    """
+    Spool each member of a zip archive with one of the given extensions
+    (blocking; run it in a thread). Members keep their base file name;
+    folders, macOS resource forks and other file types are skipped.
+
+    Raises:
+        UploadTooLarge: A member is bigger than max_bytes, the members
+            together inflate to more than max_total_bytes, or the archive
+            has more than max_files members to unpack
+        zipfile.BadZipFile: Not a zip archive
+    """
+    uploads: list[SpooledUpload] = []
+    total = 0
+    try:
+        with zipfile.ZipFile(path) as zf:
+            members = [
+                info for info in zf.infolist()
+                if not info.is_dir()
+                and "__MACOSX" not in PurePosixPath(info.filename).parts
+                and not PurePosixPath(info.filename).name.startswith("._")
+                and PurePosixPath(info.filename).suffix.lower().lstrip(".") in extensions
+            ]
+            if len(members) > max_files:
+                raise UploadTooLarge(f"Archive has {len(members)} files; limit is {max_files}")
+
+            for info in members:
+                filename = PurePosixPath(info.filename).name
+                if info.file_size > max_bytes:
+                    raise UploadTooLarge(f"{filename} is {info.file_size} bytes; limit is {max_bytes}")
+
+                fd, member_path = tempfile.mkstemp(
+                    prefix="upload-", suffix=PurePosixPath(filename).suffix.lower(), dir=tmp_dir
+                )
+                digest = hashlib.sha256()
+                size = 0
+                try:
+                    with os.fdopen(fd, "wb") as out, zf.open(info) as member:
+                        while chunk := member.read(chunk_size):
+                            # The declared size can lie; count what is actually inflated
+                            size += len(chunk)
+                            total += len(chunk)
+                            if size > max_bytes:
+                                raise UploadTooLarge(f"{filename} is over the {max_bytes} byte limit")
+                            if max_total_bytes is not None and total > max_total_bytes:
+                                raise UploadTooLarge(f"Archive unpacks to more than {max_total_bytes} bytes")
+                            _write_chunk(out, digest, chunk)
+                except BaseException:
+                    os.unlink(member_path)
+                    raise
+
+                uploads.append(SpooledUpload(
+                    path=member_path,
+                    filename=filename,
+                    size=size,
+                    sha256=digest.hexdigest(),
+                    content_type=mimetypes.guess_type(filename)[0],
+                ))
+    except BaseException:
+        for upload in uploads:
+            upload.cleanup()
+        raise
+
+    return uploads
@@ -0,0 +1,80 @@
+"""
+XML Stream
+Streaming XML reading for large KML and QGIS project files.
+
+The document is fed through the expat-backed XMLParser in chunks, with a
+target that hands each element's start and end to a StreamHandler instead
+of building a tree. No elements are kept, so memory stays flat however
+large the document is.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import IO, Union
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def local_name(tag: str) -> str:
+    """Tag without its namespace ("{http://www.opengis.net/kml/2.2}Placemark" -> "Placemark")."""
+    return tag.rpartition("}")[2]
+
+
+class StreamHandler:
+    """
+    Receives elements from stream_parse().
+
+    Tags have their namespace stripped. ancestors is the list of open tags
+    above the element (outermost first); it changes as parsing goes on, so
+    copy it to keep it.
+    """
+
+    def start(self, tag: str, attrib: dict, ancestors: list[str]):
+        pass
+
+    def end(self, tag: str, text: str, ancestors: list[str]):
+        """text is the element's character data (meaningful for leaf elements)."""
+        pass
+
+
+class _Target:
+    """XMLParser target that tracks ancestors and text for a StreamHandler."""
+
+    def __init__(self, handler: StreamHandler):
+        self.handler = handler
+        self.tags: list[str] = []
+        self.text: list[str] = []
+
+    def start(self, tag: str, attrib: dict):
+        tag = local_name(tag)
+        self.handler.start(tag, attrib, self.tags)
+        self.tags.append(tag)
+        self.text = []
+
+    def data(self, data: str):
+        self.text.append(data)
+
+    def end(self, tag: str):
+        tag = self.tags.pop()
+        self.handler.end(tag, "".join(self.text), self.tags)
+        self.text = []
+
+    def close(self):
+        return None
+
+
+def stream_parse(source: Union[str, IO[bytes]], handler: StreamHandler, chunk_size: int = CHUNK_SIZE):
+    """
+    Parse a file path or binary stream, calling handler for each element.
+
+    Raises:
+        xml.etree.ElementTree.ParseError: The document is not well-formed
+    """
+    parser = ET.XMLParser(target=_Target(handler))
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            while chunk := f.read(chunk_size):
+                parser.feed(chunk)
+    else:
+        while chunk := source.read(chunk_size):
+            parser.feed(chunk)
+    parser.close()
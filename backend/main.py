@@ -5,6 +5,11 @@ from contextlib import asynccontextmanager
 from app.core.config import get_settings
 from app.api import files, connectors, workflows, property, ai
 from app.api.v1 import da_tracking, property_sales, tiles
+from app.api.upload_limit import UploadSizeLimitMiddleware
+from app.api.v1.tile_fastpath import TileFastPathMiddleware
+from app.services.parse_pool import get_parse_pool
+from app.services.storage_upload import get_storage_uploader
+from app.services.upload_jobs import get_upload_job_queue
 
 
 @asynccontextmanager
@@ -15,6 +20,9 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("Shutting down...")
+    await get_upload_job_queue().shutdown()
+    get_parse_pool().shutdown()
+    await get_storage_uploader().close()
 
 
 app = FastAPI(
@@ -24,8 +32,19 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Configure CORS
 settings = get_settings()
+
+# Reject oversized uploads before their multipart body is spooled
+# (added before CORS so the 413 still gets CORS headers)
+file_limit = settings.max_file_size_mb * 1024 * 1024
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    "/api/v1/files/upload": file_limit,
+    "/api/v1/files/jobs": file_limit,
+    "/api/v1/files/parse": file_limit,
+    "/api/v1/files/upload/batch": settings.batch_upload_max_total_mb * 1024 * 1024,
+})
+
+# Configure CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -34,6 +53,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Serve static tiles ahead of routing and the rest of the middleware stack
+# (added last so it runs first); everything else falls through
+app.add_middleware(TileFastPathMiddleware, prefix="/api/v1/tiles")
+
 # Include routers
 app.include_router(files.router, prefix="/api/v1")
 app.include_router(connectors.router, prefix="/api/v1")
@@ -0,0 +1,113 @@
+-- Siteora Dynamic Vector Tiles
+-- Renders Mapbox Vector Tiles from the planning tables with ST_AsMVT.
+-- Requires PostGIS 3.1+ (ST_TileEnvelope with margin).
+
+-- ============================================================================
+-- PLANNING TILE FUNCTION
+-- Returns one MVT layer for an XYZ tile. Geometries are simplified with a
+-- tolerance of one tile unit, so low zooms are simplified more aggressively.
+-- ============================================================================
+CREATE OR REPLACE FUNCTION get_planning_tile(
+    p_layer TEXT,
+    p_z INTEGER,
+    p_x INTEGER,
+    p_y INTEGER
+)
+RETURNS BYTEA AS $$
+DECLARE
+    tile BYTEA;
+    tile_bounds GEOMETRY := ST_TileEnvelope(p_z, p_x, p_y);
+    -- Query envelope in storage SRID, padded by the 64 unit tile buffer
+    query_bounds GEOMETRY := ST_Transform(ST_TileEnvelope(p_z, p_x, p_y, margin => 64.0 / 4096), 4326);
+    -- Size of one tile unit (of a 4096 extent) in metres at this zoom
+    tolerance DOUBLE PRECISION := (ST_XMax(tile_bounds) - ST_XMin(tile_bounds)) / 4096;
+BEGIN
+    IF p_layer = 'planning_zones' THEN
+        SELECT ST_AsMVT(mvt, 'planning_zones', 4096, 'geom') INTO tile
+        FROM (
+            SELECT
+                pz.id::TEXT AS id,
+                pz.state,
+                pz.zone_code,
+                pz.zone_name,
+                pz.zone_category,
+                pz.lga_name,
+                ST_AsMVTGeom(
+                    ST_SimplifyPreserveTopology(ST_Transform(pz.geometry, 3857), tolerance),
+                    tile_bounds, 4096, 64, true
+                ) AS geom
+            FROM planning_zones pz
+            WHERE pz.geometry && query_bounds
+        ) mvt
+        WHERE mvt.geom IS NOT NULL;
+
+    ELSIF p_layer = 'hazard_overlays' THEN
+        SELECT ST_AsMVT(mvt, 'hazard_overlays', 4096, 'geom') INTO tile
+        FROM (
+            SELECT
+                ho.id::TEXT AS id,
+                ho.state,
+                ho.hazard_type,
+                ho.hazard_category,
+                ho.hazard_level,
+                ho.name,
+                ho.lga_name,
+                ST_AsMVTGeom(
+                    ST_SimplifyPreserveTopology(ST_Transform(ho.geometry, 3857), tolerance),
+                    tile_bounds, 4096, 64, true
+                ) AS geom
+            FROM hazard_overlays ho
+            WHERE ho.geometry && query_bounds
+        ) mvt
+        WHERE mvt.geom IS NOT NULL;
+
+    ELSIF p_layer = 'development_controls' THEN
+        SELECT ST_AsMVT(mvt, 'development_controls', 4096, 'geom') INTO tile
+        FROM (
+            SELECT
+                dc.id::TEXT AS id,
+                dc.state,
+                dc.zone_code,
+                dc.control_type,
+                dc.control_name,
+                dc.min_value::DOUBLE PRECISION AS min_value,
+                dc.max_value::DOUBLE PRECISION AS max_value,
+                dc.unit,
+                dc.lga_name,
+                ST_AsMVTGeom(
+                    ST_SimplifyPreserveTopology(ST_Transform(dc.geometry, 3857), tolerance),
+                    tile_bounds, 4096, 64, true
+                ) AS geom
+            FROM development_controls dc
+            WHERE dc.geometry IS NOT NULL
+            AND dc.geometry && query_bounds
+        ) mvt
+        WHERE mvt.geom IS NOT NULL;
+
+    ELSIF p_layer = 'heritage_items' THEN
+        SELECT ST_AsMVT(mvt, 'heritage_items', 4096, 'geom') INTO tile
+        FROM (
+            SELECT
+                hi.id::TEXT AS id,
+                hi.state,
+                hi.heritage_type,
+                hi.listing_name,
+                hi.listing_number,
+                hi.significance,
+                hi.lga_name,
+                ST_AsMVTGeom(
+                    ST_SimplifyPreserveTopology(ST_Transform(hi.geometry, 3857), tolerance),
+                    tile_bounds, 4096, 64, true
+                ) AS geom
+            FROM heritage_items hi
+            WHERE hi.geometry && query_bounds
+        ) mvt
+        WHERE mvt.geom IS NOT NULL;
+
+    ELSE
+        RAISE EXCEPTION 'Unknown tile layer: %', p_layer;
+    END IF;
+
+    RETURN COALESCE(tile, ''::BYTEA);
+END;
+$$ LANGUAGE plpgsql STABLE PARALLEL SAFE;
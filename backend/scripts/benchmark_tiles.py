@@ -0,0 +1,353 @@
+"""
+Tile Server Benchmark
+Replays map pan/zoom traffic against /api/v1/tiles through the ASGI app
+in-process and reports throughput, latency percentiles and event-loop
+blocking time.
+
+A synthetic mbtiles is generated around Brisbane (or an existing .mbtiles
+can be replayed). Sessions start at a Zipf-distributed tile (a few hot
+areas get most traffic), fetch the viewport around it, then pan and zoom.
+
+Usage:
+    python scripts/benchmark_tiles.py
+    python scripts/benchmark_tiles.py --requests 20000 --concurrency 64 --grid 128
+    python scripts/benchmark_tiles.py --archive data/tiles/brisbane-flood.mbtiles
+    python scripts/benchmark_tiles.py --bare --json results.json
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.mbtiles_writer import MBTilesWriter
+from app.services.tile_math import lonlat_to_tile
+from app.services.tile_store import TILESETS, flip_y
+
+
+BENCH_TILESET = "benchmark"
+
+# Brisbane CBD
+CENTER_LON, CENTER_LAT = 153.0251, -27.4698
+
+# Viewport size in tiles (a 1280x768 map with 256px tiles)
+VIEWPORT = (5, 3)
+
+
+# =============================================================================
+# SYNTHETIC TILESET
+# =============================================================================
+
+def generate_tileset(
+    path: Path,
+    minzoom: int,
+    maxzoom: int,
+    grid: int,
+    tile_size: int,
+    seed: int,
+) -> int:
+    """
+    Write a synthetic mbtiles around Brisbane.
+
+    Each zoom has a grid x grid block of tiles centred on the CBD. Payloads
+    are gzipped random bytes of roughly tile_size bytes.
+
+    Returns:
+        Number of tiles written
+    """
+    rng = np.random.default_rng(seed)
+
+    with MBTilesWriter(path) as writer:
+        for z in range(minzoom, maxzoom + 1):
+            cx, cy = lonlat_to_tile(CENTER_LON, CENTER_LAT, z)
+            n = 1 << z
+            half = grid // 2
+            for x in range(max(0, cx - half), min(n, cx + half)):
+                for y in range(max(0, cy - half), min(n, cy + half)):
+                    size = max(16, int(rng.normal(tile_size, tile_size / 4)))
+                    # Half random, half repetitive so gzip behaves like real tiles
+                    payload = rng.bytes(size // 2) + bytes(size - size // 2)
+                    writer.put_tile(z, x, y, gzip.compress(payload, mtime=0))
+
+        writer.set_metadata({
+            "name": BENCH_TILESET,
+            "format": "pbf",
+            "minzoom": minzoom,
+            "maxzoom": maxzoom,
+        })
+        return writer.tile_count
+
+
+def read_tile_index(path: Path) -> dict[int, list[tuple[int, int]]]:
+    """Get the XYZ tiles per zoom stored in an mbtiles file."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        tiles: dict[int, list[tuple[int, int]]] = {}
+        for z, x, row in conn.execute("SELECT zoom_level, tile_column, tile_row FROM tiles"):
+            tiles.setdefault(z, []).append((x, flip_y(row, z)))
+    finally:
+        conn.close()
+    return tiles
+
+
+# =============================================================================
+# ACCESS PATTERN
+# =============================================================================
+
+def zipf_weights(count: int, exponent: float) -> np.ndarray:
+    """Normalized Zipf weights for ranks 1..count."""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_requests(
+    tiles: dict[int, list[tuple[int, int]]],
+    total: int,
+    zipf_exponent: float,
+    seed: int,
+) -> list[tuple[int, int, int]]:
+    """
+    Build a pan/zoom request sequence.
+
+    Tiles are ranked by distance from the tileset centre at each zoom, and
+    sessions start at a Zipf-sampled rank. Each step requests the viewport
+    around the current tile, then pans (usually) or zooms in/out.
+    """
+    rng = random.Random(seed)
+    zooms = sorted(tiles)
+    ranked: dict[int, list[tuple[int, int]]] = {}
+    weights: dict[int, np.ndarray] = {}
+    for z in zooms:
+        xs = np.array([x for x, _ in tiles[z]])
+        ys = np.array([y for _, y in tiles[z]])
+        order = np.argsort((xs - xs.mean()) ** 2 + (ys - ys.mean()) ** 2)
+        ranked[z] = [tiles[z][i] for i in order]
+        weights[z] = zipf_weights(len(order), zipf_exponent)
+
+    np_rng = np.random.default_rng(seed)
+    requests: list[tuple[int, int, int]] = []
+    vw, vh = VIEWPORT
+
+    while len(requests) < total:
+        # New session at a popular spot on a popular zoom (the middle zooms)
+        z = zooms[min(len(zooms) - 1, int(abs(rng.gauss(len(zooms) / 2, len(zooms) / 4))))]
+        x, y = ranked[z][np_rng.choice(len(ranked[z]), p=weights[z])]
+
+        for _ in range(rng.randint(3, 15)):
+            n = 1 << z
+            for dy in range(-(vh // 2), vh - vh // 2):
+                for dx in range(-(vw // 2), vw - vw // 2):
+                    requests.append((z, (x + dx) % n, min(max(y + dy, 0), n - 1)))
+
+            action = rng.random()
+            if action < 0.7:
+                x += rng.choice((-2, -1, 1, 2))
+                y += rng.choice((-1, 0, 1))
+            elif action < 0.85 and z < zooms[-1]:
+                z, x, y = z + 1, x * 2, y * 2
+            elif z > zooms[0]:
+                z, x, y = z - 1, x // 2, y // 2
+
+    return requests[:total]
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+@contextmanager
+def measure_loop_steps(durations: list[float]):
+    """
+    Record how long each event-loop callback runs.
+
+    A callback holds the loop for its whole duration, so long steps are
+    time during which no other request can make progress. Handlers that do
+    blocking work inline show up here; work moved to a thread pool doesn't.
+    """
+    original = asyncio.events.Handle._run
+
+    def timed_run(handle):
+        started = time.perf_counter()
+        try:
+            return original(handle)
+        finally:
+            durations.append(time.perf_counter() - started)
+
+    asyncio.events.Handle._run = timed_run
+    try:
+        yield
+    finally:
+        asyncio.events.Handle._run = original
+
+
+async def run_benchmark(
+    app,
+    requests: list[tuple[int, int, int]],
+    concurrency: int,
+    warmup: int,
+    block_threshold_ms: float = 1.0,
+) -> dict:
+    """Replay requests (the first ``warmup`` unmeasured) and collect statistics."""
+    transport = httpx.ASGITransport(app=app)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    bytes_received = 0
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm caches and open the tile store
+        for z, x, y in requests[:warmup]:
+            await client.get(f"/api/v1/tiles/{BENCH_TILESET}/{z}/{x}/{y}.pbf")
+
+        for request in requests[warmup:]:
+            queue.put_nowait(request)
+
+        async def worker():
+            nonlocal bytes_received
+            while True:
+                try:
+                    z, x, y = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                response = await client.get(f"/api/v1/tiles/{BENCH_TILESET}/{z}/{x}/{y}.pbf")
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+                bytes_received += len(response.content)
+                # Let other clients in, as a real network round trip would
+                await asyncio.sleep(0)
+
+        steps: list[float] = []
+        with measure_loop_steps(steps):
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    latency_ms = np.array(latencies) * 1000
+    step_ms = np.array(steps or [0.0]) * 1000
+    blocking_ms = step_ms[step_ms >= block_threshold_ms]
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(latencies) / elapsed,
+        "mb_per_s": bytes_received / elapsed / 1e6,
+        "latency_ms": {
+            "mean": float(latency_ms.mean()),
+            "p50": float(np.percentile(latency_ms, 50)),
+            "p95": float(np.percentile(latency_ms, 95)),
+            "p99": float(np.percentile(latency_ms, 99)),
+            "max": float(latency_ms.max()),
+        },
+        "event_loop": {
+            "threshold_ms": block_threshold_ms,
+            "blocked_ms": float(blocking_ms.sum()),
+            "blocked_pct": float(blocking_ms.sum() / 1000 / elapsed * 100),
+            "blocking_steps": int(len(blocking_ms)),
+            "p99_step_ms": float(np.percentile(step_ms, 99)),
+            "max_step_ms": float(step_ms.max()),
+        },
+        "status_codes": dict(statuses),
+    }
+
+
+def load_app(bare: bool):
+    """Get the ASGI app: the full application, or only the tiles router."""
+    if bare:
+        from fastapi import FastAPI
+        from app.api.v1 import tiles
+
+        app = FastAPI()
+        app.include_router(tiles.router, prefix="/api/v1")
+        return app
+
+    from main import app
+    return app
+
+
+def print_report(results: dict):
+    latency = results["latency_ms"]
+    loop = results["event_loop"]
+    print(f"  Requests:       {results['requests']} ({results['concurrency']} concurrent)")
+    print(f"  Throughput:     {results['requests_per_s']:.0f} req/s ({results['mb_per_s']:.1f} MB/s)")
+    print(
+        f"  Latency (ms):   p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  "
+        f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}"
+    )
+    print(
+        f"  Event loop:     blocked {loop['blocked_ms']:.0f} ms ({loop['blocked_pct']:.1f}%) "
+        f"in {loop['blocking_steps']} steps >= {loop['threshold_ms']:g} ms, "
+        f"p99 step {loop['p99_step_ms']:.2f} ms, max step {loop['max_step_ms']:.2f} ms"
+    )
+    print(f"  Status codes:   {results['status_codes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vector tile server")
+    parser.add_argument("--archive", help="Replay an existing .mbtiles instead of a synthetic one")
+    parser.add_argument("--minzoom", type=int, default=10, help="Synthetic tileset min zoom")
+    parser.add_argument("--maxzoom", type=int, default=16, help="Synthetic tileset max zoom")
+    parser.add_argument("--grid", type=int, default=64, help="Synthetic tiles per side at each zoom")
+    parser.add_argument("--tile-size", type=int, default=20000, help="Mean synthetic tile size (bytes)")
+    parser.add_argument("--requests", type=int, default=10000, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=500, help="Warm-up requests (not measured)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of start tiles")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--block-threshold", type=float, default=1.0, help="Loop step (ms) counted as blocking")
+    parser.add_argument("--bare", action="store_true", help="Mount only the tiles router (no app middleware)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.archive:
+            path = Path(args.archive).resolve()
+            print(f"Replaying {path}")
+        else:
+            path = Path(tmp) / f"{BENCH_TILESET}.mbtiles"
+            count = generate_tileset(
+                path, args.minzoom, args.maxzoom, args.grid, args.tile_size, args.seed
+            )
+            print(f"Generated {count} synthetic tiles (z{args.minzoom}-{args.maxzoom})")
+
+        # Absolute paths are used as-is by the tile store
+        TILESETS[BENCH_TILESET] = str(path)
+
+        requests = generate_requests(
+            read_tile_index(path), args.requests + args.warmup, args.zipf, args.seed
+        )
+        unique = len(set(requests))
+        print(f"Replaying {args.requests} requests over {unique} distinct tiles...\n")
+
+        app = load_app(args.bare)
+        results = asyncio.run(
+            run_benchmark(app, requests, args.concurrency, args.warmup, args.block_threshold)
+        )
+        results["archive"] = str(args.archive or "synthetic")
+        results["distinct_tiles"] = unique
+
+        print_report(results)
+
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, indent=2))
+            print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Brisbane Flood Tile Builder
+Downloads the Brisbane City Council flood awareness layers from ArcGIS and
+builds data/tiles/brisbane-flood.mbtiles, served at /api/v1/tiles/flood.
+
+Re-running only re-renders tiles touched by features that were added,
+changed or removed since the previous build.
+
+Usage:
+    python scripts/build_flood_tiles.py
+    python scripts/build_flood_tiles.py --skip-download   # Rebuild from data/flood
+    python scripts/build_flood_tiles.py --full --workers 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tile_generator import LayerSource
+from app.services.tile_pipeline import build_tileset, download_arcgis_layer
+from app.services.tile_store import BACKEND_ROOT, TILESETS
+
+
+ARCGIS_BASE = "https://services2.arcgis.com/dEKgZETqwmDAh1rP/arcgis/rest/services"
+
+FLOOD_LAYERS = {
+    "flood_overall": "Flood_Awareness_Flood_Risk_Overall",
+    "flood_river": "Flood_Awareness_River",
+    "flood_creek": "Flood_Awareness_Creek",
+    "flood_overland": "Flood_Awareness_Overland_Flow",
+    "flood_historic_2022": "Flood_Awareness_Historic_Brisbane_River_and_Creek_Floods_Feb2022",
+    "flood_historic_2011": "Flood_Awareness_Historic_Brisbane_River_Floods_Jan2011",
+    "flood_historic_1974": "Flood_Awareness_Historic_Brisbane_River_Floods_Jan1974",
+}
+
+DATA_DIR = BACKEND_ROOT / "data" / "flood"
+OUTPUT = BACKEND_ROOT / TILESETS["flood"]
+MINZOOM = 10
+MAXZOOM = 16
+
+
+async def download_layers(layers: list[str], concurrency: int) -> dict[str, int]:
+    """Download flood layers in parallel; failed layers are reported and skipped."""
+    semaphore = asyncio.Semaphore(concurrency)
+    counts: dict[str, int] = {}
+
+    async def download(client: httpx.AsyncClient, layer: str):
+        url = f"{ARCGIS_BASE}/{FLOOD_LAYERS[layer]}/FeatureServer/0"
+        async with semaphore:
+            try:
+                counts[layer] = await download_arcgis_layer(client, url, DATA_DIR / f"{layer}.geojson")
+                print(f"  ✓ {layer}: {counts[layer]} features")
+            except Exception as e:
+                print(f"  ✗ Failed to download {layer}: {e}")
+
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        await asyncio.gather(*(download(client, layer) for layer in layers))
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build Brisbane flood vector tiles")
+    parser.add_argument("--layer", action="append", choices=list(FLOOD_LAYERS), help="Only include these layers")
+    parser.add_argument("--skip-download", action="store_true", help="Use previously downloaded GeoJSON")
+    parser.add_argument("--full", action="store_true", help="Rebuild every tile, not just changed ones")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count)")
+    parser.add_argument("--downloads", type=int, default=4, help="Concurrent layer downloads")
+    parser.add_argument("--output", help="Output mbtiles path")
+
+    args = parser.parse_args()
+    layers = args.layer or list(FLOOD_LAYERS)
+
+    print("=== Brisbane Flood Data Vector Tile Builder ===\n")
+
+    if not args.skip_download:
+        print("Step 1: Downloading flood data from Brisbane City Council...")
+        asyncio.run(download_layers(layers, args.downloads))
+        print()
+
+    sources = [
+        LayerSource(
+            path=str(DATA_DIR / f"{layer}.geojson"),
+            name=layer,
+            minzoom=MINZOOM,
+            maxzoom=MAXZOOM,
+        )
+        for layer in layers
+        if (DATA_DIR / f"{layer}.geojson").exists()
+    ]
+    if not sources:
+        print(f"Error: No GeoJSON files found in {DATA_DIR}")
+        sys.exit(1)
+
+    output = Path(args.output) if args.output else OUTPUT
+
+    def progress(done: int, total: int):
+        if done % 1000 == 0 or done == total:
+            print(f"  Rendered {done}/{total} tiles", end="\r", flush=True)
+
+    print(f"Step 2: Building tiles (z{MINZOOM}-{MAXZOOM}) from {len(sources)} layer(s)...")
+    started = time.perf_counter()
+    result = build_tileset(
+        sources,
+        output,
+        name="Brisbane Flood Awareness",
+        minzoom=MINZOOM,
+        maxzoom=MAXZOOM,
+        workers=args.workers,
+        incremental=not args.full,
+        progress=progress,
+    )
+    elapsed = time.perf_counter() - started
+
+    print()
+    for source in sources:
+        added = result.features_added.get(source.name, 0)
+        removed = result.features_removed.get(source.name, 0)
+        print(f"  {source.name}: +{added} / -{removed} features")
+
+    mode = "Incremental" if result.incremental else "Full"
+    print(f"\n=== {mode} build complete in {elapsed:.1f}s ===")
+    print(f"  Rendered {result.tiles_rendered} tiles, wrote {result.tiles_written}, removed {result.tiles_deleted}")
+    print(f"  MBTiles: {output}")
+    print("  Served at /api/v1/tiles/flood/{z}/{x}/{y}.pbf")
+
+
+if __name__ == "__main__":
+    main()
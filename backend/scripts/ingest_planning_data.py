@@ -20,6 +20,10 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from shapely.geometry import shape
+
+from app.services.dynamic_tile_service import PLANNING_LAYERS, dynamic_tile_service
+
 
 # ============================================================================
 # QLD DATA SOURCES
@@ -201,11 +205,42 @@ class PlanningDataIngester:
                     json=records,
                 )
                 response.raise_for_status()
+                self.invalidate_tiles(table, records)
                 return response.json()
             except Exception as e:
                 print(f"Error inserting to {table}: {e}")
                 return None
 
+    def invalidate_tiles(self, table: str, records: list[dict]) -> int:
+        """Drop cached dynamic tiles covering the geometries just ingested."""
+        if table not in PLANNING_LAYERS:
+            return 0
+
+        bounds = [
+            shape(json.loads(record["geometry"])).bounds
+            for record in records
+            if record.get("geometry")
+        ]
+        if not bounds:
+            return 0
+
+        bbox = (
+            min(b[0] for b in bounds),
+            min(b[1] for b in bounds),
+            max(b[2] for b in bounds),
+            max(b[3] for b in bounds),
+        )
+
+        try:
+            removed = dynamic_tile_service.invalidate(table, bbox)
+        except Exception as e:
+            print(f"Error invalidating {table} tiles: {e}")
+            return 0
+
+        if removed:
+            print(f"  Invalidated {removed} cached {table} tiles")
+        return removed
+
     async def ingest_qld_zoning(self, lga: str, bbox: tuple) -> int:
         """Ingest QLD zoning data for an LGA."""
         print(f"Fetching QLD zoning data for {lga}...")
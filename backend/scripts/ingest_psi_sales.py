@@ -0,0 +1,66 @@
+"""
+NSW Property Sales Ingestion Script
+Loads NSW Valuer General bulk sales data (PSI .DAT files, or the weekly and
+yearly zips they are published in) into the local sales store, which then
+serves /api/v1/sales/search, /nearby and /statistics.
+
+Sales are placed on the map by property id, from a CSV of property
+locations (property_id, lat, lon); load it with --locations.
+
+Usage:
+    python scripts/ingest_psi_sales.py --bulk data/psi/2024.zip data/psi/2025.zip
+    python scripts/ingest_psi_sales.py data/psi/weekly/20260105.zip   # Weekly update
+    python scripts/ingest_psi_sales.py --locations data/psi/property_locations.csv
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.sales_store import get_sales_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load NSW VG property sales")
+    parser.add_argument("paths", nargs="*", type=Path, help="PSI .DAT files, zips of them, or folders of either")
+    parser.add_argument("--bulk", action="store_true", help="Rebuild indexes once at the end (first or yearly loads)")
+    parser.add_argument("--locations", type=Path, help="CSV of property_id, lat, lon")
+
+    args = parser.parse_args()
+    if not args.paths and not args.locations:
+        parser.error("Give PSI files to load and/or --locations")
+
+    store = get_sales_store()
+    print("=== NSW Property Sales Ingestion ===\n")
+
+    if args.locations:
+        print(f"Loading property locations from {args.locations}...")
+        count = store.load_locations(args.locations)
+        print(f"  ✓ {count} locations\n")
+
+    paths = []
+    for path in args.paths:
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in (".dat", ".zip")))
+        else:
+            paths.append(path)
+
+    if paths:
+        mode = "Bulk" if args.bulk else "Incremental"
+        print(f"{mode} load of {len(paths)} file(s)...")
+        result = store.bulk_load(paths) if args.bulk else store.load_files(paths)
+        print(f"  ✓ {result.sales} sales from {result.files} .DAT file(s) in {result.elapsed_seconds:.1f}s")
+        if result.skipped_files:
+            print(f"  Skipped {len(result.skipped_files)} file(s) already loaded")
+        if result.rejected:
+            print(f"  Rejected {result.rejected} record(s) without a price or contract date")
+
+    print(f"\n  Store: {store.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Vector Tile Seeding Script
+Renders GeoJSON/GeoPackage layers into an mbtiles tileset served by
+/api/v1/tiles/{tileset}/{z}/{x}/{y}.pbf. Does not need PostGIS or tippecanoe.
+
+Usage:
+    python scripts/seed_tiles.py data/uploads/lots.geojson --tileset lots
+    python scripts/seed_tiles.py site.gpkg --source-layer parcels --tileset site --maxzoom 17
+    python scripts/seed_tiles.py a.geojson b.geojson --tileset combined --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tile_generator import LayerSource, seed_tiles
+from app.services.tile_store import BACKEND_ROOT, TILES_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed vector tiles into mbtiles")
+    parser.add_argument("inputs", nargs="+", help="GeoJSON or GeoPackage files (one tile layer each)")
+    parser.add_argument("--tileset", required=True, help="Tileset name (output is data/tiles/<tileset>.mbtiles)")
+    parser.add_argument("--layer", action="append", help="Tile layer name per input (defaults to file name)")
+    parser.add_argument("--source-layer", help="GeoPackage layer to read")
+    parser.add_argument("--minzoom", type=int, default=10, help="Minimum zoom level")
+    parser.add_argument("--maxzoom", type=int, default=16, help="Maximum zoom level")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", help="Output mbtiles path (overrides --tileset location)")
+
+    args = parser.parse_args()
+
+    if args.layer and len(args.layer) != len(args.inputs):
+        parser.error("--layer must be given once per input")
+
+    sources = [
+        LayerSource(
+            path=path,
+            name=args.layer[i] if args.layer else Path(path).stem,
+            source_layer=args.source_layer,
+            minzoom=args.minzoom,
+            maxzoom=args.maxzoom,
+        )
+        for i, path in enumerate(args.inputs)
+    ]
+
+    output = Path(args.output) if args.output else BACKEND_ROOT / TILES_DIR / f"{args.tileset}.mbtiles"
+
+    def progress(done: int, total: int):
+        if done % 1000 == 0 or done == total:
+            print(f"  Rendered {done}/{total} tiles", end="\r", flush=True)
+
+    print(f"Seeding {args.tileset} (z{args.minzoom}-{args.maxzoom}) from {len(sources)} layer(s)...")
+    started = time.perf_counter()
+    count = seed_tiles(
+        sources,
+        output,
+        name=args.tileset,
+        minzoom=args.minzoom,
+        maxzoom=args.maxzoom,
+        workers=args.workers,
+        progress=progress,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"\n  Wrote {count} tiles to {output} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
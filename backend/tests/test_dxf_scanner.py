@@ -0,0 +1,50 @@
+"""Scanner extents must agree with the full ezdxf parse."""
+
+import io
+
+import ezdxf
+import pytest
+
+from app.services.dxf_parser import DxfParserService
+from app.services.dxf_scanner import scan_dxf
+
+# MGA zone 56 coordinates, far from the origin
+X, Y = 320000.0, 6250000.0
+
+
+def _drawing() -> bytes:
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    msp.add_line((X, Y), (X + 100, Y + 50))
+
+    # Polyline boundary; the elevation point (0, 0, z) must not count
+    hatch = msp.add_hatch()
+    hatch.dxf.elevation = (0, 0, 3)
+    hatch.paths.add_polyline_path([(X + 10, Y + 10), (X + 20, Y + 10), (X + 20, Y + 20)])
+
+    # Edge boundary with an elliptic arc (11/21 is its major axis vector)
+    hatch = msp.add_hatch()
+    edges = hatch.paths.add_edge_path()
+    edges.add_line((X + 5, Y + 5), (X + 30, Y + 5))
+    edges.add_ellipse((X + 30, Y + 15), major_axis=(10, 0), ratio=0.5, start_angle=270, end_angle=90)
+    edges.add_line((X + 30, Y + 25), (X + 5, Y + 5))
+
+    # Spline with tangent vectors (12/22, 13/23)
+    spline = msp.add_open_spline([(X + 60, Y + 10), (X + 70, Y + 20), (X + 80, Y + 5), (X + 90, Y + 15)])
+    spline.dxf.start_tangent = (1, 0, 0)
+    spline.dxf.end_tangent = (0, 1, 0)
+
+    stream = io.StringIO()
+    doc.write(stream)
+    return stream.getvalue().encode()
+
+
+def test_scan_extents_match_full_parse():
+    data = _drawing()
+    error, parsed = DxfParserService.process_dxf(data, "site.dxf")
+    assert error is None
+
+    scanned = scan_dxf(data, "site.dxf")
+    assert scanned.extents.keys() == parsed.extents.keys()
+    for key, value in parsed.extents.items():
+        assert scanned.extents[key] == pytest.approx(value, abs=1e-6), key